@@ -0,0 +1,80 @@
+# Benchmark del arranque de la página 0: tiempo hasta la primera tabla visible (hito 'primera_vista' de
+# eficiencia.medicion) cargando las hojas en frío frente al arranque rápido desde la última exportación
+# (eficiencia.exportacion: Feather mapeado en memoria; el texto se sirve desde el archivo y las fechas,
+# categóricas y números se copian a pandas al abrirlo). La página se ejecuta con streamlit.testing sobre
+# una cartera sintética.
+#
+# Uso: python benchmarks/bench_arranque.py [--projects 100000] [--repeat 3]
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pages', '0_Animation_Demo.py')
+
+
+# Función para leer el último hito registrado en el archivo de mediciones
+def last_mark(path, name):
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    return [record['seconds'] for record in records if record['stage'] == name][-1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--projects', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Las variables de entorno se leen al importar eficiencia
+        os.environ['EFICIENCIA_SOURCE_DIR'] = os.path.join(tmp, 'fuente')
+        os.environ['EFICIENCIA_CACHE_DIR'] = cache_dir = os.path.join(tmp, 'copias')
+        os.environ['EFICIENCIA_EXPORT_DIR'] = os.path.join(tmp, 'exportacion')
+        os.environ['EFICIENCIA_METRICS_FILE'] = metrics = os.path.join(tmp, 'mediciones.jsonl')
+
+        from streamlit.testing.v1 import AppTest
+        from cartera import synthetic_portfolio, write_portfolio
+        from eficiencia import exportacion, incremental, refresco, uniones
+        from eficiencia.compartido import result_cache
+        from eficiencia.fechas import parse_cache
+
+        write_portfolio(os.environ['EFICIENCIA_SOURCE_DIR'], *synthetic_portfolio(args.projects))
+
+        manifest = exportacion.export_sources()
+        print(f"{args.projects:,} proyectos; exportación {manifest['version']}: "
+              f"{manifest['rows']['filtradas']:,} filas filtradas, {manifest['rows']['kpi']:,} de KPI")
+        print(f"{'modo':>16} {'primera vista (s)':>18} {'ejecución (s)':>14}")
+        for fast in (False, True):
+            best_mark, best_run = float('inf'), float('inf')
+            for _ in range(args.repeat):
+                # En frío: sin copias locales, resultados compartidos, fechas ni índices de unión previos
+                shutil.rmtree(cache_dir, ignore_errors=True)
+                result_cache.clear()
+                parse_cache.clear()
+                uniones.join_cache.clear()
+                incremental.default_pipeline.state = None
+                refresco.refresher.stop()
+                refresco.refresher = refresco.Refresher(lambda: refresco.build_version(ttl=refresco.POLL_TTL))
+                exportacion.FAST_START = fast
+
+                start = time.perf_counter()
+                at = AppTest.from_file(PAGE, default_timeout=600).run()
+                seconds = time.perf_counter() - start
+                if at.exception:
+                    raise RuntimeError(at.exception[0].value)
+                best_mark = min(best_mark, last_mark(metrics, 'primera_vista'))
+                best_run = min(best_run, seconds)
+                # La actualización en segundo plano no se superpone con la siguiente medición
+                if fast:
+                    refresco.refresher.wait()
+            print(f"{'arranque rápido' if fast else 'en vivo':>16} {best_mark:18.3f} {best_run:14.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# Benchmark de la carga de hojas: lectura directa frente a la copia local (fría, vigente y revalidada).
+#
+# Uso: python benchmarks/bench_carga.py [--rows 50000]
+import argparse
+import functools
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from eficiencia.carga import SnapshotCache
+
+
+# Función para escribir una hoja CSV sintética con fechas en texto
+def write_sheet(path, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 3000, rows), unit='D')
+    pd.DataFrame({
+        'NoOperacion': [f'OP{i:07d}' for i in range(rows)],
+        'Pais': rng.choice(['ARGENTINA', 'BOLIVIA', 'BRASIL', 'PARAGUAY', 'URUGUAY'], rows),
+        'FechaVigencia': dates.strftime('%d-%b-%y'),
+        'Monto': rng.random(rows) * 1e6,
+    }).to_csv(path, index=False)
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+# Servidor HTTP local que reemplaza a Google Sheets (responde 304 a If-Modified-Since)
+def serve(directory):
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source_dir = os.path.join(tmp, 'fuente')
+        os.makedirs(source_dir)
+        write_sheet(os.path.join(source_dir, 'hoja.csv'), args.rows)
+        server = serve(source_dir)
+        url = f"http://127.0.0.1:{server.server_port}/hoja.csv?gid=1&output=csv"
+
+        cache_dir = os.path.join(tmp, 'cache')
+        cached = SnapshotCache(cache_dir=cache_dir, ttl=3600)
+        revalidated = SnapshotCache(cache_dir=cache_dir, ttl=0)
+
+        results = [
+            ('pd.read_csv directo', timed(lambda: pd.read_csv(url))),
+            ('copia local (fría)', timed(lambda: cached.load(url))),
+            ('copia local (vigente)', timed(lambda: cached.load(url))),
+            ('copia local (revalidada)', timed(lambda: revalidated.load(url))),
+        ]
+        server.shutdown()
+
+    print(f"{args.rows:,} filas")
+    for name, seconds in results:
+        print(f"{name:>26}: {seconds * 1000:9.1f} ms")
+    print(f"{'estado de la revalidación':>26}: {revalidated.last_status['gid-1']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# Benchmark de show_code: costo por ejecución de obtener el código de una función de demostración con
+# inspect.getsourcelines y textwrap.dedent (como lo hacía utils.show_code en cada ejecución) frente al
+# registro de eficiencia.codigo (extracción en frío y pedidos siguientes), y tiempo de volver a ejecutar
+# una página que solo muestra el código, antes y después, con streamlit.testing.
+#
+# Uso: python benchmarks/bench_codigo.py [--repeat 200] [--reruns 20]
+import argparse
+import inspect
+import os
+import statistics
+import sys
+import textwrap
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from eficiencia import kpi, pipeline
+from eficiencia.codigo import SourceRegistry
+
+FUNCTIONS = [pipeline.source_versions, pipeline.merge_sources, kpi.compute_kpis]
+
+
+# Extracción original, en cada ejecución de la página
+def inspect_snippet(func):
+    sourcelines, _ = inspect.getsourcelines(func)
+    return textwrap.dedent("".join(sourcelines[1:]))
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+# Páginas mínimas para streamlit.testing: solo muestran el código de compute_kpis
+def page_before():
+    import inspect
+    import textwrap
+
+    import streamlit as st
+
+    from eficiencia.kpi import compute_kpis
+
+    sourcelines, _ = inspect.getsourcelines(compute_kpis)
+    st.code(textwrap.dedent("".join(sourcelines[1:])))
+
+
+def page_after():
+    import streamlit as st
+
+    from eficiencia.codigo import source_registry
+    from eficiencia.kpi import compute_kpis
+
+    st.code(source_registry.snippet(compute_kpis))
+
+
+def rerun_seconds(page, reruns):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_function(page).run()
+    seconds = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        seconds.append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return statistics.median(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--reruns', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'función':>16} {'líneas':>7} {'inspect (µs)':>13} {'registro en frío (µs)':>22} {'registro (µs)':>14}")
+    for func in FUNCTIONS:
+        expected, before = best_of(lambda: inspect_snippet(func), args.repeat)
+        registry = SourceRegistry()
+        _, cold = best_of(lambda: registry.snippet(func), 1)
+        code, after = best_of(lambda: registry.snippet(func), args.repeat)
+        if code != expected:
+            raise AssertionError(f"código distinto para {func.__qualname__}")
+        print(f"{func.__qualname__:>16} {len(code.splitlines()):7d} {before * 1e6:13.1f} {cold * 1e6:22.1f} "
+              f"{after * 1e6:14.1f}")
+
+    before, after = rerun_seconds(page_before, args.reruns), rerun_seconds(page_after, args.reruns)
+    print(f"\nnueva ejecución de una página con el código: antes {before * 1000:.2f} ms, "
+          f"después {after * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# Benchmark del cubo de KPI: consultas agregadas con eficiencia.cubo frente a groupby sobre la tabla de KPI.
+#
+# Uso: python benchmarks/bench_cubo.py [--projects 100000]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from cartera import synthetic_portfolio
+from eficiencia.cubo import build_cube, with_project_fields
+from eficiencia.pipeline import build_tables
+
+QUERIES = [
+    ('estación × banda', ['ESTACIONES', 'Productividad'], {}),
+    ('país × año, una estación', ['PAIS', 'ANO'], {'ESTACIONES': ['Vigencia']}),
+    ('SEC × ARE, dos países', ['SEC', 'ARE'], {'PAIS': ['BOLIVIA', 'BRASIL']}),
+    ('total, un país y dos años', [], {'PAIS': ['BOLIVIA'], 'ANO': [2018, 2019]}),
+]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+# Consulta de referencia: filtro y groupby sobre la tabla de KPI completa
+def groupby_query(frame, group_by, filters):
+    for dim, values in filters.items():
+        frame = frame[frame[dim].isin(values)]
+    kpi = frame.groupby(group_by, observed=True, dropna=False)['KPI'] if group_by else frame['KPI']
+    return kpi.agg(['size', 'mean', 'min', 'max', lambda s: s.quantile([0.25, 0.5, 0.75, 0.9]).tolist()])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--projects', type=int, default=100_000)
+    args = parser.parse_args()
+
+    filtered_df, results_df = build_tables(*synthetic_portfolio(args.projects))
+    frame = with_project_fields(results_df, filtered_df)
+    cube, build = timed(lambda: build_cube(results_df, filtered_df))
+    print(f"{len(results_df):,} filas de KPI -> {len(cube):,} celdas, {cube.nbytes / 2 ** 20:.1f} MB, "
+          f"construido en {build:.3f} s")
+    print(f"{'consulta':>28} {'groupby (ms)':>13} {'cubo (ms)':>10} {'grupos':>8}")
+    for name, group_by, filters in QUERIES:
+        _, reference = timed(lambda: groupby_query(frame, group_by, filters))
+        result, fast = timed(lambda: cube.query(group_by, filters))
+        print(f"{name:>28} {reference * 1000:13.1f} {fast * 1000:10.1f} {len(result):8,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# Benchmark del KPI por estación a pedido (eficiencia.estaciones): costo de calcular una estación, las
+# cuatro por defecto o todo el registro, en frío y con las estaciones ya calculadas para esa versión,
+# frente a compute_kpis con todas las estaciones del registro; y, tras cambiar las fechas de unos pocos
+# desembolsos, el costo de actualizar las estaciones por defecto solo para las operaciones afectadas
+# (eficiencia.incremental) frente a recalcularlas sobre toda la tabla.
+#
+# Uso: python benchmarks/bench_estaciones.py [--projects 100000] [--changed 0.005]
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from cartera import synthetic_portfolio
+from eficiencia.compartido import ResultCache
+from eficiencia.estaciones import select_kpis
+from eficiencia.incremental import IncrementalPipeline
+from eficiencia.kpi import STATION_REGISTRY, STATIONS, compute_kpis
+from eficiencia.pipeline import build_filtered
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--projects', type=int, default=100_000)
+    parser.add_argument('--changed', type=float, default=0.005, help='proporción de desembolsos que cambian')
+    args = parser.parse_args()
+
+    sheets = synthetic_portfolio(args.projects)
+    filtered_df = build_filtered(*sheets)
+    versions = ('sintetica', args.projects)
+    _, reference = timed(lambda: compute_kpis(filtered_df, STATION_REGISTRY))
+    print(f"{len(filtered_df):,} operaciones, {len(STATION_REGISTRY)} estaciones en el registro; "
+          f"compute_kpis con todas: {reference * 1000:.1f} ms")
+    print(f"{'selección':>22} {'en frío (ms)':>13} {'ya calculada (ms)':>18} {'filas':>10}")
+    selections = [
+        ('una estación', [next(iter(STATIONS))]),
+        ('por defecto', list(STATIONS)),
+        ('todo el registro', list(STATION_REGISTRY)),
+    ]
+    for name, names in selections:
+        cache = ResultCache()
+        _, cold = timed(lambda: select_kpis(filtered_df, names, versions, cache))
+        result, warm = timed(lambda: select_kpis(filtered_df, names, versions, cache))
+        print(f"{name:>22} {cold * 1000:13.1f} {warm * 1000:18.1f} {len(result):10,}")
+    print()
+    check_incremental(sheets, args.changed)
+
+
+# Función para medir la actualización de la tabla filtrada y de las estaciones por defecto tras un
+# cambio en la hoja de desembolsos: con las estaciones ya calculadas (solo se recalculan las operaciones
+# afectadas) y sin ellas (se calculan sobre toda la tabla). Verifica que ambas coinciden con compute_kpis.
+def check_incremental(sheets, changed):
+    data, data_operaciones, data_desembolsos = sheets
+    edited = data_desembolsos.copy()
+    rows = edited.sample(frac=changed, random_state=0).index
+    edited.loc[rows, 'FechaEfectiva'] = '01/01/2024'
+    print(f"{len(rows):,} desembolsos cambiados")
+    print(f"{'estaciones':>22} {'actualización (ms)':>19} {'filas':>10}")
+    for name, held in (('ya calculadas', True), ('sin calcular', False)):
+        pipeline = IncrementalPipeline(stations={})
+        filtered_df, _ = pipeline.refresh(*sheets)
+        if held:
+            select_kpis(filtered_df, list(STATIONS), ('antes',), ResultCache(), pipeline=pipeline)
+        start = time.perf_counter()
+        filtered_df, _ = pipeline.refresh(data, data_operaciones, edited)
+        result = select_kpis(filtered_df, list(STATIONS), ('despues',), ResultCache(), pipeline=pipeline)
+        seconds = time.perf_counter() - start
+        expected = compute_kpis(filtered_df, STATIONS)
+        pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True))
+        print(f"{name:>22} {seconds * 1000:19.1f} {len(result):10,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+# Benchmark de la normalización de fechas: funciones por celda de las páginas frente a eficiencia.fechas.
+#
+# Uso: python benchmarks/bench_fechas.py [--rows 500000] [--unique 3000]
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from eficiencia.fechas import normalize_dates, parse_cache, parse_dates
+
+SPANISH_MONTHS = ['ene', 'feb', 'mar', 'abr', 'may', 'jun', 'jul', 'ago', 'sep', 'oct', 'nov', 'dic']
+SPANISH_MONTH_NAMES = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio', 'agosto',
+                       'septiembre', 'octubre', 'noviembre', 'diciembre']
+WEEKDAYS = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo']
+
+
+# Copia de convert_spanish_date de las páginas (referencia para "12 ENE 21")
+def convert_spanish_date(date_str):
+    months = {
+        'ENE': 'Jan', 'FEB': 'Feb', 'MAR': 'Mar', 'ABR': 'Apr', 'MAY': 'May', 'JUN': 'Jun',
+        'JUL': 'Jul', 'AGO': 'Aug', 'SEP': 'Sep', 'OCT': 'Oct', 'NOV': 'Nov', 'DIC': 'Dec'
+    }
+    match = re.match(r"(\d{2}) (\w{3}) (\d{2})", date_str)
+    if match:
+        day, spanish_month, year = match.groups()
+        english_month = months.get(spanish_month.upper())
+        if english_month:
+            return datetime.strptime(f"{day} {english_month} 20{year}", "%d %b %Y").strftime("%d/%m/%Y")
+    return date_str
+
+
+# Copia de convert_dates de la página 1 (referencia para "12-ene-21" y "lunes, 12 de enero de 2021")
+def convert_dates(date_str):
+    if pd.isnull(date_str):
+        return None
+    months = {
+        'ene': '01', 'feb': '02', 'mar': '03', 'abr': '04', 'may': '05', 'jun': '06',
+        'jul': '07', 'ago': '08', 'sep': '09', 'oct': '10', 'nov': '11', 'dic': '12'
+    }
+    try:
+        day, month, year = date_str.split('-')
+        if len(year) == 2:
+            year = f"20{year}"
+        month = months.get(month[:3].lower(), '00')
+        return f"{day.zfill(2)}/{month}/{year}"
+    except ValueError:
+        pass
+    try:
+        parts = date_str.split(' ')
+        return f"{parts[1].zfill(2)}/{months[parts[3].lower()[:3]]}/{parts[5]}"
+    except (ValueError, IndexError):
+        pass
+    return date_str
+
+
+# Función para generar una columna de fechas en texto con el formato indicado
+def date_column(kind, rows, unique, seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, unique, rows), unit='D')
+    if kind == 'abreviado':
+        values = [f"{d.day:02d} {SPANISH_MONTHS[d.month - 1].upper()} {d.year % 100:02d}" for d in days]
+    elif kind == 'guiones':
+        values = [f"{d.day:02d}-{SPANISH_MONTHS[d.month - 1]}-{d.year % 100:02d}" for d in days]
+    else:
+        values = [f"{WEEKDAYS[d.weekday()]}, {d.day} de {SPANISH_MONTH_NAMES[d.month - 1]} de {d.year}"
+                  for d in days]
+    column = pd.Series(values, dtype=object)
+    # Un 5 % de celdas vacías
+    column[rng.random(rows) < 0.05] = np.nan
+    return column
+
+
+# Fechas fuera del rango de datetime64[ns], por los formatos conocidos y por el parser flexible:
+# deben quedar como NaT, sin desbordar a otra fecha
+OUT_OF_RANGE = ['31/12/9999', '12 Jan 1500', '1/1/1677', '31 DIC 9999', '9999-12-31',
+                'lunes, 1 de enero de 1500', 'Jan 5 1500']
+
+
+def check_out_of_range():
+    parse_cache.clear()
+    column = pd.Series(OUT_OF_RANGE + ['12/01/2021', '1/1/2262'], dtype=object)
+    expected = pd.Series(pd.to_datetime([None] * len(OUT_OF_RANGE) + ['2021-01-12', '2262-01-01']).as_unit('ns'))
+    pd.testing.assert_series_equal(parse_dates(column), expected)
+    assert normalize_dates(column, keep_invalid=False)[:len(OUT_OF_RANGE)].isna().all()
+    parse_cache.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--unique', type=int, default=3_000, help='días distintos en la columna')
+    args = parser.parse_args()
+
+    check_out_of_range()
+    references = {
+        'abreviado': lambda col: col.apply(lambda x: convert_spanish_date(x) if isinstance(x, str) else x),
+        'guiones': lambda col: col.apply(convert_dates),
+        'largo': lambda col: col.apply(convert_dates),
+    }
+    print(f"{args.rows:,} filas, {args.unique:,} días distintos")
+    print(f"{'formato':>10} {'por celda (s)':>14} {'vectorizado (s)':>16} {'con caché (s)':>14} "
+          f"{'aceleración':>12} {'interpretados':>14}")
+    for kind, reference in references.items():
+        column = date_column(kind, args.rows, args.unique)
+        start = time.perf_counter()
+        expected = reference(column)
+        slow = time.perf_counter() - start
+        parse_cache.clear()
+        start = time.perf_counter()
+        result = normalize_dates(column)
+        fast = time.perf_counter() - start
+        # Segunda pasada: todos los textos ya están en la caché compartida
+        start = time.perf_counter()
+        normalize_dates(column)
+        warm = time.perf_counter() - start
+        # Mismo resultado que las funciones de las páginas (celdas vacías como NaN/None)
+        assert (result.fillna('') == expected.fillna('')).all(), kind
+        # La cantidad de textos interpretados depende de las fechas distintas, no de las filas
+        parsed = parse_cache.stats()['misses']
+        print(f"{kind:>10} {slow:14.3f} {fast:16.3f} {warm:14.3f} {slow / fast:11.0f}x {parsed:14,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# Benchmark de la interpretación de fechas en paralelo (eficiencia.paralelo.date_cache): tiempo de
+# interpretar, con la caché vacía, los textos distintos de las columnas de fecha de una cartera
+# sintética con 1, 2, 4, ... procesos, frente a la interpretación en serie. El grupo de procesos se
+# inicia antes de medir (el arranque se paga una sola vez por proceso de la aplicación).
+#
+# Uso: python benchmarks/bench_fechas_paralelo.py [--projects 100000] [--workers 1 2 4] [--repeat 3]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from cartera import synthetic_portfolio
+from eficiencia.fechas import ParseCache, parse_dates
+from eficiencia.paralelo import date_cache, shutdown_pool
+from eficiencia.pipeline import OPERATION_DATE_COLUMNS, PROJECT_DATE_COLUMNS
+
+
+# Caché vacía sin límite, para que cada medición interprete todos los textos
+def empty_cache():
+    return ParseCache(maxsize=10 ** 8)
+
+
+def default_workers():
+    cores = os.cpu_count() or 1
+    workers = [1]
+    while workers[-1] * 2 <= cores:
+        workers.append(workers[-1] * 2)
+    if workers[-1] != cores:
+        workers.append(cores)
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--projects', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=default_workers())
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    data, data_operaciones, data_desembolsos = synthetic_portfolio(args.projects)
+    columns = [data[col] for col in PROJECT_DATE_COLUMNS] + [
+        frame[col] for frame in (data_operaciones, data_desembolsos) for col in OPERATION_DATE_COLUMNS if col in frame
+    ]
+    reference = [parse_dates(column, empty_cache()) for column in columns]
+    distinct = date_cache(columns, empty_cache(), workers=1).stats()['size']
+    print(f"{args.projects:,} proyectos, {len(columns)} columnas de fecha, {distinct:,} textos distintos; "
+          f"{os.cpu_count()} núcleos")
+    print(f"{'procesos':>9} {'tiempo (ms)':>12} {'aceleración':>12}")
+    serial = None
+    for workers in args.workers:
+        # Arranque del grupo de procesos fuera de la medición
+        date_cache(columns[:1], empty_cache(), workers=workers, min_values=0)
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            dates = date_cache(columns, empty_cache(), workers=workers, min_values=0)
+            best = min(best, time.perf_counter() - start)
+        if not all(parse_dates(column, dates).equals(expected) for column, expected in zip(columns, reference)):
+            raise AssertionError(f"fechas distintas con {workers} procesos")
+        serial = best if serial is None else serial
+        print(f"{workers:9d} {best * 1000:12.1f} {serial / best:11.2f}x")
+    shutdown_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# Benchmark del arranque de las páginas: tiempo de importación en frío de cada página (un intérprete
+# nuevo por medición: importaciones del script y de eficiencia, sin ejecutar main) con los módulos que
+# quedan cargados, el costo de seaborn y matplotlib que la página 1 importaba sin usar, y el costo de
+# volver a ejecutar cada página (lo que Streamlit hace en cada interacción) con streamlit.testing
+# sobre una cartera sintética.
+#
+# Uso: python benchmarks/bench_importacion.py [--projects 2000] [--repeat 5]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PAGES = ['0_Animation_Demo.py', '1_Plotting_Demo.py', '2_Mapping_Demo.py']
+HEAVY = ['matplotlib', 'seaborn', 'scipy']
+
+# Se ejecuta en un intérprete nuevo: importa la página sin ejecutar main (run_name distinto de __main__)
+IMPORT_PAGE = """
+import json, runpy, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+runpy.run_path({path!r}, run_name='pagina')
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'modules': len(sys.modules),
+                  'heavy': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+# Costo de las bibliotecas de gráficos una vez cargados pandas y streamlit
+IMPORT_HEAVY = """
+import json, time
+import pandas, streamlit
+start = time.perf_counter()
+import seaborn, matplotlib.pyplot
+print(json.dumps({'seconds': time.perf_counter() - start}))
+"""
+
+
+# Función para ejecutar código en un intérprete nuevo y leer el JSON que imprime
+def run_fresh(code, env=None):
+    output = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True, check=True, cwd=ROOT, env=env
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--projects', type=int, default=2_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Las variables de entorno se leen al importar eficiencia
+        os.environ['EFICIENCIA_SOURCE_DIR'] = os.path.join(tmp, 'fuente')
+        os.environ['EFICIENCIA_CACHE_DIR'] = os.path.join(tmp, 'copias')
+        os.environ['EFICIENCIA_EXPORT_DIR'] = os.path.join(tmp, 'exportacion')
+
+        print(f"{'página':>22} {'importación (s)':>16} {'módulos':>8} {'gráficos cargados':>18}")
+        for page in PAGES:
+            code = IMPORT_PAGE.format(root=ROOT, path=os.path.join(ROOT, 'pages', page), heavy=HEAVY)
+            results = [run_fresh(code, dict(os.environ)) for _ in range(args.repeat)]
+            seconds = statistics.median(result['seconds'] for result in results)
+            heavy = ', '.join(results[-1]['heavy']) or '-'
+            print(f"{page:>22} {seconds:16.3f} {results[-1]['modules']:8d} {heavy:>18}")
+        try:
+            heavy_seconds = statistics.median(run_fresh(IMPORT_HEAVY)['seconds'] for _ in range(args.repeat))
+            print(f"seaborn + matplotlib.pyplot (ya no se importan al cargar la página 1): {heavy_seconds:.3f} s")
+        except subprocess.CalledProcessError:
+            print("seaborn o matplotlib no están instalados")
+
+        from streamlit.testing.v1 import AppTest
+        from cartera import synthetic_portfolio, write_portfolio
+
+        write_portfolio(os.environ['EFICIENCIA_SOURCE_DIR'], *synthetic_portfolio(args.projects))
+        print(f"\n{args.projects:,} proyectos")
+        print(f"{'página':>22} {'primera ejecución (s)':>22} {'nueva ejecución (s)':>20}")
+        for page in PAGES:
+            at = AppTest.from_file(os.path.join(ROOT, 'pages', page), default_timeout=600)
+            start = time.perf_counter()
+            at.run()
+            first = time.perf_counter() - start
+            reruns = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                at.run()
+                reruns.append(time.perf_counter() - start)
+            if at.exception:
+                raise RuntimeError(at.exception[0].value)
+            print(f"{page:>22} {first:22.3f} {statistics.median(reruns):20.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# Benchmark de la ingesta de la hoja de proyectos: lectura completa del CSV frente a la lectura por
+# bloques de eficiencia.ingesta, desde un archivo local y desde un servidor HTTP local. Cada medición
+# corre en un proceso nuevo y se informa el aumento de la memoria residente máxima (incluye la memoria
+# de Arrow, que tracemalloc no ve).
+#
+# Uso: python benchmarks/bench_ingesta.py [--projects 200000] [--extra 20] [--chunk-rows 50000]
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_carga import serve
+from cartera import synthetic_portfolio
+from eficiencia.carga import SnapshotCache
+from eficiencia.compartido import ResultCache
+from eficiencia.ingesta import SHEET_SPECS
+
+
+# Función para escribir la hoja de proyectos con columnas de texto que la página no usa, como la hoja real
+def write_projects(path, projects, extra, seed=0):
+    rng = np.random.default_rng(seed)
+    proyectos, _, _ = synthetic_portfolio(projects, seed)
+    for i in range(extra):
+        proyectos[f'NOTA {i + 1}'] = np.char.add('Observación ', rng.integers(0, 10 ** 6, len(proyectos)).astype(str))
+    proyectos.to_csv(path, index=False)
+
+
+# Carga en un proceso nuevo; devuelve (filas, columnas, segundos, aumento de memoria máxima en bytes)
+def measure(source, cache_dir, streaming, chunk_rows):
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    spec = SHEET_SPECS['proyectos']
+    spec.chunksize = chunk_rows
+    cache = SnapshotCache(cache_dir, ttl=0, results=ResultCache())
+    start = time.perf_counter()
+    data = cache.load(source, spec if streaming else None)
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base
+    return len(data), len(data.columns), seconds, peak * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--projects', type=int, default=200_000)
+    parser.add_argument('--extra', type=int, default=20, help='columnas de texto adicionales que no se usan')
+    parser.add_argument('--chunk-rows', type=int, default=50_000)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        source_dir = os.path.join(tmp, 'fuente')
+        os.makedirs(source_dir)
+        path = os.path.join(source_dir, 'proyectos.csv')
+        # La hoja se escribe en otro proceso: la memoria máxima se hereda entre procesos en Linux
+        with context.Pool(1) as pool:
+            pool.apply(write_projects, (path, args.projects, args.extra))
+        server = serve(source_dir)
+        url = f"http://127.0.0.1:{server.server_port}/proyectos.csv?gid=1&output=csv"
+        print(f"{args.projects:,} filas, {os.path.getsize(path) / 2 ** 20:.1f} MB de CSV, "
+              f"bloques de {args.chunk_rows:,} filas")
+        print(f"{'fuente':>8} {'lectura':>10} {'columnas':>9} {'segundos':>9} {'memoria máx. (MB)':>18}")
+        for name, source in [('archivo', path), ('http', url)]:
+            for streaming in (False, True):
+                cache_dir = tempfile.mkdtemp(dir=tmp)
+                with context.Pool(1) as pool:
+                    rows, columns, seconds, peak = pool.apply(measure, (source, cache_dir, streaming, args.chunk_rows))
+                print(f"{name:>8} {'bloques' if streaming else 'completa':>10} {columns:9} "
+                      f"{seconds:9.2f} {peak / 2 ** 20:18.1f}")
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+# Benchmark del motor de KPI vectorizado frente al recorrido fila por fila.
+#
+# Uso: python benchmarks/bench_kpi.py [--sizes 1000 10000 ...] [--loop-max 10000]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from eficiencia.kpi import STATION_REGISTRY, STATIONS, as_datetime, compute_kpis, RESULT_COLUMNS
+
+
+# Función para generar un DataFrame filtrado sintético con n operaciones
+def synthetic_filtered_df(n, seed=0):
+    rng = np.random.default_rng(seed)
+    base = np.datetime64('2015-01-01')
+    carta = base + rng.integers(0, 3000, n).astype('timedelta64[D]')
+    aprobacion = carta + rng.integers(-30, 400, n).astype('timedelta64[D]')
+    vigencia = aprobacion + rng.integers(-30, 300, n).astype('timedelta64[D]')
+    elegibilidad = vigencia + rng.integers(-30, 300, n).astype('timedelta64[D]')
+    efectiva = elegibilidad - rng.integers(-30, 200, n).astype('timedelta64[D]')
+
+    def as_text(dates):
+        text = pd.Series(dates).dt.strftime('%d/%m/%Y')
+        # Un 5 % de fechas faltantes
+        text[rng.random(n) < 0.05] = None
+        return text
+
+    return pd.DataFrame({
+        'NoProyecto': [f'PR{i:07d}' for i in range(n)],
+        'NoOperacion': [f'OP{i:07d}' for i in range(n)],
+        'Pais': rng.choice(['ARGENTINA', 'BOLIVIA', 'BRASIL', 'PARAGUAY', 'URUGUAY'], n),
+        'Alias': [f'Operación {i}' for i in range(n)],
+        'CARTA CONSULTA': as_text(carta),
+        'APROBACIÓN': as_text(aprobacion),
+        'FechaVigencia': as_text(vigencia),
+        'FechaElegibilidad': as_text(elegibilidad),
+        'FechaEfectiva': as_text(efectiva),
+    })
+
+
+# Implementación de referencia: un recorrido iterrows con funciones escalares
+def loop_kpis(filtered_df, stations=STATIONS):
+    data = filtered_df.copy()
+    for col in {c for pair in stations.values() for c in pair}:
+        data[col] = as_datetime(data[col])
+
+    results = []
+    for _, row in data.iterrows():
+        for operation, (start_col, end_col) in stations.items():
+            start, end = row[start_col], row[end_col]
+            kpi = None
+            if pd.notnull(start) and pd.notnull(end):
+                kpi = round((end - start).days / 30, 2)
+                if kpi < 0:
+                    kpi = None
+            if kpi is None:
+                productividad = 'Datos insuficientes'
+            elif kpi < 6:
+                productividad = 'Eficiente'
+            elif kpi < 8:
+                productividad = 'Aceptable'
+            elif kpi < 12:
+                productividad = 'Con Demora'
+            else:
+                productividad = 'Alta Demora'
+            results.append({
+                'ESTACIONES': operation.split()[0],
+                'ANO': end.year if pd.notnull(end) else None,
+                'PAIS': row['Pais'],
+                'CODIGO': row['NoOperacion'],
+                'APODO': row['Alias'],
+                'Indicador_Principal': end.strftime('%d/%m/%Y') if pd.notnull(end) else None,
+                'Indicador_Secundario': start.strftime('%d/%m/%Y') if pd.notnull(start) else None,
+                'TIPO_DE_KPI': operation,
+                'KPI': kpi,
+                'Productividad': productividad
+            })
+    results_df = pd.DataFrame(results, columns=RESULT_COLUMNS)
+    results_df['KPI'] = results_df['KPI'].astype('float64')
+    return results_df[results_df['KPI'] > 0]
+
+
+# Función para comparar resultados sin depender de los dtypes de cada implementación
+def normalized(df):
+    df = df.reset_index(drop=True).astype(object)
+    return df.where(df.notna(), None)
+
+
+# Cada estación del registro con sus dos columnas de fecha vacías debe dar el mismo resultado que la
+# referencia (sin fechas válidas la tabla de días distintos queda vacía)
+def check_missing_pairs(n=200):
+    df = synthetic_filtered_df(n)
+    for name, pair in STATION_REGISTRY.items():
+        blank = df.assign(**{col: pd.Series([None] * n, dtype=object) for col in pair})
+        pd.testing.assert_frame_equal(
+            normalized(compute_kpis(blank, {name: pair})), normalized(loop_kpis(blank, {name: pair}))
+        )
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--loop-max', type=int, default=10_000,
+                        help='tamaño máximo para ejecutar la referencia iterrows')
+    args = parser.parse_args()
+
+    check_missing_pairs()
+    print(f"{'operaciones':>12} {'vectorizado (s)':>16} {'iterrows (s)':>14} {'aceleración':>12}")
+    for n in args.sizes:
+        df = synthetic_filtered_df(n)
+        fast, fast_time = timed(compute_kpis, df)
+        loop_time = None
+        if n <= args.loop_max:
+            slow, loop_time = timed(loop_kpis, df)
+            # Ambas implementaciones deben producir el mismo resultado
+            pd.testing.assert_frame_equal(normalized(fast), normalized(slow))
+        loop_text = f"{loop_time:14.3f}" if loop_time is not None else f"{'-':>14}"
+        speedup = f"{loop_time / fast_time:11.0f}x" if loop_time is not None else f"{'-':>12}"
+        print(f"{n:>12,} {fast_time:16.3f} {loop_text} {speedup}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# Benchmark del procesamiento por lotes (eficiencia.lote): tiempo de calcular la tabla de KPI de varias
+# instantáneas sintéticas sin partir, por país y por año de aprobación, con 1, 2, 4, ... procesos, y
+# verificación de que la unión de las partes da las mismas filas que la tabla sin partir.
+#
+# Uso: python benchmarks/bench_lote.py [--projects 30000] [--snapshots 2] [--workers 1 2 4]
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+
+from bench_fechas_paralelo import default_workers
+from cartera import synthetic_portfolio, write_portfolio
+from eficiencia.lote import SHARD_COLUMNS, run_batch
+
+
+# Tabla ordenada por todas sus columnas, para comparar filas sin importar el orden de las partes
+def sorted_rows(results_df):
+    results_df = results_df.astype(str)
+    return results_df.sort_values(list(results_df.columns)).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--projects', type=int, default=30_000)
+    parser.add_argument('--snapshots', type=int, default=2)
+    parser.add_argument('--workers', type=int, nargs='+', default=default_workers())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folders = []
+        for i in range(args.snapshots):
+            folder = os.path.join(tmp, 'instantaneas', f"{i:02d}")
+            write_portfolio(folder, *synthetic_portfolio(args.projects, seed=i))
+            folders.append(folder)
+        print(f"{args.snapshots} instantáneas de {args.projects:,} proyectos; {os.cpu_count()} núcleos")
+        print(f"{'partición':>10} {'procesos':>9} {'partes':>7} {'filas':>9} {'tiempo (s)':>11} {'iguales':>8}")
+        reference = None
+        for by in [None] + list(SHARD_COLUMNS):
+            for workers in args.workers:
+                output = os.path.join(tmp, 'salida', f"{by}-{workers}")
+                summary = run_batch(folders, output, by, workers=workers)
+                tables = [sorted_rows(pd.read_parquet(os.path.join(output, snapshot['file'])))
+                          for snapshot in summary['snapshots'].values()]
+                reference = reference or tables
+                same = all(table.equals(expected) for table, expected in zip(tables, reference))
+                parts = sum(snapshot['parts'] for snapshot in summary['snapshots'].values())
+                rows = sum(snapshot['rows'] for snapshot in summary['snapshots'].values())
+                print(f"{by or '-':>10} {workers:9d} {parts:7d} {rows:9,} {summary['seconds']:11.2f} "
+                      f"{'sí' if same else 'no':>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# Benchmark del índice de pendientes (eficiencia.pendientes): construcción del índice y consultas de
+# operaciones en estación (a una fecha y serie mensual por estación, país y SEC) sobre carteras
+# sintéticas, frente a filtrar la tabla de operaciones una vez por fecha, con verificación de que ambos
+# dan los mismos conteos.
+#
+# Uso: python benchmarks/bench_pendientes.py [--projects 10000 100000 1000000] [--reference-max 100000]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+
+from cartera import synthetic_portfolio
+from eficiencia.kpi import STATIONS
+from eficiencia.pendientes import BacklogIndex
+from eficiencia.pipeline import build_filtered
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+# Serie de referencia: por cada estación y fecha, filtro de las operaciones en estación y groupby por país
+def filter_query(filtered_df, dates):
+    operations = filtered_df.groupby('NoOperacion', sort=False, observed=True).agg(
+        {**{col: 'min' for pair in STATIONS.values() for col in pair}, 'Pais': 'first'}
+    )
+    rows = []
+    for name, (start_col, end_col) in STATIONS.items():
+        start, end = operations[start_col], operations[end_col]
+        valid = start.notna() & (end.isna() | (end > start))
+        for date in dates:
+            inside = operations[valid & (start <= date) & (end.isna() | (end > date))]
+            for country, count in inside.groupby('Pais', observed=False).size().items():
+                rows.append((name, country, date, count))
+    return pd.DataFrame(rows, columns=['ESTACION', 'PAIS', 'fecha', 'operaciones'])
+
+
+# Conteos comparables: sin grupos vacíos y ordenados
+def comparable(frame):
+    frame = frame[frame['operaciones'] > 0].astype({'ESTACION': str, 'PAIS': str, 'operaciones': 'int64'})
+    return frame.sort_values(['ESTACION', 'PAIS', 'fecha']).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--projects', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--reference-max', type=int, default=100_000,
+                        help='mayor cartera en la que se mide el filtro por fecha')
+    args = parser.parse_args()
+
+    print(f"{'proyectos':>10} {'operaciones':>12} {'índice (ms)':>12} {'a una fecha (ms)':>17} "
+          f"{'mensual (ms)':>13} {'fechas':>7} {'filtro por fecha (ms)':>22} {'iguales':>8}")
+    for projects in args.projects:
+        filtered_df = build_filtered(*synthetic_portfolio(projects))
+        backlog, build = timed(lambda: BacklogIndex(filtered_df, STATIONS))
+        _, point = timed(lambda: backlog.query(backlog.last_day, ['ESTACION', 'PAIS', 'SEC']))
+        series, monthly = timed(lambda: backlog.monthly(['ESTACION', 'PAIS']))
+        dates = series['fecha'].unique()
+        reference, same = '-', '-'
+        if projects <= args.reference_max:
+            expected, seconds = timed(lambda: filter_query(filtered_df, dates))
+            reference = f"{seconds * 1000:.1f}"
+            same = 'sí' if comparable(series).equals(comparable(expected)) else 'no'
+        print(f"{projects:10,} {filtered_df['NoOperacion'].nunique():12,} {build * 1000:12.1f} {point * 1000:17.1f} "
+              f"{monthly * 1000:13.1f} {len(dates):7,} {reference:>22} {same:>8}")
+
+
+if __name__ == '__main__':
+    main()
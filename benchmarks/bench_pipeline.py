@@ -0,0 +1,163 @@
+# Benchmark de punta a punta de las páginas 0, 1 y 2 sobre una cartera sintética (benchmarks/cartera.py):
+# tiempo de cada etapa (carga, fechas, unión, KPI, validación y presentación) sin acceso a la red.
+# Las páginas se ejecutan con streamlit.testing y los tiempos son los que registran sus propias etapas
+# (eficiencia.medicion), así que se mide el mismo código que corre la aplicación: lectura por bloques,
+# caché de fechas, actualización incremental, KPI por estación, etc.
+# Los resultados se guardan en JSON para comparar entre commits.
+#
+# Uso: python benchmarks/bench_pipeline.py [--sizes 1000 10000 100000] [--repeat 3]
+#                                          [--output resultados.json] [--compare anterior.json]
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+REPO_DIR = os.path.join(os.path.dirname(__file__), '..')
+PAGES = {
+    'pagina_0': os.path.join(REPO_DIR, 'pages', '0_Animation_Demo.py'),
+    'pagina_1': os.path.join(REPO_DIR, 'pages', '1_Plotting_Demo.py'),
+    'pagina_2': os.path.join(REPO_DIR, 'pages', '2_Mapping_Demo.py'),
+}
+# Etapas que se muestran en la tabla (el total incluye también las demás, p. ej. cubo y pendientes)
+STAGES = ['carga', 'huellas', 'fechas', 'union', 'esquema', 'kpi', 'calidad', 'presentacion']
+# Registros que no se suman: etapas que contienen a otras (la actualización de la página 0 incluye
+# huellas, fechas, unión y esquema) e hitos
+SKIPPED = {'tablas', 'primera_vista'}
+
+
+# Función para leer los segundos de cada etapa del archivo de mediciones de una ejecución de página
+# (una etapa que se repite en la ejecución se suma)
+def stage_seconds(path):
+    seconds = {}
+    with open(path, encoding='utf-8') as f:
+        for record in map(json.loads, f):
+            if record['stage'] not in SKIPPED:
+                seconds[record['stage']] = seconds.get(record['stage'], 0.0) + record['seconds']
+    return seconds
+
+
+# Función para obtener el commit actual (None fuera de un repositorio git)
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Función para comparar con un resultado anterior; devuelve las etapas más lentas que la tolerancia
+def compare(previous, current, tolerance, min_seconds=0.01):
+    old = {(r['pagina'], r['proyectos']): r['etapas'] for r in previous['resultados']}
+    regressions = []
+    print(f"\nComparación con {previous.get('commit')} (tolerancia {tolerance:.2f}x)")
+    for result in current['resultados']:
+        stages = old.get((result['pagina'], result['proyectos']))
+        if stages is None:
+            continue
+        for stage, seconds in result['etapas'].items():
+            before = stages.get(stage)
+            if not before:
+                continue
+            ratio = seconds / before
+            flag = ''
+            if ratio > tolerance and seconds > min_seconds:
+                flag = '  <- regresión'
+                regressions.append((result['pagina'], result['proyectos'], stage, ratio))
+            print(f"{result['pagina']:>9} {result['proyectos']:>10,} {stage:>13} "
+                  f"{before:8.3f} s -> {seconds:8.3f} s ({ratio:5.2f}x){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help='cantidad de proyectos de cada cartera')
+    parser.add_argument('--pages', nargs='+', choices=list(PAGES), default=list(PAGES))
+    parser.add_argument('--repeat', type=int, default=3, help='repeticiones por medición (se guarda la mínima)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='archivo JSON de resultados (por defecto .cache/bench/pipeline-<commit>.json)')
+    parser.add_argument('--compare', help='archivo JSON de un resultado anterior')
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help='cociente máximo frente al resultado anterior antes de informar una regresión')
+    args = parser.parse_args()
+
+    commit = current_commit()
+    report = {
+        'commit': commit,
+        'fecha': pd.Timestamp.now(tz='UTC').isoformat(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'pyarrow': pa.__version__,
+        'repeticiones': args.repeat,
+        'resultados': []
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        # Las variables de entorno se leen al importar eficiencia
+        os.environ['EFICIENCIA_SOURCE_DIR'] = source_dir = os.path.join(tmp, 'fuente')
+        os.environ['EFICIENCIA_CACHE_DIR'] = cache_dir = os.path.join(tmp, 'copias')
+        os.environ['EFICIENCIA_EXPORT_DIR'] = os.path.join(tmp, 'exportacion')
+        os.environ['EFICIENCIA_METRICS_FILE'] = metrics = os.path.join(tmp, 'mediciones.jsonl')
+        os.environ['EFICIENCIA_BACKGROUND_REFRESH'] = os.environ['EFICIENCIA_FAST_START'] = '0'
+
+        from streamlit.testing.v1 import AppTest
+        from cartera import synthetic_portfolio, write_portfolio
+        from eficiencia import incremental, uniones
+        from eficiencia.compartido import result_cache
+        from eficiencia.fechas import parse_cache
+
+        print(f"{'página':>9} {'proyectos':>10} " + ' '.join(f"{stage:>12}" for stage in STAGES) + f" {'total':>9}")
+        for size in args.sizes:
+            sheets = synthetic_portfolio(size, args.seed)
+            write_portfolio(source_dir, *sheets)
+            rows = dict(zip(['proyectos', 'operaciones', 'desembolsos'], map(len, sheets)))
+            for page, path in PAGES.items():
+                if page not in args.pages:
+                    continue
+                best = {}
+                for _ in range(args.repeat):
+                    # Cada repetición en frío: sin copias locales, resultados compartidos, fechas
+                    # interpretadas, índices de unión ni tabla incremental previos
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                    result_cache.clear()
+                    parse_cache.clear()
+                    uniones.join_cache.clear()
+                    incremental.default_pipeline.state = None
+                    if os.path.exists(metrics):
+                        os.remove(metrics)
+                    at = AppTest.from_file(path, default_timeout=600).run()
+                    if at.exception:
+                        raise RuntimeError(at.exception[0].value)
+                    for stage, seconds in stage_seconds(metrics).items():
+                        best[stage] = min(best.get(stage, np.inf), seconds)
+                report['resultados'].append({'pagina': page, 'proyectos': size, 'filas': rows, 'etapas': best})
+                print(f"{page:>9} {size:>10,} " + ' '.join(
+                    f"{best[stage]:12.3f}" if stage in best else f"{'-':>12}" for stage in STAGES
+                ) + f" {sum(best.values()):9.3f}")
+
+    output = args.output or os.path.join(REPO_DIR, '.cache', 'bench', f"pipeline-{commit or 'sin-commit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados en {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
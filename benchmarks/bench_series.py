@@ -0,0 +1,77 @@
+# Benchmark de los datos del gráfico de la página 3 (eficiencia.series): tiempo de preparar los puntos
+# de las regiones elegidas como lo hacía la página en cada ejecución (loc, división, transposición y
+# melt) frente a tomar los tramos de las series precalculadas, sin reducir y reducidas con LTTB o por
+# períodos, con los puntos que llegan al gráfico, sobre una tabla sintética de regiones por año.
+#
+# Uso: python benchmarks/bench_series.py [--regions 260] [--years 47] [--budget 5000] [--repeat 20]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+from eficiencia.series import RegionSeries
+
+VALUE = "Gross Agricultural Product ($B)"
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+# Tabla sintética con la forma de agri.csv.gz: una fila por región y una columna por año
+def synthetic_agri(regions, years, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.gamma(2.0, 1e6, (regions, years)).cumsum(axis=1)
+    columns = [str(1961 + i) for i in range(years)]
+    index = pd.Index([f"Región {i:04d}" for i in range(regions)], name='Region')
+    return pd.DataFrame(values, index=index, columns=columns)
+
+
+# Preparación original de la página en cada ejecución
+def melt_query(df, countries):
+    data = df.loc[countries]
+    data /= 1000000.0
+    table = data.sort_index()
+    data = data.T.reset_index()
+    data = pd.melt(data, id_vars=["index"]).rename(columns={"index": "year", "value": VALUE})
+    return table, data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--regions', type=int, default=260)
+    parser.add_argument('--years', type=int, default=47)
+    parser.add_argument('--budget', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    df = synthetic_agri(args.regions, args.years)
+    series, build = best_of(lambda: RegionSeries(df, 1000000.0, VALUE), 1)
+    print(f"{args.regions:,} regiones x {args.years} años; series precalculadas en {build * 1000:.1f} ms, "
+          f"{series.nbytes / 2 ** 20:.1f} MB; presupuesto {args.budget:,} puntos")
+    print(f"{'regiones':>9} {'melt (ms)':>10} {'tramos (ms)':>12} {'LTTB (ms)':>10} {'períodos (ms)':>14} "
+          f"{'puntos':>8} {'LTTB':>7} {'períodos':>9}")
+    for size in sorted({2, 20, args.regions // 2, args.regions}):
+        countries = list(df.index[:size])
+        (_, expected), melt = best_of(lambda: melt_query(df, countries), args.repeat)
+        data, sliced = best_of(lambda: (series.table(countries), series.select(countries)), args.repeat)
+        reduced, lttb = best_of(lambda: series.chart_data(countries, args.budget, 'lttb'), args.repeat)
+        periods, period = best_of(lambda: series.chart_data(countries, args.budget, 'periodo'), args.repeat)
+        if len(data[1]) != len(expected):
+            raise AssertionError(f"puntos distintos con {size} regiones")
+        print(f"{size:9,} {melt * 1000:10.2f} {sliced * 1000:12.2f} {lttb * 1000:10.2f} {period * 1000:14.2f} "
+              f"{len(expected):8,} {len(reduced):7,} {len(periods):9,}")
+
+
+if __name__ == '__main__':
+    main()
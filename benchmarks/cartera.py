@@ -0,0 +1,161 @@
+# Generador de una cartera sintética con la forma de las tres hojas de Google Sheets (proyectos,
+# operaciones y desembolsos), para medir el rendimiento sin acceso a la red.
+#
+# Uso como script: python benchmarks/cartera.py CARPETA [--projects 10000]
+# escribe gid-<gid>.csv / url-<hash>.csv en CARPETA, listos para EFICIENCIA_SOURCE_DIR.
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from eficiencia.carga import snapshot_key
+
+# Las mismas URL que usan las páginas (la página 0 lee proyectos por gid y las páginas 1 y 2 sin gid)
+BASE_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vTG0WVV5FQNxYyOz0UM0YEkT9u8vGnzrwfUt7pVmJUHKGjDyKas_scI6XhY_ce_sTxRPtwVZw1Ggfyi/pub"
+SHEET_URLS = {
+    'proyectos': [f"{BASE_URL}?gid=918102047&single=true&output=csv", f"{BASE_URL}?output=csv"],
+    'operaciones': [f"{BASE_URL}?gid=1958213072&single=true&output=csv"],
+    'desembolsos': [f"{BASE_URL}?gid=1839704968&single=true&output=csv"]
+}
+
+MONTHS = ['ene', 'feb', 'mar', 'abr', 'may', 'jun', 'jul', 'ago', 'sep', 'oct', 'nov', 'dic']
+MONTH_NAMES = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio', 'agosto',
+               'septiembre', 'octubre', 'noviembre', 'diciembre']
+WEEKDAYS = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo']
+COUNTRIES = ['ARGENTINA', 'BOLIVIA', 'BRASIL', 'PARAGUAY', 'URUGUAY']
+COUNTRY_CODES = ['AR', 'BO', 'BR', 'PY', 'UY']
+
+# Formatos de fecha de las hojas y su proporción en cada columna de fecha
+DATE_MIX = {'abreviado': 0.55, 'guiones': 0.25, 'largo': 0.1, 'numerico': 0.05, 'iso': 0.05}
+
+
+# Función para escribir un día en uno de los formatos de las hojas
+def format_day(day, kind):
+    if kind == 'abreviado':
+        return f"{day.day:02d} {MONTHS[day.month - 1].upper()} {day.year % 100:02d}"
+    if kind == 'guiones':
+        return f"{day.day:02d}-{MONTHS[day.month - 1]}-{day.year % 100:02d}"
+    if kind == 'largo':
+        return f"{WEEKDAYS[day.weekday()]}, {day.day} de {MONTH_NAMES[day.month - 1]} de {day.year}"
+    if kind == 'numerico':
+        return f"{day.day:02d}/{day.month:02d}/{day.year}"
+    return day.strftime('%Y-%m-%d')
+
+
+# Función para convertir días a texto con formatos mezclados; una parte queda vacía o con texto inválido
+def date_text(days, rng, missing=0.05, invalid=0.005):
+    kinds = rng.choice(list(DATE_MIX), len(days), p=list(DATE_MIX.values()))
+    # Solo se formatean los pares (día, formato) distintos
+    pairs = pd.DataFrame({'day': days, 'kind': kinds})
+    codes, uniques = pd.factorize(pd.MultiIndex.from_frame(pairs))
+    labels = np.array([format_day(pd.Timestamp(day), kind) for day, kind in uniques], dtype=object)
+    text = labels[codes]
+    draw = rng.random(len(days))
+    text[draw < missing] = None
+    text[(draw >= missing) & (draw < missing + invalid)] = 'pendiente'
+    return text
+
+
+# Función para generar las tres hojas de una cartera con n_projects proyectos.
+# Cada proyecto tiene 1 o 2 operaciones y cada operación de 0 a 3 desembolsos; una fracción
+# `unmatched` de las operaciones apunta a proyectos que no existen en la hoja de proyectos.
+def synthetic_portfolio(n_projects, seed=0, unmatched=0.03):
+    rng = np.random.default_rng(seed)
+    n = n_projects
+    country = rng.integers(0, len(COUNTRIES), n)
+    codes = np.array(COUNTRY_CODES)[country]
+    project_ids = np.char.add(np.char.add(codes, '-'), np.char.zfill(np.arange(n).astype(str), 7))
+
+    # Fechas de las estaciones del proyecto, en orden con algún retroceso ocasional
+    base = np.datetime64('2012-01-01')
+    abstracto = base + rng.integers(0, 4000, n).astype('timedelta64[D]')
+    carta = abstracto + rng.integers(10, 120, n).astype('timedelta64[D]')
+    perfil = carta + rng.integers(10, 120, n).astype('timedelta64[D]')
+    propuesta = perfil + rng.integers(10, 200, n).astype('timedelta64[D]')
+    acta = propuesta + rng.integers(10, 120, n).astype('timedelta64[D]')
+    aprobacion = acta + rng.integers(-10, 120, n).astype('timedelta64[D]')
+
+    # Operaciones: 1 o 2 por proyecto, con el número de operación con guiones en la hoja de proyectos
+    per_project = rng.choice([1, 2], n, p=[0.8, 0.2])
+    op_project = np.repeat(np.arange(n), per_project)
+    m = len(op_project)
+    op_ids = np.char.add(np.char.add(codes[op_project], '-OP-'), np.char.zfill(np.arange(m).astype(str), 7))
+    first_op = np.cumsum(per_project) - per_project
+
+    proyectos = pd.DataFrame({
+        'NÚMERO': project_ids,
+        'NO. OPERACION': op_ids[first_op],
+        'NOMBRE': np.char.add('Proyecto ', np.arange(n).astype(str)),
+        'ABSTRACTO': date_text(abstracto, rng),
+        'CARTA CONSULTA': date_text(carta, rng),
+        'PERFIL': date_text(perfil, rng),
+        'PROPUESTA OPERATIVA': date_text(propuesta, rng),
+        'ACTA NEGOCIACION': date_text(acta, rng),
+        'APROBACIÓN': date_text(aprobacion, rng),
+        'SEC': rng.choice(['SOC', 'INF', 'PRO', 'AGR', 'ENE'], n),
+        'ARE': rng.choice(['ARE1', 'ARE2', 'ARE3'], n),
+        'Estado': rng.choice(['Activo', 'Cerrado', 'Cancelado'], n, p=[0.7, 0.25, 0.05])
+    }).astype(object)
+
+    # En la hoja de operaciones las claves van sin guiones; algunas apuntan a proyectos inexistentes
+    op_keys = np.char.replace(project_ids[op_project], '-', '')
+    orphan = rng.random(m) < unmatched
+    op_keys[orphan] = np.char.add('XX', np.char.zfill(np.arange(orphan.sum()).astype(str), 8))
+    vigencia = aprobacion[op_project] + rng.integers(-10, 300, m).astype('timedelta64[D]')
+    elegibilidad = vigencia + rng.integers(-10, 300, m).astype('timedelta64[D]')
+    operaciones = pd.DataFrame({
+        'NoProyecto': op_keys,
+        'NoOperacion': np.char.replace(op_ids, '-', ''),
+        'Pais': np.array(COUNTRIES)[country[op_project]],
+        'Alias': np.char.add('Operación ', np.arange(m).astype(str)),
+        'Estado': rng.choice(['Vigente', 'Terminada'], m, p=[0.8, 0.2]),
+        'FechaVigencia': date_text(vigencia, rng),
+        'FechaElegibilidad': date_text(elegibilidad, rng),
+        'Monto': rng.integers(1, 500, m) * 1e5
+    }).astype({'NoProyecto': object, 'NoOperacion': object, 'Pais': object, 'Alias': object, 'Estado': object})
+
+    # Desembolsos: de 0 a 3 por operación (las operaciones sin desembolso quedan sin correspondencia)
+    per_operation = rng.choice([0, 1, 2, 3], m, p=[0.1, 0.6, 0.2, 0.1])
+    dis_operation = np.repeat(np.arange(m), per_operation)
+    efectiva = elegibilidad[dis_operation] + rng.integers(-20, 400, len(dis_operation)).astype('timedelta64[D]')
+    desembolsos = pd.DataFrame({
+        'NoOperacion': operaciones['NoOperacion'].to_numpy()[dis_operation],
+        'FechaEfectiva': date_text(efectiva, rng),
+        'Monto': rng.integers(1, 100, len(dis_operation)) * 1e4,
+        'Estado': 'Desembolsado'
+    }).astype({'NoOperacion': object, 'Estado': object})
+    return proyectos, operaciones, desembolsos
+
+
+# Función para escribir la cartera como archivos CSV con los nombres que espera EFICIENCIA_SOURCE_DIR.
+# Devuelve las rutas por hoja (la primera de cada hoja).
+def write_portfolio(folder, proyectos, operaciones, desembolsos):
+    os.makedirs(folder, exist_ok=True)
+    frames = {'proyectos': proyectos, 'operaciones': operaciones, 'desembolsos': desembolsos}
+    paths = {}
+    for name, urls in SHEET_URLS.items():
+        for url in urls:
+            path = os.path.join(folder, snapshot_key(url) + '.csv')
+            frames[name].to_csv(path, index=False)
+            paths.setdefault(name, path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('folder')
+    parser.add_argument('--projects', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    proyectos, operaciones, desembolsos = synthetic_portfolio(args.projects, args.seed)
+    paths = write_portfolio(args.folder, proyectos, operaciones, desembolsos)
+    for name, frame in zip(paths, (proyectos, operaciones, desembolsos)):
+        print(f"{name}: {len(frame):,} filas")
+
+
+if __name__ == '__main__':
+    main()
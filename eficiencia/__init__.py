@@ -0,0 +1 @@
+# Lógica compartida por las páginas de análisis de eficiencia operativa.
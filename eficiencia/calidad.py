@@ -0,0 +1,206 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from eficiencia.compartido import result_cache
+from eficiencia.kpi import STATIONS, as_datetime
+from eficiencia.paralelo import parse_distinct
+from eficiencia.pipeline import PROJECT_DATE_COLUMNS
+
+# Tipos de anomalía
+INVALID_DATE = 'fecha no interpretable'
+OUT_OF_ORDER = 'fecha fuera de orden'
+NON_POSITIVE = 'duración negativa o cero'
+DUPLICATE_KEY = 'clave duplicada'
+MERGE_MISS = 'sin correspondencia'
+
+ANOMALY_COLUMNS = ['tipo', 'hoja', 'columna', 'fila', 'NoProyecto', 'NoOperacion', 'valor', 'detalle']
+
+# Columnas de cada hoja que identifican la fila (clave → columna en la hoja sin preparar)
+SHEET_KEYS = {
+    'proyectos': {'NoProyecto': 'NÚMERO', 'NoOperacion': 'NO. OPERACION'},
+    'operaciones': {'NoProyecto': 'NoProyecto', 'NoOperacion': 'NoOperacion'},
+    'desembolsos': {'NoOperacion': 'NoOperacion'}
+}
+# Columnas de fecha de cada hoja
+SHEET_DATE_COLUMNS = {
+    'proyectos': PROJECT_DATE_COLUMNS,
+    'operaciones': ['FechaVigencia', 'FechaElegibilidad'],
+    'desembolsos': ['FechaEfectiva']
+}
+# Claves que no se repiten en cada hoja (una operación puede tener varios desembolsos)
+UNIQUE_KEYS = {'proyectos': 'NoProyecto', 'operaciones': 'NoOperacion'}
+# Hitos de una operación en el orden en que deberían ocurrir
+MILESTONES = [
+    'CARTA CONSULTA', 'PERFIL', 'PROPUESTA OPERATIVA', 'APROBACIÓN',
+    'FechaVigencia', 'FechaElegibilidad', 'FechaEfectiva'
+]
+
+
+# Función para obtener, de una columna de fechas en texto y su conversión, las filas con texto que
+# no se pudo interpretar (ni vacías ni faltantes)
+def invalid_dates(raw, parsed):
+    text = raw.astype('string').str.strip()
+    return raw[(text.fillna('') != '').to_numpy(dtype=bool) & parsed.isna().to_numpy()]
+
+
+# Función para obtener las claves de una hoja sin guiones (NoProyecto y NoOperacion, si las tiene)
+def sheet_keys(frame, name):
+    keys = {}
+    for key, col in SHEET_KEYS[name].items():
+        col = col if col in frame else key
+        if col in frame:
+            # Como objetos: isin y duplicated usan la tabla hash de numpy, más rápida que la de Arrow
+            keys[key] = frame[col].astype('string').str.replace('-', '', regex=False).astype(object)
+    return pd.DataFrame(keys, index=frame.index)
+
+
+# Función para armar las anomalías de un tipo a partir de las posiciones de las filas afectadas
+def _anomalies(kind, sheet, column, rows, keys, values, details=None):
+    rows = np.asarray(rows, dtype='int64')
+    return pd.DataFrame({
+        'tipo': kind,
+        'hoja': sheet,
+        'columna': column,
+        'fila': rows,
+        'NoProyecto': keys['NoProyecto'].array.take(rows) if 'NoProyecto' in keys else None,
+        'NoOperacion': keys['NoOperacion'].array.take(rows) if 'NoOperacion' in keys else None,
+        'valor': pd.array(values, dtype='string'),
+        'detalle': details
+    }, columns=ANOMALY_COLUMNS)
+
+
+# Función para obtener las fechas que no se pudieron interpretar de una hoja. Las columnas aún en
+# texto se interpretan (con la caché de fechas); las que llegaron ya convertidas por la lectura por
+# bloques traen las fallidas en attrs['fechas_invalidas'].
+def _invalid_sheet_dates(frame, name, keys):
+    parts = []
+    columns = [col for col in SHEET_DATE_COLUMNS[name] if col in frame]
+    recorded = json.loads(frame.attrs.get('fechas_invalidas', '{}'))
+    text_columns = [col for col in columns if not pd.api.types.is_datetime64_any_dtype(frame[col])]
+    # Los textos distintos se interpretan una sola vez para todas las columnas
+    distinct, dates = parse_distinct([frame[col] for col in text_columns])
+    failed_texts = [value for value in distinct[np.isnat(dates)] if value.strip()]
+    for col in columns:
+        if col in text_columns:
+            rows = np.flatnonzero(frame[col].isin(failed_texts).to_numpy(dtype=bool))
+            values = frame[col].array.take(rows)
+        else:
+            recorded_rows = recorded.get(col, {})
+            rows = np.array([int(row) for row in recorded_rows], dtype='int64')
+            values = list(recorded_rows.values())
+        if len(rows):
+            parts.append(_anomalies(INVALID_DATE, name, col, rows, keys, values))
+    return parts
+
+
+# Función para obtener las filas cuya clave se repite en la hoja
+def _duplicate_keys(name, keys):
+    key = UNIQUE_KEYS.get(name)
+    if key not in keys:
+        return []
+    column = keys[key]
+    rows = np.flatnonzero((column.duplicated(keep=False) & column.notna()).to_numpy(dtype=bool))
+    if not len(rows):
+        return []
+    return [_anomalies(DUPLICATE_KEY, name, key, rows, keys, column.array.take(rows))]
+
+
+# Función para obtener las filas de una hoja cuya clave no aparece en la otra hoja de la unión
+def _merge_misses(name, keys, key, other_keys, detail):
+    column = keys[key]
+    rows = np.flatnonzero((column.notna() & ~column.isin(other_keys.dropna())).to_numpy(dtype=bool))
+    if not len(rows):
+        return []
+    return [_anomalies(MERGE_MISS, name, key, rows, keys, column.array.take(rows), detail)]
+
+
+# Función para validar las tres hojas tal como se cargan: fechas que no se pudieron interpretar,
+# claves duplicadas y filas sin correspondencia en las uniones. Devuelve la tabla de anomalías.
+def check_sheets(data, data_operaciones, data_desembolsos):
+    sheets = {'proyectos': data, 'operaciones': data_operaciones, 'desembolsos': data_desembolsos}
+    keys = {name: sheet_keys(frame, name) for name, frame in sheets.items()}
+    parts = []
+    for name, frame in sheets.items():
+        parts += _invalid_sheet_dates(frame, name, keys[name])
+        parts += _duplicate_keys(name, keys[name])
+    projects, operations, disbursements = keys['proyectos'], keys['operaciones'], keys['desembolsos']
+    parts += _merge_misses('proyectos', projects, 'NoProyecto', operations['NoProyecto'], 'sin operaciones')
+    parts += _merge_misses('operaciones', operations, 'NoProyecto', projects['NoProyecto'], 'sin proyecto')
+    parts += _merge_misses('operaciones', operations, 'NoOperacion', disbursements['NoOperacion'], 'sin desembolsos')
+    parts += _merge_misses('desembolsos', disbursements, 'NoOperacion', operations['NoOperacion'], 'sin operación')
+    return _concat(parts)
+
+
+# Función para validar las hojas una vez por versión (la de eficiencia.pipeline.source_versions),
+# compartida por todas las sesiones
+def shared_check_sheets(data, data_operaciones, data_desembolsos, versions, cache=result_cache):
+    return cache.get(('calidad',) + tuple(versions), lambda: check_sheets(data, data_operaciones, data_desembolsos))
+
+
+# Función para validar las fechas de la tabla unida: hitos anteriores a un hito previo (según
+# MILESTONES) y estaciones con duración negativa o cero, que el KPI descarta. Devuelve la tabla de
+# anomalías; hoja es 'unida' y fila, la posición en la tabla unida.
+def check_operations(filtered_df, stations=STATIONS):
+    keys = filtered_df[[col for col in ('NoProyecto', 'NoOperacion') if col in filtered_df]].reset_index(drop=True)
+    columns = list(dict.fromkeys(
+        [col for col in MILESTONES if col in filtered_df] +
+        [col for pair in stations.values() for col in pair if col in filtered_df]
+    ))
+    days = {
+        col: as_datetime(filtered_df[col]).to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+        for col in columns
+    }
+    parts = []
+
+    # Cada hito se compara con el más tardío de los hitos anteriores (los faltantes se ignoran)
+    milestones = [col for col in MILESTONES if col in days]
+    if len(milestones) > 1:
+        matrix = np.column_stack([days[col].astype('int64').astype('float64') for col in milestones])
+        matrix[np.column_stack([np.isnat(days[col]) for col in milestones])] = np.nan
+        latest = np.fmax.accumulate(matrix, axis=1)
+        for j, col in enumerate(milestones[1:], start=1):
+            with np.errstate(invalid='ignore'):
+                rows = np.flatnonzero(matrix[:, j] < latest[:, j - 1])
+            if len(rows):
+                previous = latest[rows, j - 1].astype('int64').astype('datetime64[D]')
+                parts.append(_anomalies(
+                    OUT_OF_ORDER, 'unida', col, rows, keys, np.datetime_as_string(days[col][rows]),
+                    np.char.add('anterior a un hito previo del ', np.datetime_as_string(previous))
+                ))
+
+    # Duración de cada estación (fin - inicio) negativa o cero
+    for name, (start_col, end_col) in stations.items():
+        if start_col not in days or end_col not in days:
+            continue
+        start, end = days[start_col], days[end_col]
+        present = ~(np.isnat(start) | np.isnat(end))
+        duration = (end - start).astype('int64')
+        rows = np.flatnonzero(present & (duration <= 0))
+        if len(rows):
+            parts.append(_anomalies(
+                NON_POSITIVE, 'unida', name, rows, keys, np.char.add(duration[rows].astype(str), ' días'),
+                f"{start_col} → {end_col}"
+            ))
+    return _concat(parts)
+
+
+# Función para unir partes de la tabla de anomalías (vacía si no hay ninguna)
+def _concat(parts):
+    if not parts:
+        return pd.DataFrame(columns=ANOMALY_COLUMNS)
+    return pd.concat(parts, ignore_index=True)
+
+
+# Función para unir tablas de anomalías (las que no se conocen, None, se omiten)
+def combine_anomalies(*tables):
+    return _concat([table for table in tables if table is not None and len(table)])
+
+
+# Función para contar las anomalías por tipo, hoja y columna, con las operaciones afectadas
+def anomaly_counts(anomalies):
+    if anomalies.empty:
+        return pd.DataFrame(columns=['tipo', 'hoja', 'columna', 'anomalias', 'operaciones'])
+    grouped = anomalies.groupby(['tipo', 'hoja', 'columna'], sort=False)
+    return grouped.agg(anomalias=('fila', 'size'), operaciones=('NoOperacion', 'nunique')).reset_index()
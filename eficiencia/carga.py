@@ -0,0 +1,299 @@
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+import urllib.request
+from urllib.error import HTTPError
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+from eficiencia.compartido import result_cache
+from eficiencia.medicion import count_rows, stage
+
+# Tiempo (segundos) durante el cual una copia local se usa sin consultar la fuente
+DEFAULT_TTL = float(os.environ.get('EFICIENCIA_CACHE_TTL', 300))
+# Carpeta compartida por todas las páginas y sesiones para las copias locales
+DEFAULT_CACHE_DIR = os.environ.get(
+    'EFICIENCIA_CACHE_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), '.cache', 'sheets')
+)
+# Reintentos por fuente y espera inicial entre reintentos (se duplica en cada intento)
+DEFAULT_RETRIES = int(os.environ.get('EFICIENCIA_LOAD_RETRIES', 2))
+DEFAULT_BACKOFF = 0.5
+# Carpeta opcional con archivos <clave>.csv que reemplazan a Google Sheets (pruebas sin red)
+SOURCE_DIR = os.environ.get('EFICIENCIA_SOURCE_DIR')
+# Hojas publicadas como CSV de las que se construyen las tablas de la página 0
+SHEET_SOURCES = {
+    'proyectos': "https://docs.google.com/spreadsheets/d/e/2PACX-1vTG0WVV5FQNxYyOz0UM0YEkT9u8vGnzrwfUt7pVmJUHKGjDyKas_scI6XhY_ce_sTxRPtwVZw1Ggfyi/pub?gid=918102047&single=true&output=csv",
+    'operaciones': "https://docs.google.com/spreadsheets/d/e/2PACX-1vTG0WVV5FQNxYyOz0UM0YEkT9u8vGnzrwfUt7pVmJUHKGjDyKas_scI6XhY_ce_sTxRPtwVZw1Ggfyi/pub?gid=1958213072&single=true&output=csv",
+    'desembolsos': "https://docs.google.com/spreadsheets/d/e/2PACX-1vTG0WVV5FQNxYyOz0UM0YEkT9u8vGnzrwfUt7pVmJUHKGjDyKas_scI6XhY_ce_sTxRPtwVZw1Ggfyi/pub?gid=1839704968&single=true&output=csv"
+}
+# Las páginas 1 y 2 leen la hoja de proyectos de la URL publicada sin gid (la primera hoja del libro)
+PUBLISHED_SOURCES = dict(
+    SHEET_SOURCES,
+    proyectos="https://docs.google.com/spreadsheets/d/e/2PACX-1vTG0WVV5FQNxYyOz0UM0YEkT9u8vGnzrwfUt7pVmJUHKGjDyKas_scI6XhY_ce_sTxRPtwVZw1Ggfyi/pub?output=csv"
+)
+# Tamaño de los bloques con que se recorre una fuente al leerla por bloques
+STREAM_BLOCK = 1 << 20
+
+
+# Función para obtener la clave de la copia local de una fuente (gid de la hoja si existe)
+def snapshot_key(source):
+    gid = parse_qs(urlparse(source).query).get('gid')
+    if gid:
+        return f"gid-{gid[0]}"
+    if re.match(r'https?://', source):
+        return 'url-' + hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+    return 'file-' + re.sub(r'[^\w.-]', '_', os.path.basename(source))
+
+
+# Función para redirigir una URL a su reemplazo local, si se configuró EFICIENCIA_SOURCE_DIR
+def resolve_source(source, source_dir=SOURCE_DIR):
+    if source_dir and re.match(r'https?://', source):
+        return os.path.join(source_dir, snapshot_key(source) + '.csv')
+    return source
+
+
+class SnapshotCache:
+    """Copias locales (Parquet) de las hojas CSV, con TTL y refresco condicional."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, timeout=30, results=result_cache):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.timeout = timeout
+        # Hojas ya leídas en memoria, compartidas por las sesiones mientras no cambie su contenido
+        self.results = results
+        # Resultado de la última carga por clave: 'fresh', 'not-modified', 'unchanged' o 'downloaded'
+        self.last_status = {}
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + '.parquet', base + '.json'
+
+    def _read_meta(self, key):
+        _, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _atomic_write(self, path, write):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _write_meta(self, key, meta):
+        _, meta_path = self._paths(key)
+        self._atomic_write(meta_path, lambda f: f.write(json.dumps(meta).encode('utf-8')))
+
+    def _read_snapshot(self, key, digest):
+        data_path, _ = self._paths(key)
+
+        def read():
+            data = pd.read_parquet(data_path)
+            data.attrs['snapshot'] = digest
+            return data
+        return self.results.get(('hoja', self.cache_dir, key, digest), read, persist=False)
+
+    def _write_snapshot(self, key, data):
+        data_path, _ = self._paths(key)
+        self._atomic_write(data_path, lambda f: data.to_parquet(f, index=False))
+
+    def _request(self, source, meta):
+        # Petición condicional con los validadores de la copia anterior
+        request = urllib.request.Request(source)
+        if meta and meta.get('etag'):
+            request.add_header('If-None-Match', meta['etag'])
+        if meta and meta.get('last_modified'):
+            request.add_header('If-Modified-Since', meta['last_modified'])
+        return request
+
+    def _fetch(self, source, meta):
+        """Devuelve (contenido, validadores) o (None, validadores) si la fuente no cambió."""
+        if not re.match(r'https?://', source):
+            stat = os.stat(source)
+            validators = {'mtime': stat.st_mtime, 'size': stat.st_size}
+            if meta and meta.get('mtime') == stat.st_mtime and meta.get('size') == stat.st_size:
+                return None, validators
+            with open(source, 'rb') as f:
+                return f.read(), validators
+
+        try:
+            with urllib.request.urlopen(self._request(source, meta), timeout=self.timeout) as response:
+                validators = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                }
+                return response.read(), validators
+        except HTTPError as e:
+            if e.code == 304:
+                return None, {'etag': meta.get('etag'), 'last_modified': meta.get('last_modified')}
+            raise
+
+    def _fetch_stream(self, source, meta):
+        """Como _fetch, pero sin leer el contenido completo en memoria: lo recorre por bloques
+        calculando su hash. Devuelve (ruta, hash, validadores, temporal), con ruta None si la
+        fuente no cambió; las URL se copian a un archivo temporal (temporal=True) que hay que borrar.
+        """
+        digest = hashlib.sha256()
+        if not re.match(r'https?://', source):
+            stat = os.stat(source)
+            validators = {'mtime': stat.st_mtime, 'size': stat.st_size}
+            if meta and meta.get('mtime') == stat.st_mtime and meta.get('size') == stat.st_size:
+                return None, None, validators, False
+            with open(source, 'rb') as f:
+                for block in iter(lambda: f.read(STREAM_BLOCK), b''):
+                    digest.update(block)
+            return source, digest.hexdigest(), validators, False
+
+        try:
+            with urllib.request.urlopen(self._request(source, meta), timeout=self.timeout) as response:
+                validators = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                }
+                os.makedirs(self.cache_dir, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.csv.tmp')
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        for block in iter(lambda: response.read(STREAM_BLOCK), b''):
+                            digest.update(block)
+                            f.write(block)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+                return tmp_path, digest.hexdigest(), validators, True
+        except HTTPError as e:
+            if e.code == 304:
+                return None, None, {'etag': meta.get('etag'), 'last_modified': meta.get('last_modified')}, False
+            raise
+
+    def load(self, source, spec=None, ttl=None):
+        """Carga una hoja desde su copia local o, si venció el TTL, desde la fuente.
+
+        ttl reemplaza el de la instancia solo en esta carga (ttl=0 revalida siempre con la fuente);
+        las cargas con distinto TTL no esperan una a la otra, pero comparten la copia local.
+
+        Con spec (un eficiencia.ingesta.SheetSpec) la hoja se lee por bloques, solo con las columnas
+        del spec y ya tipada, y se guarda en una copia local aparte. Las sesiones que cargan la misma
+        hoja a la vez esperan una sola descarga. Cada sesión recibe una copia superficial
+        (copy-on-write) de la tabla compartida, que puede modificar.
+        """
+        key = snapshot_key(source) + (f".{spec.key}" if spec is not None else '')
+        ttl = self.ttl if ttl is None else ttl
+        data = self.results.single_flight(
+            ('carga', self.cache_dir, key, ttl), lambda: self._load(key, source, spec, ttl)
+        )
+        return data.copy(deep=False)
+
+    def _load(self, key, source, spec, ttl):
+        source = resolve_source(source)
+        meta = self._read_meta(key)
+        data_path, _ = self._paths(key)
+        if meta is not None and not os.path.exists(data_path):
+            meta = None
+
+        if meta is not None and time.time() - meta['fetched_at'] < ttl:
+            self.last_status[key] = 'fresh'
+            return self._read_snapshot(key, meta['sha256'])
+
+        if spec is not None:
+            return self._load_stream(key, source, spec, meta)
+
+        body, validators = self._fetch(source, meta)
+        digest = hashlib.sha256(body).hexdigest() if body is not None else meta['sha256']
+        if body is None or (meta is not None and digest == meta['sha256']):
+            # La fuente no cambió: se reutiliza la copia local sin volver a parsear el CSV
+            self.last_status[key] = 'not-modified' if body is None else 'unchanged'
+            data = self._read_snapshot(key, digest)
+        else:
+            self.last_status[key] = 'downloaded'
+            data = self._store(key, digest, pd.read_csv(io.BytesIO(body), header=0, low_memory=False))
+
+        self._write_meta(key, dict(validators, source=source, sha256=digest, fetched_at=time.time()))
+        return data
+
+    def _load_stream(self, key, source, spec, meta):
+        path, digest, validators, temporary = self._fetch_stream(source, meta)
+        try:
+            if path is None or (meta is not None and digest == meta['sha256']):
+                digest = digest or meta['sha256']
+                self.last_status[key] = 'not-modified' if path is None else 'unchanged'
+                data = self._read_snapshot(key, digest)
+            else:
+                self.last_status[key] = 'downloaded'
+                data = self._store(key, digest, spec.read(path))
+        finally:
+            if temporary:
+                os.unlink(path)
+        self._write_meta(key, dict(validators, source=source, sha256=digest, fetched_at=time.time()))
+        return data
+
+    def _store(self, key, digest, data):
+        self._write_snapshot(key, data)
+        # Versión del contenido, para reutilizar lo que dependa solo de esta copia (p. ej. índices de unión)
+        data.attrs['snapshot'] = digest
+        return self.results.get(('hoja', self.cache_dir, key, digest), lambda: data, persist=False)
+
+
+# Instancia compartida por todas las páginas del proceso
+default_cache = SnapshotCache()
+
+
+# Función para cargar una hoja usando la copia local compartida (por bloques si se indica un spec;
+# con ttl, revalidando la copia con ese TTL en lugar del de la caché)
+def load_sheet(source, cache=None, spec=None, ttl=None):
+    return (cache or default_cache).load(source, spec, ttl)
+
+
+# Función para cargar una hoja con reintentos; devuelve (datos, error, segundos)
+def _load_with_retries(source, cache, retries, backoff, spec=None, ttl=None):
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        try:
+            return load_sheet(source, cache, spec, ttl), None, time.perf_counter() - start
+        except Exception as e:
+            error = e
+            if attempt < retries:
+                time.sleep(backoff * 2 ** attempt)
+    return None, error, time.perf_counter() - start
+
+
+# Función para cargar varias hojas en paralelo, cada una con su propio manejo de errores.
+# Devuelve tres diccionarios por nombre: datos (None si falló), errores y tiempos en segundos.
+# specs es un diccionario opcional nombre → SheetSpec para leer esas hojas por bloques; ttl, el TTL de
+# las copias locales en esta carga (por defecto, el de la caché).
+def load_sheets(sources, cache=None, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, timeout=None, specs=None,
+                ttl=None):
+    with stage('carga') as current:
+        frames, errors, timings = {}, {}, {}
+        executor = ThreadPoolExecutor(max_workers=len(sources) or 1, thread_name_prefix='carga')
+        futures = {
+            executor.submit(_load_with_retries, source, cache, retries, backoff, (specs or {}).get(name), ttl): name
+            for name, source in sources.items()
+        }
+        start = time.perf_counter()
+        done, _ = wait(futures, timeout=timeout)
+        for future, name in futures.items():
+            if future in done:
+                frames[name], error, timings[name] = future.result()
+            else:
+                # Las fuentes que exceden el tiempo total no bloquean al resto
+                frames[name], timings[name] = None, time.perf_counter() - start
+                error = TimeoutError(f"la carga superó {timeout} s")
+            if error is not None:
+                errors[name] = error
+        executor.shutdown(wait=False, cancel_futures=True)
+        current.rows_out = count_rows(list(frames.values()))
+    return frames, errors, timings
@@ -0,0 +1,63 @@
+import hashlib
+import inspect
+import linecache
+import os
+import textwrap
+import threading
+
+
+class SourceRegistry:
+    """Código fuente de las funciones de demostración, extraído una vez por proceso.
+
+    Cada fragmento se guarda por archivo, nombre de la función y hash del archivo. En cada pedido
+    solo se consulta la fecha y el tamaño del archivo; si cambiaron se vuelve a calcular el hash y,
+    si el contenido cambió, los fragmentos de ese archivo se extraen de nuevo.
+    """
+
+    def __init__(self):
+        # Archivo → (fecha de modificación, tamaño, hash)
+        self._files = {}
+        # (archivo, función, hash) → código sin la primera línea (def) ni la sangría
+        self._snippets = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _file_version(self, path):
+        stat = os.stat(path)
+        known = self._files.get(path)
+        if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return known[2]
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        if known is not None and known[2] != digest:
+            # El archivo cambió: se descartan sus fragmentos y la copia de inspect/linecache
+            self._snippets = {key: code for key, code in self._snippets.items() if key[0] != path}
+            linecache.checkcache(path)
+        self._files[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def snippet(self, func):
+        """Código de la función sin la línea def, como lo muestra show_code."""
+        path = inspect.getsourcefile(func)
+        with self._lock:
+            key = (path, func.__qualname__, self._file_version(path))
+            code = self._snippets.get(key)
+            if code is not None:
+                self.hits += 1
+                return code
+            self.misses += 1
+        lines, _ = inspect.getsourcelines(func)
+        code = textwrap.dedent("".join(lines[1:]))
+        with self._lock:
+            self._snippets[key] = code
+        return code
+
+    def stats(self):
+        with self._lock:
+            return {'files': len(self._files), 'snippets': len(self._snippets), 'hits': self.hits,
+                    'misses': self.misses}
+
+
+# Instancia compartida por todas las páginas del proceso
+source_registry = SourceRegistry()
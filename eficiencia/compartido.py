@@ -0,0 +1,241 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+# Memoria máxima (MB) de los resultados compartidos entre sesiones
+RESULT_CACHE_MB = float(os.environ.get('EFICIENCIA_RESULT_CACHE_MB', 512))
+# Carpeta opcional para conservar los resultados entre reinicios del proceso
+RESULT_CACHE_DIR = os.environ.get('EFICIENCIA_RESULT_CACHE_DIR')
+
+
+# Función para estimar la memoria (bytes) de un resultado: tablas, objetos con nbytes, o tuplas,
+# listas y diccionarios de ellos
+def estimate_bytes(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(index=True, deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(estimate_bytes(item) for item in value.values())
+    # Otros resultados (arreglos, cubos) informan su tamaño en nbytes
+    return int(getattr(value, 'nbytes', 0))
+
+
+class _Entry:
+    """Resultado guardado con su tamaño y las sesiones que lo recibieron."""
+
+    def __init__(self, value, nbytes, seconds):
+        self.value = value
+        self.nbytes = nbytes
+        self.seconds = seconds
+        self.created_at = time.time()
+        self.served = 0
+        self.sessions = set()
+
+
+class _Flight:
+    """Cálculo en curso al que esperan las demás sesiones que piden la misma clave."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.waiters = 0
+
+
+class ResultCache:
+    """Resultados compartidos por todas las sesiones del proceso, con un solo cálculo por clave."""
+
+    def __init__(self, max_bytes=RESULT_CACHE_MB * 2 ** 20, cache_dir=RESULT_CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def _serve(self, key, entry, session):
+        entry.served += 1
+        if session is not None:
+            entry.sessions.add(session)
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def _disk_path(self, key):
+        name = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name + '.pkl')
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                stored_key, value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+        # Dos claves con el mismo sha1 no deberían existir, pero se comprueba antes de usar el archivo
+        return value if stored_key == key else None
+
+    def _write_disk(self, key, value):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _store(self, key, value, seconds):
+        nbytes = estimate_bytes(value)
+        entry = _Entry(value, nbytes, seconds)
+        # Un resultado más grande que el límite se entrega pero no se guarda
+        if nbytes > self.max_bytes:
+            return entry
+        self._entries[key] = entry
+        self.nbytes += nbytes
+        # Se descartan los resultados usados hace más tiempo hasta volver al límite de memoria
+        while self.nbytes > self.max_bytes:
+            _, old = self._entries.popitem(last=False)
+            self.nbytes -= old.nbytes
+            self.evictions += 1
+        return entry
+
+    def get(self, key, compute, session=None, persist=True):
+        """Devuelve el resultado de la clave; si nadie lo calculó aún, lo calcula una sola vez.
+
+        Las sesiones que piden la misma clave mientras se calcula esperan ese cálculo. Si la
+        clave contiene None (versión desconocida) el resultado se calcula sin compartirlo.
+        Con persist=False el resultado no se guarda en la carpeta en disco.
+        """
+        if None in key:
+            return compute()
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                return self._serve(key, self._entries[key], session)
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+            else:
+                flight.waiters += 1
+                self.waits += 1
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    return self._serve(key, entry, session)
+            return flight.value
+
+        start = time.perf_counter()
+        try:
+            value = self._read_disk(key) if persist else None
+            if value is None:
+                value = compute()
+                if persist:
+                    self._write_disk(key, value)
+        except BaseException as e:
+            # El error se entrega a las sesiones que esperaban; la próxima llamada vuelve a intentar
+            with self._lock:
+                del self._flights[key]
+            flight.error = e
+            flight.done.set()
+            raise
+        with self._lock:
+            self.misses += 1
+            entry = self._store(key, value, time.perf_counter() - start)
+            entry.served += 1
+            if session is not None:
+                entry.sessions.add(session)
+            del self._flights[key]
+        flight.value = value
+        flight.done.set()
+        return value
+
+    def single_flight(self, key, compute):
+        """Ejecuta compute una sola vez para las llamadas simultáneas con la misma clave, sin guardar el resultado."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+                self.waits += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value
+
+    def served(self, key):
+        """Cantidad de pedidos atendidos con el resultado guardado de la clave (0 si no está)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.served if entry is not None else 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'waits': self.waits,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    def entries_frame(self):
+        """Tabla con un resultado guardado por fila: tamaño, tiempo de cálculo y sesiones atendidas."""
+        with self._lock:
+            rows = [{
+                'clave': ' / '.join(str(part)[:12] for part in key),
+                'bytes': entry.nbytes,
+                'segundos': entry.seconds,
+                'pedidos': entry.served,
+                'sesiones': len(entry.sessions),
+                'creado': pd.Timestamp(entry.created_at, unit='s')
+            } for key, entry in self._entries.items()]
+        return pd.DataFrame(rows, columns=['clave', 'bytes', 'segundos', 'pedidos', 'sesiones', 'creado'])
+
+
+# Instancia compartida por todas las páginas y sesiones del proceso
+result_cache = ResultCache()
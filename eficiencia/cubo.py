@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+from eficiencia.compartido import result_cache
+
+# Dimensiones del cubo: las de la tabla de KPI y, desde la tabla filtrada, SEC y ARE de cada operación
+CUBE_DIMENSIONS = ['ESTACIONES', 'PAIS', 'ANO', 'Productividad', 'SEC', 'ARE']
+PROJECT_FIELDS = ['SEC', 'ARE']
+PERCENTILES = (25, 50, 75, 90)
+
+
+# Función para agregar a la tabla de KPI los campos del proyecto (SEC, ARE) de cada operación
+def with_project_fields(results_df, filtered_df, columns=PROJECT_FIELDS):
+    operations = filtered_df.drop_duplicates('NoOperacion')
+    positions = pd.Index(operations['NoOperacion']).get_indexer(results_df['CODIGO'])
+    return results_df.assign(**{
+        col: operations[col].array.take(positions, allow_fill=True) for col in columns if col in operations
+    })
+
+
+# Función para codificar una columna como enteros: las categóricas en el orden de sus categorías,
+# las demás ordenadas; los vacíos son un nivel más (el último)
+def _encode(column):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes = column.cat.codes.to_numpy().astype('int64')
+        levels = list(column.cat.categories)
+        if (codes < 0).any():
+            codes[codes < 0] = len(levels)
+            levels.append(None)
+        return codes, pd.Index(levels, dtype=object)
+    codes, uniques = pd.factorize(column, sort=True, use_na_sentinel=False)
+    return codes.astype('int64'), pd.Index(uniques, dtype=object)
+
+
+# Función para combinar varios códigos en un solo código compacto por combinación
+def _combine(codes):
+    key = np.zeros(len(codes[0]) if codes else 0, dtype='int64')
+    for column in codes:
+        key, _ = pd.factorize(key * (column.max() + 1 if len(column) else 1) + column)
+        key = key.astype('int64')
+    return key
+
+
+class KpiCube:
+    """Agregados del KPI por combinación de dimensiones, en arreglos compactos.
+
+    Cada celda (combinación de niveles presente en los datos) guarda cantidad, suma, mínimo y
+    máximo; los valores del KPI se guardan ordenados por celda, como enteros en centésimos (el
+    motor de KPI redondea a 2 decimales), para calcular percentiles exactos de cualquier
+    agrupación sin volver a la tabla original.
+    """
+
+    def __init__(self, frame, dimensions=CUBE_DIMENSIONS):
+        self.dimensions = [dim for dim in dimensions if dim in frame]
+        encoded = [_encode(frame[dim]) for dim in self.dimensions]
+        self.levels = {dim: levels for dim, (_, levels) in zip(self.dimensions, encoded)}
+        codes = [c for c, _ in encoded]
+        kpi = frame['KPI'].to_numpy(dtype='float64')
+
+        # Filas ordenadas por celda y, dentro de cada celda, por KPI
+        cell = _combine(codes)
+        order = np.lexsort((kpi, cell))
+        cell = cell[order]
+        starts = np.flatnonzero(np.r_[True, cell[1:] != cell[:-1]]) if len(cell) else np.array([], dtype='int64')
+        self.offsets = starts
+        self.count = np.diff(np.r_[starts, len(cell)]).astype('int64')
+        values = kpi[order]
+        self.values = np.round(values * 100).astype('int32')
+        self.sum = np.add.reduceat(values, starts) if len(starts) else np.array([], dtype='float64')
+        self.min = values[starts]
+        self.max = values[starts + self.count - 1]
+        # Niveles de cada celda, una fila por dimensión
+        self.cell_codes = np.stack([c[order][starts] for c in codes]).astype('int32') if codes else None
+
+    @property
+    def nbytes(self):
+        arrays = [self.offsets, self.count, self.values, self.sum, self.min, self.max, self.cell_codes]
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def __len__(self):
+        return len(self.count)
+
+    def _cell_mask(self, filters):
+        mask = np.ones(len(self), dtype=bool)
+        for dim, wanted in (filters or {}).items():
+            if not wanted:
+                continue
+            levels = self.levels[dim]
+            codes = np.flatnonzero(levels.isin(list(wanted)))
+            mask &= np.isin(self.cell_codes[self.dimensions.index(dim)], codes)
+        return mask
+
+    def query(self, group_by=(), filters=None, percentiles=PERCENTILES):
+        """Agregados del KPI agrupados por group_by, solo para las celdas que cumplen los filtros.
+
+        filters es un diccionario dimensión → lista de niveles aceptados. Devuelve una fila por
+        grupo con filas, promedio, mínimo, máximo y percentiles del KPI.
+        """
+        cells = np.flatnonzero(self._cell_mask(filters))
+        group_by = list(group_by)
+        dim_rows = [self.dimensions.index(dim) for dim in group_by]
+        if group_by:
+            group = _combine([self.cell_codes[i][cells].astype('int64') for i in dim_rows])
+        else:
+            group = np.zeros(len(cells), dtype='int64')
+        groups = int(group.max()) + 1 if len(group) else 0
+
+        count = np.bincount(group, weights=self.count[cells], minlength=groups).astype('int64')
+        total = np.bincount(group, weights=self.sum[cells], minlength=groups)
+        low = np.full(groups, np.inf)
+        np.minimum.at(low, group, self.min[cells])
+        high = np.full(groups, -np.inf)
+        np.maximum.at(high, group, self.max[cells])
+
+        result = {}
+        if group_by:
+            first = np.unique(group, return_index=True)[1]
+            for dim, i in zip(group_by, dim_rows):
+                result[dim] = self.levels[dim].take(self.cell_codes[i][cells][first])
+        result['filas'] = count
+        result['KPI_promedio'] = np.round(total / np.maximum(count, 1), 2)
+        result['KPI_min'] = low
+        result['KPI_max'] = high
+        for q, value in zip(percentiles, self._percentiles(cells, group, count, percentiles)):
+            result[f'KPI_p{q}'] = np.round(value, 2)
+
+        frame = pd.DataFrame(result)
+        if group_by:
+            # Orden de los niveles de cada dimensión (p. ej. bandas de productividad de menor a mayor)
+            keys = [pd.Index(self.levels[dim]).get_indexer(frame[dim]) for dim in group_by]
+            frame = frame.iloc[np.lexsort(keys[::-1])].reset_index(drop=True)
+        return frame
+
+    def _percentiles(self, cells, group, count, percentiles):
+        # Valores de las celdas elegidas, reunidos por grupo y ordenados dentro de cada grupo: un solo
+        # ordenamiento de enteros grupo * rango + valor
+        lengths = self.count[cells]
+        within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        positions = np.repeat(self.offsets[cells], lengths) + within
+        values = self.values[positions].astype('int64')
+        low = values.min() if len(values) else 0
+        span = values.max() - low + 1 if len(values) else 1
+        keys = np.sort(np.repeat(group, lengths) * span + (values - low))
+        values = (keys % span + low) / 100
+        starts = np.cumsum(count) - count
+        # Interpolación lineal, como np.percentile
+        results = []
+        for q in percentiles:
+            rank = starts + q / 100 * np.maximum(count - 1, 0)
+            lower = np.floor(rank).astype('int64')
+            upper = np.ceil(rank).astype('int64')
+            if len(values):
+                lower = np.minimum(lower, len(values) - 1)
+                upper = np.minimum(upper, len(values) - 1)
+                value = values[lower] + (values[upper] - values[lower]) * (rank - lower)
+            else:
+                value = np.full(len(count), np.nan)
+            results.append(np.where(count > 0, value, np.nan))
+        return results
+
+
+# Función para construir el cubo de la tabla de KPI (con SEC y ARE desde la tabla filtrada)
+def build_cube(results_df, filtered_df):
+    return KpiCube(with_project_fields(results_df, filtered_df))
+
+
+# Función para obtener el cubo compartido por todas las sesiones; solo se reconstruye cuando cambia
+# la versión de alguna de las hojas (versions es la de eficiencia.pipeline.source_versions, más las
+# estaciones elegidas si la tabla de KPI no es la de todas las estaciones por defecto)
+def shared_cube(results_df, filtered_df, versions, cache=result_cache):
+    return cache.get(('cubo',) + tuple(versions), lambda: build_cube(results_df, filtered_df))
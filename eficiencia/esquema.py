@@ -0,0 +1,63 @@
+import pandas as pd
+
+from eficiencia.fechas import parse_dates
+from eficiencia.paralelo import date_cache
+
+# Columnas de fecha de la tabla unida, como datetime64 (NaT si falta o no se puede interpretar)
+DATE_COLUMNS = [
+    'ABSTRACTO', 'CARTA CONSULTA', 'PERFIL', 'PROPUESTA OPERATIVA', 'ACTA NEGOCIACION', 'APROBACIÓN',
+    'FechaVigencia', 'FechaElegibilidad', 'FechaEfectiva'
+]
+# Columnas con pocos valores distintos, como categóricas
+CATEGORY_COLUMNS = ['Pais', 'SEC', 'ARE', 'Estado_x']
+# Claves y textos libres, como texto de Arrow (un solo búfer en lugar de un objeto por celda)
+TEXT_COLUMNS = ['NoProyecto', 'NoOperacion', 'Alias']
+
+
+# Función para convertir una columna de texto en objetos a texto de Arrow (las de otros tipos no se tocan)
+def _compact_text(column):
+    if pd.api.types.is_object_dtype(column) and pd.api.types.infer_dtype(column, skipna=True) in ('string', 'empty'):
+        return column.astype(pd.StringDtype('pyarrow'))
+    return column
+
+
+# Función para aplicar el esquema a una tabla unida: fechas datetime64, categóricas y claves compactas.
+# Solo se convierten las columnas del esquema presentes; las demás se comparten con la original.
+def apply_schema(frame):
+    columns = {}
+    dates = date_cache([frame[col] for col in DATE_COLUMNS if col in frame])
+    for col in frame.columns:
+        if col in DATE_COLUMNS:
+            columns[col] = parse_dates(frame[col], dates)
+        elif col in CATEGORY_COLUMNS and not isinstance(frame[col].dtype, pd.CategoricalDtype):
+            columns[col] = frame[col].astype('category')
+        elif col in TEXT_COLUMNS:
+            columns[col] = _compact_text(frame[col])
+    return frame.assign(**columns)
+
+
+# Función para concatenar tablas con el esquema aplicado sin perder las columnas categóricas
+# (pd.concat las convierte a objetos cuando sus categorías difieren)
+def concat_typed(frames):
+    result = pd.concat(frames, ignore_index=True)
+    categorical = [
+        col for col in result.columns
+        if any(isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames)
+        and not isinstance(result[col].dtype, pd.CategoricalDtype)
+    ]
+    return result.astype({col: 'category' for col in categorical})
+
+
+# Función para obtener la memoria de cada columna: tipo, bytes, bytes por fila y bytes que
+# ocuparía la misma columna como objetos de Python (el formato anterior al esquema)
+def memory_report(frame):
+    usage = frame.memory_usage(index=False, deep=True)
+    as_object = frame.astype(object).memory_usage(index=False, deep=True)
+    report = pd.DataFrame({
+        'dtype': frame.dtypes.astype(str),
+        'bytes': usage,
+        'bytes_por_fila': usage / max(len(frame), 1),
+        'bytes_objeto': as_object
+    })
+    report.loc['Total'] = ['', usage.sum(), usage.sum() / max(len(frame), 1), as_object.sum()]
+    return report
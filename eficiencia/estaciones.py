@@ -0,0 +1,42 @@
+import pandas as pd
+
+from eficiencia.compartido import result_cache
+from eficiencia.incremental import default_pipeline
+from eficiencia.kpi import STATION_REGISTRY, compute_kpis
+
+
+# Función para obtener las estaciones del registro cuyas dos columnas de fecha están en la tabla
+def available_stations(frame, registry=STATION_REGISTRY):
+    return [name for name, pair in registry.items() if all(col in frame for col in pair)]
+
+
+# Función para obtener el KPI de una sola estación, calculado una vez por versión de las hojas y
+# compartido por todas las sesiones (versions es la de eficiencia.pipeline.source_versions, que fija
+# el contenido y el orden de las filas de la tabla filtrada). Si filtered_df es la tabla actual de la
+# actualización incremental, tras un cambio en las hojas solo se recalculan las operaciones afectadas.
+def station_kpis(filtered_df, name, versions, cache=result_cache, registry=STATION_REGISTRY,
+                 pipeline=default_pipeline):
+    pair = registry[name]
+    return cache.get(('kpi', name, pair) + tuple(versions), lambda: pipeline.station_kpis(filtered_df, name, pair))
+
+
+# Función para obtener la tabla de KPI de las estaciones elegidas. Cada estación se calcula (o se
+# toma de la caché) por separado; el resultado es el mismo que compute_kpis con esas estaciones:
+# una fila por operación y estación, en el orden de las operaciones y de las estaciones elegidas.
+def select_kpis(filtered_df, names, versions, cache=result_cache, registry=STATION_REGISTRY,
+                pipeline=default_pipeline):
+    names = list(dict.fromkeys(names))
+    if not names:
+        return compute_kpis(filtered_df, {})
+    k = len(names)
+    first_words = sorted({name.split()[0] for name in names})
+    # La fila i de la estación j ocupa la posición i * k + j, como en compute_kpis; las categóricas
+    # se llevan a las categorías de la selección antes de unir, para que la unión las conserve
+    parts = []
+    for j, name in enumerate(names):
+        part = station_kpis(filtered_df, name, versions, cache, registry, pipeline)
+        parts.append(part.set_axis(part.index * k + j).assign(
+            ESTACIONES=part['ESTACIONES'].cat.set_categories(first_words).array,
+            TIPO_DE_KPI=part['TIPO_DE_KPI'].cat.set_categories(names).array
+        ))
+    return pd.concat(parts).sort_index(kind='stable')
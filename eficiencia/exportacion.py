@@ -0,0 +1,185 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from eficiencia.carga import DEFAULT_RETRIES, SHEET_SOURCES, load_sheets
+from eficiencia.compartido import result_cache
+from eficiencia.ingesta import SHEET_SPECS, STREAMING
+from eficiencia.pipeline import build_tables, source_versions
+
+# Carpeta de las exportaciones: una subcarpeta por versión de las hojas y actual.json con la última
+EXPORT_DIR = os.environ.get(
+    'EFICIENCIA_EXPORT_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), '.cache', 'export')
+)
+# Arranque rápido: la página 0 muestra la última exportación mientras las hojas se cargan en segundo plano
+FAST_START = os.environ.get('EFICIENCIA_FAST_START', '') not in ('', '0')
+# Exportaciones que se conservan (la última y las anteriores más recientes); las demás se borran al publicar
+EXPORT_KEEP = max(int(os.environ.get('EFICIENCIA_EXPORT_KEEP', 2)), 1)
+
+SHEETS = ['proyectos', 'operaciones', 'desembolsos']
+TABLE_FILES = {'filtradas': 'filtradas.feather', 'kpi': 'kpi.feather'}
+LATEST_FILE = 'actual.json'
+
+
+# Función para obtener el identificador de una exportación a partir de las versiones de las hojas
+def export_version(versions):
+    return hashlib.sha256('|'.join(str(v) for v in versions).encode('utf-8')).hexdigest()[:16]
+
+
+# Función para convertir a JSON los valores de numpy de los diagnósticos de unión
+def _json_value(value):
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+# Función para escribir un archivo JSON de forma atómica (nunca queda a medio escribir)
+def _write_json(path, value):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(value, f, indent=2, ensure_ascii=False, default=_json_value)
+    os.replace(tmp_path, path)
+
+
+# Función para exportar las tablas filtrada y de KPI en Feather sin compresión (se leen sin
+# interpretar texto y las columnas de texto, sin copiarlas) junto con un manifiesto: versión de cada
+# hoja, filas, fecha y duración de la construcción. La exportación se arma en una carpeta temporal y
+# se publica al final; después se borran las exportaciones anteriores sobrantes. Devuelve el manifiesto.
+def export_tables(filtered_df, results_df, versions, folder=EXPORT_DIR, build_seconds=None):
+    version = export_version(versions)
+    os.makedirs(folder, exist_ok=True)
+    manifest = {
+        'version': version,
+        'sources': dict(zip(SHEETS, versions)),
+        'rows': {'filtradas': len(filtered_df), 'kpi': len(results_df)},
+        'built_at': pd.Timestamp.now(tz='UTC').isoformat(),
+        'build_seconds': build_seconds,
+        'format': 'feather',
+        'files': TABLE_FILES,
+        'pandas': pd.__version__,
+        'joins': filtered_df.attrs.get('joins')
+    }
+    target = os.path.join(folder, version)
+    if not os.path.exists(target):
+        tmp_dir = tempfile.mkdtemp(dir=folder, prefix='.tmp-')
+        try:
+            for name, frame in (('filtradas', filtered_df), ('kpi', results_df)):
+                frame = frame.reset_index(drop=True)
+                frame.attrs = {}
+                feather.write_feather(frame, os.path.join(tmp_dir, TABLE_FILES[name]), compression='uncompressed')
+            _write_json(os.path.join(tmp_dir, 'manifest.json'), manifest)
+            os.replace(tmp_dir, target)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+    else:
+        # Misma versión de las hojas: las tablas ya están, solo se actualiza el manifiesto
+        _write_json(os.path.join(target, 'manifest.json'), manifest)
+    _write_json(os.path.join(folder, LATEST_FILE), {'version': version})
+    prune_exports(folder, keep=EXPORT_KEEP)
+    return manifest
+
+
+# Función para borrar las exportaciones más antiguas (por la fecha de su manifiesto), conservando las
+# keep más recientes y siempre la última publicada. Las carpetas temporales de una exportación en curso
+# no se tocan. Devuelve las versiones borradas.
+def prune_exports(folder=EXPORT_DIR, keep=EXPORT_KEEP):
+    latest = read_manifest(folder)
+    built = []
+    for entry in os.scandir(folder):
+        if not entry.is_dir() or entry.name.startswith('.'):
+            continue
+        try:
+            built.append((os.stat(os.path.join(entry.path, 'manifest.json')).st_mtime_ns, entry.name))
+        except OSError:
+            continue
+    kept = {version for _, version in sorted(built, reverse=True)[:keep]}
+    if latest is not None:
+        kept.add(latest['version'])
+    removed = [version for _, version in built if version not in kept]
+    for version in removed:
+        # Una sesión puede tener abierta una versión anterior: sus archivos mapeados siguen válidos
+        shutil.rmtree(os.path.join(folder, version), ignore_errors=True)
+    return removed
+
+
+# Función para leer el manifiesto de la última exportación (None si no hay ninguna)
+def read_manifest(folder=EXPORT_DIR):
+    try:
+        with open(os.path.join(folder, LATEST_FILE), encoding='utf-8') as f:
+            version = json.load(f)['version']
+        with open(os.path.join(folder, version, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+# Función para abrir la última exportación con sus archivos mapeados en memoria. Las columnas de texto
+# quedan en Arrow sobre el archivo mapeado, sin copia; las de fecha (NaT en lugar de la máscara de
+# faltantes), categóricas y numéricas se copian a pandas con su tipo, que es el que usan el KPI y el
+# cubo. Devuelve (filtered_df, results_df, manifiesto) compartidos por todas las sesiones, o None si
+# no hay exportación.
+def open_export(folder=EXPORT_DIR, cache=result_cache):
+    manifest = read_manifest(folder)
+    if manifest is None:
+        return None
+
+    def read():
+        path = os.path.join(folder, manifest['version'])
+        filtered_df, results_df = (
+            feather.read_table(os.path.join(path, manifest['files'][name]), memory_map=True).to_pandas()
+            for name in ('filtradas', 'kpi')
+        )
+        filtered_df.attrs['joins'] = manifest.get('joins')
+        return filtered_df, results_df
+    filtered_df, results_df = cache.get(('exportacion', folder, manifest['version']), read, persist=False)
+    return filtered_df, results_df, manifest
+
+
+# Función para cargar las tres hojas; un error en cualquiera de ellas interrumpe la carga.
+# Devuelve las tres tablas y los tiempos de carga. ttl es el de eficiencia.carga.load_sheets.
+def load_sources(sources=SHEET_SOURCES, cache=None, retries=DEFAULT_RETRIES, ttl=None):
+    frames, errors, timings = load_sheets(
+        sources, cache=cache, retries=retries, specs=SHEET_SPECS if STREAMING else None, ttl=ttl
+    )
+    if errors:
+        raise RuntimeError('; '.join(f"{name}: {error}" for name, error in errors.items()))
+    return [frames[name] for name in SHEETS], timings
+
+
+# Función para construir las tablas desde las hojas y exportarlas (comando de exportación)
+def export_sources(sources=SHEET_SOURCES, folder=EXPORT_DIR, cache=None):
+    start = time.perf_counter()
+    sheets, _ = load_sources(sources, cache)
+    versions = source_versions(*sheets)
+    filtered_df, results_df = build_tables(*sheets, versions=versions)
+    return export_tables(filtered_df, results_df, versions, folder, time.perf_counter() - start)
+
+
+# Función para exportar las tablas solo si la versión de las hojas cambió respecto de la última
+# exportación; devuelve el manifiesto nuevo o None si no hizo falta exportar
+def export_if_changed(filtered_df, results_df, versions, folder=EXPORT_DIR, build_seconds=None):
+    manifest = read_manifest(folder)
+    if manifest is not None and manifest['version'] == export_version(versions):
+        return None
+    return export_tables(filtered_df, results_df, versions, folder, build_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Exporta las tablas filtrada y de KPI de la página 0 para el arranque rápido'
+    )
+    parser.add_argument('--folder', default=EXPORT_DIR, help='carpeta de las exportaciones')
+    args = parser.parse_args()
+    manifest = export_sources(folder=args.folder)
+    print(json.dumps({key: manifest[key] for key in ('version', 'sources', 'rows', 'built_at', 'build_seconds')},
+                     indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from dateutil import parser
+from pandas.errors import OutOfBoundsDatetime
+
+# Meses por sus tres primeras letras, en español e inglés
+MONTHS = {
+    'ene': 1, 'feb': 2, 'mar': 3, 'abr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'ago': 8, 'sep': 9, 'set': 9, 'oct': 10, 'nov': 11, 'dic': 12,
+    'jan': 1, 'apr': 4, 'aug': 8, 'dec': 12
+}
+
+# Formatos de fecha conocidos: (nombre, expresión regular, orden de los grupos día/mes/año)
+DATE_FORMATS = [
+    # 12 ENE 21
+    ('abreviado', r'^(\d{1,2}) ([^\W\d_]{3,}) (\d{2}|\d{4})$', ('day', 'month', 'year')),
+    # 12-ene-21, 12-Jan-2021
+    ('guiones', r'^(\d{1,2})-([^\W\d_]{3,})-(\d{2}|\d{4})$', ('day', 'month', 'year')),
+    # lunes, 12 de enero de 2021
+    ('largo', r'^[^\W\d_]+,\s*(\d{1,2})\s+de\s+([^\W\d_]+)\s+de\s+(\d{4})$', ('day', 'month', 'year')),
+    # 12/01/2021 (día primero, como el resto de la aplicación)
+    ('numerico', r'^(\d{1,2})/(\d{1,2})/(\d{4})$', ('day', 'month', 'year')),
+    # 2021-01-12, 2021-01-12 00:00:00
+    ('iso', r'^(\d{4})-(\d{1,2})-(\d{1,2})(?:[ T]\d{2}:\d{2}(?::\d{2})?)?$', ('year', 'month', 'day')),
+]
+
+OUTPUT_FORMAT = '%d/%m/%Y'
+
+# Cantidad máxima de textos distintos que recuerda la caché de fechas interpretadas
+DATE_CACHE_SIZE = int(os.environ.get('EFICIENCIA_DATE_CACHE_SIZE', 50_000))
+
+
+class ParseCache:
+    """Caché LRU acotada de texto → fecha, compartida por columnas, páginas y ejecuciones."""
+
+    def __init__(self, maxsize=DATE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, values):
+        """Devuelve las fechas conocidas (NaT si no) y la máscara de textos que faltan interpretar."""
+        result = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+        missing = np.zeros(len(values), dtype=bool)
+        hits = 0
+        with self._lock:
+            for i, value in enumerate(values):
+                if not isinstance(value, str):
+                    continue
+                date = self._data.get(value)
+                if date is None:
+                    missing[i] = True
+                else:
+                    self._data.move_to_end(value)
+                    result[i] = date
+                    hits += 1
+            self.hits += hits
+            self.misses += int(missing.sum())
+        return result, missing
+
+    def store(self, values, dates):
+        with self._lock:
+            for value, date in zip(values, dates):
+                self._data[value] = date
+                self._data.move_to_end(value)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+# Instancia compartida por todo el proceso
+parse_cache = ParseCache()
+
+
+# Función para obtener los textos (sin espacios sobrantes) de un arreglo de valores; NA en lo que no es texto
+def _as_text(values):
+    text = pd.Series(values, dtype=object)
+    text = text.where(text.map(lambda x: isinstance(x, str)))
+    return text.astype('string').str.strip()
+
+
+# Función para detectar, con una muestra, qué formatos aparecen en una columna (del más al menos frecuente)
+def detect_formats(text, sample_size=200):
+    sample = text.dropna().head(sample_size)
+    counts = [(sample.str.match(regex, flags=re.IGNORECASE).sum(), name) for name, regex, _ in DATE_FORMATS]
+    return [name for count, name in sorted(counts, key=lambda c: -c[0]) if count > 0]
+
+
+# Función para convertir las partes extraídas por una expresión regular a datetime64
+def _build_dates(parts, order):
+    parts = parts.set_axis(order, axis=1)
+    month = parts['month']
+    if not month.str.fullmatch(r'\d+').all():
+        month = month.str.lower().str[:3].map(MONTHS)
+    year = pd.to_numeric(parts['year'])
+    year = year.where(year >= 100, year + 2000)
+    return pd.to_datetime(
+        pd.DataFrame({'year': year, 'month': pd.to_numeric(month), 'day': pd.to_numeric(parts['day'])}),
+        errors='coerce'
+    )
+
+
+# Función de respaldo, fila por fila, para los textos que no coinciden con ningún formato
+def _parse_slow(value):
+    try:
+        return parser.parse(value, dayfirst=True)
+    except (ValueError, TypeError, OverflowError):
+        return pd.NaT
+
+
+# Función para interpretar un arreglo de textos distintos a datetime64 (NaT si no se puede interpretar)
+def _parse_text(values):
+    text = _as_text(values)
+    result = np.full(len(text), np.datetime64('NaT'), dtype='datetime64[ns]')
+    pending = text.notna().to_numpy(dtype=bool, copy=True)
+
+    # Primero los formatos detectados en la muestra y luego el resto, solo sobre los valores pendientes
+    detected = detect_formats(text)
+    names = detected + [name for name, _, _ in DATE_FORMATS if name not in detected]
+    formats = {name: (regex, order) for name, regex, order in DATE_FORMATS}
+    for name in names:
+        if not pending.any():
+            break
+        regex, order = formats[name]
+        parts = text[pending].str.extract(regex, flags=re.IGNORECASE).dropna()
+        if parts.empty:
+            continue
+        dates = _build_dates(parts, order).dropna()
+        # Las fechas fuera del rango de datetime64[ns] (antes de 1677 o después de 2262) quedan como NaT
+        in_range = dates.between(pd.Timestamp.min, pd.Timestamp.max)
+        result[dates.index[in_range].to_numpy()] = dates[in_range].to_numpy(dtype='datetime64[ns]')
+        pending[dates.index.to_numpy()] = False
+
+    # Los textos restantes pasan por el parser flexible
+    for position in np.flatnonzero(pending):
+        try:
+            result[position] = pd.Timestamp(_parse_slow(text[position])).as_unit('ns').to_datetime64()
+        except (OutOfBoundsDatetime, OverflowError):
+            pass
+    return result
+
+
+# Función para convertir un arreglo de valores distintos a datetime64, interpretando solo
+# los textos que no están en la caché
+def _parse_values(values, cache=None):
+    cache = parse_cache if cache is None else cache
+    result, missing = cache.lookup(values)
+    if missing.any():
+        parsed = _parse_text(values[missing])
+        result[missing] = parsed
+        cache.store(values[missing], parsed)
+    return result
+
+
+# Función para convertir una columna de fechas en texto (formatos mixtos en español) a datetime64.
+# Solo se interpretan los valores distintos que no están en la caché; los que no se pueden
+# interpretar quedan como NaT.
+def parse_dates(column, cache=None):
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column
+    codes, uniques = pd.factorize(column)
+    parsed = np.append(_parse_values(np.asarray(uniques, dtype=object), cache), np.datetime64('NaT', 'ns'))
+    return pd.Series(parsed[codes], index=column.index, name=column.name)
+
+
+# Función para normalizar una columna de fechas al texto dd/mm/aaaa.
+# Con keep_invalid=True los valores que no se pueden interpretar se conservan tal cual;
+# con keep_invalid=False se reemplazan por None.
+def normalize_dates(column, keep_invalid=True, cache=None):
+    codes, uniques = pd.factorize(column)
+    uniques = np.asarray(uniques, dtype=object)
+    parsed = pd.DatetimeIndex(_parse_values(uniques, cache))
+    labels = parsed.strftime(OUTPUT_FORMAT).to_numpy(dtype=object)
+    invalid = parsed.isna()
+    labels[invalid] = uniques[invalid] if keep_invalid else None
+    normalized = np.append(labels, None)[codes]
+    if keep_invalid:
+        # Las celdas vacías conservan su valor original (NaN/None)
+        normalized[codes < 0] = column.to_numpy(dtype=object)[codes < 0]
+    return pd.Series(normalized, index=column.index, name=column.name, dtype=object)
@@ -0,0 +1,170 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from eficiencia.compartido import result_cache
+from eficiencia.esquema import concat_typed
+from eficiencia.kpi import STATIONS, compute_kpis
+from eficiencia.medicion import stage
+from eficiencia.pipeline import build_tables, operation_order, operation_positions, project_keys, source_versions
+
+
+# Función para calcular la huella de cada clave: suma (mod 2^64) de los hashes de sus filas
+def key_fingerprints(data, keys):
+    hashes = pd.util.hash_pandas_object(data, index=False)
+    return pd.Series(hashes.to_numpy(), index=pd.Index(keys.to_numpy(), dtype=object)).groupby(
+        level=0, dropna=False, sort=False
+    ).sum()
+
+
+# Función para obtener las claves agregadas, eliminadas o modificadas entre dos huellas
+def changed_keys(old, new):
+    old, new = old.align(new)
+    return set(old.index[old.ne(new) | old.isna() | new.isna()])
+
+
+# Función para llevar el KPI de una estación (índice: fila de la tabla filtrada de la que salió) a
+# la tabla filtrada nueva. sources indica el origen de cada fila nueva: su posición en la tabla
+# anterior o, si es -1 - i, la fila i de las recalculadas; fresh es el KPI de las recalculadas.
+def splice_station(previous, fresh, sources, n_previous):
+    kept = np.flatnonzero(sources >= 0)
+    rebuilt = np.flatnonzero(sources < 0)
+    from_previous = np.full(n_previous, -1, dtype='int64')
+    from_previous[sources[kept]] = kept
+    from_fresh = np.full(len(rebuilt), -1, dtype='int64')
+    from_fresh[-1 - sources[rebuilt]] = rebuilt
+    previous_rows = from_previous[previous.index.to_numpy()]
+    previous = previous[previous_rows >= 0]
+    rows = np.concatenate([previous_rows[previous_rows >= 0], from_fresh[fresh.index.to_numpy()]])
+    spliced = concat_typed([previous, fresh]).set_axis(rows)
+    return spliced.iloc[np.argsort(rows, kind='stable')]
+
+
+class IncrementalPipeline:
+    """Tablas filtrada y de KPI que solo se recalculan para las operaciones cuyas filas cambiaron."""
+
+    def __init__(self, stations=STATIONS):
+        self.stations = stations
+        # Tabla filtrada actual, sus huellas y el KPI de cada estación pedida (station_kpis)
+        self.state = None
+        # Resumen de la última actualización: modo, operaciones recalculadas y segundos
+        self.last_stats = {}
+        self._lock = threading.Lock()
+
+    def _fingerprints(self, data, data_operaciones, data_desembolsos):
+        return {
+            'proyectos': key_fingerprints(data, project_keys(data)),
+            'operaciones': key_fingerprints(data_operaciones, data_operaciones['NoOperacion']),
+            'desembolsos': key_fingerprints(data_desembolsos, data_desembolsos['NoOperacion'])
+        }
+
+    def _affected_operations(self, fingerprints, operation_projects):
+        old = self.state['fingerprints']
+        affected = changed_keys(old['operaciones'], fingerprints['operaciones'])
+        affected |= changed_keys(old['desembolsos'], fingerprints['desembolsos'])
+        # Un cambio en un proyecto afecta a sus operaciones, antes y después del cambio
+        projects = changed_keys(old['proyectos'], fingerprints['proyectos'])
+        if projects:
+            for mapping in (self.state['operation_projects'], operation_projects):
+                affected |= set(mapping.index[mapping.isin(projects)])
+        return affected
+
+    def refresh(self, data, data_operaciones, data_desembolsos):
+        """Devuelve (filtered_df, results_df) actualizados para las tres hojas recibidas."""
+        filtered_df, results_df, _ = self.update(data, data_operaciones, data_desembolsos)
+        return filtered_df, results_df
+
+    def update(self, data, data_operaciones, data_desembolsos):
+        """Como refresh, pero devuelve además el resumen de esta actualización (el de last_stats)."""
+        start = time.perf_counter()
+        with stage('huellas', rows_in=(data, data_operaciones, data_desembolsos)):
+            fingerprints = self._fingerprints(data, data_operaciones, data_desembolsos)
+        operation_projects = pd.Series(
+            data_operaciones['NoProyecto'].to_numpy(), index=data_operaciones['NoOperacion'].to_numpy()
+        )
+        positions = operation_positions(data_operaciones)
+
+        with self._lock:
+            if self.state is None:
+                mode, affected = 'full', None
+                filtered_df, results_df = build_tables(
+                    data, data_operaciones, data_desembolsos, self.stations,
+                    versions=source_versions(data, data_operaciones, data_desembolsos)
+                )
+                joins = filtered_df.attrs.get('joins')
+                stations = {}
+            else:
+                affected = self._affected_operations(fingerprints, operation_projects)
+                mode = 'incremental' if affected else 'unchanged'
+                filtered_df, results_df = self.state['filtered_df'], self.state['results_df']
+                joins = None
+                stations = self.state['stations']
+
+            if affected:
+                # Solo se recalculan las filas de las operaciones afectadas
+                operations = data_operaciones[data_operaciones['NoOperacion'].isin(affected)]
+                projects = data[project_keys(data).isin(operations['NoProyecto'])]
+                disbursements = data_desembolsos[data_desembolsos['NoOperacion'].isin(affected)]
+                new_filtered, new_results = build_tables(projects, operations, disbursements, self.stations)
+                joins = new_filtered.attrs.get('joins')
+                # Filas conservadas y recalculadas, en el orden de las operaciones (el de build_filtered)
+                kept = ~filtered_df['NoOperacion'].isin(affected).to_numpy(dtype=bool)
+                combined = concat_typed([filtered_df[kept], new_filtered])
+                order = operation_order(combined, 'NoOperacion', positions)
+                sources = np.concatenate([np.flatnonzero(kept), -1 - np.arange(len(new_filtered))])[order]
+                stations = {
+                    key: splice_station(previous, compute_kpis(new_filtered, dict([key])), sources, len(filtered_df))
+                    for key, previous in stations.items()
+                }
+                filtered_df = combined.iloc[order].reset_index(drop=True)
+                results_df = concat_typed([results_df[~results_df['CODIGO'].isin(affected)], new_results])
+                results_df = results_df.iloc[operation_order(results_df, 'CODIGO', positions)].reset_index(drop=True)
+
+            self.state = {
+                'fingerprints': fingerprints,
+                'operation_projects': operation_projects,
+                'filtered_df': filtered_df,
+                'results_df': results_df,
+                'stations': stations
+            }
+            self.last_stats = {
+                'mode': mode,
+                'affected_operations': len(affected) if affected is not None else len(positions),
+                'seconds': time.perf_counter() - start,
+                # Diagnóstico de las uniones recalculadas (None si no hubo cambios)
+                'joins': joins
+            }
+            return filtered_df, results_df, self.last_stats
+
+    def station_kpis(self, filtered_df, name, pair):
+        """KPI de una estación (como compute_kpis con esa sola estación). Si filtered_df es la tabla
+        actual, el resultado se guarda y cada actualización solo recalcula las operaciones afectadas."""
+        key = (name, pair)
+        with self._lock:
+            state = self.state
+            current = state is not None and state['filtered_df'] is filtered_df
+            if current and key in state['stations']:
+                return state['stations'][key]
+        results = compute_kpis(filtered_df, {name: pair})
+        if current:
+            with self._lock:
+                if self.state is state:
+                    state['stations'][key] = results
+        return results
+
+
+# Instancia compartida por todas las ejecuciones de la página en el proceso. Solo mantiene la tabla
+# filtrada y el KPI de las estaciones pedidas a través de eficiencia.estaciones
+default_pipeline = IncrementalPipeline(stations={})
+
+
+# Función para obtener las tablas filtrada y de KPI compartidas por todas las sesiones: la primera
+# sesión que pide una versión de las hojas las calcula y las demás reciben el mismo resultado.
+# Devuelve (filtered_df, results_df, stats), con stats el resumen de la actualización que produjo esa
+# versión (no el de la última actualización del pipeline, que puede ser de otra versión).
+def shared_refresh(data, data_operaciones, data_desembolsos, pipeline=default_pipeline, cache=result_cache,
+                   session=None):
+    key = ('tablas', tuple(pipeline.stations.items())) + source_versions(data, data_operaciones, data_desembolsos)
+    return cache.get(key, lambda: pipeline.update(data, data_operaciones, data_desembolsos), session)
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from eficiencia.calidad import invalid_dates
+from eficiencia.fechas import parse_dates
+from eficiencia.paralelo import date_cache
+from eficiencia.pipeline import PROJECT_DATE_COLUMNS
+
+# Filas por bloque en la lectura por bloques (acota la memoria usada por el CSV en texto)
+CHUNK_ROWS = int(os.environ.get('EFICIENCIA_CHUNK_ROWS', 50_000))
+# Lectura por bloques de las hojas de la página 0 (con 0 se lee el CSV completo, como antes)
+STREAMING = os.environ.get('EFICIENCIA_STREAMING', '1') not in ('', '0')
+
+
+class SheetSpec:
+    """Columnas y tratamiento de una hoja para leerla por bloques.
+
+    Solo se leen las columnas indicadas, todas como texto; en cada bloque se interpretan las
+    fechas, se quitan los guiones de las claves y las columnas de pocos valores pasan a categóricas.
+    """
+
+    def __init__(self, name, columns, date_columns=(), key_columns=(), category_columns=(), chunksize=CHUNK_ROWS):
+        self.name = name
+        self.columns = list(columns)
+        self.date_columns = list(date_columns)
+        self.key_columns = list(key_columns)
+        self.category_columns = list(category_columns)
+        self.chunksize = chunksize
+
+    @property
+    def key(self):
+        # Cambia con las columnas o su tratamiento: no se reutilizan copias locales de otro esquema
+        signature = repr((self.columns, self.date_columns, self.key_columns, self.category_columns))
+        return f"{self.name}-{hashlib.sha1(signature.encode('utf-8')).hexdigest()[:8]}"
+
+    def clean(self, chunk):
+        """Aplica fechas, limpieza de claves y categóricas a un bloque."""
+        columns = {}
+        invalid = {}
+        dates = date_cache([chunk[col] for col in self.date_columns if col in chunk])
+        for col in chunk.columns:
+            if col in self.date_columns:
+                columns[col] = parse_dates(chunk[col], dates)
+                # El texto de las fechas que no se pudieron interpretar se conserva para la validación
+                failed = invalid_dates(chunk[col], columns[col])
+                invalid[col] = dict(zip(failed.index.astype(str), failed.tolist()))
+            elif col in self.key_columns:
+                columns[col] = chunk[col].str.replace('-', '', regex=False)
+            elif col in self.category_columns:
+                columns[col] = chunk[col].astype('category')
+        chunk = chunk.assign(**columns)
+        chunk.attrs['fechas_invalidas'] = invalid
+        return chunk
+
+    def combine(self, chunks):
+        """Une los bloques ya tipados; las categóricas se unen con las categorías de todos los bloques."""
+        chunks = [chunk for chunk in chunks if len(chunk)] or chunks[:1]
+        if not chunks:
+            return pd.DataFrame(columns=self.columns)
+        order = chunks[0].columns
+        categories = {
+            col: union_categoricals([chunk[col] for chunk in chunks], sort_categories=True)
+            for col in self.category_columns if col in order
+        }
+        # Las filas de cada bloque conservan su posición en la hoja (el índice de read_csv es continuo)
+        invalid = {}
+        for chunk in chunks:
+            for col, failed in chunk.attrs.get('fechas_invalidas', {}).items():
+                invalid.setdefault(col, {}).update(failed)
+        frame = pd.concat([chunk.drop(columns=list(categories)) for chunk in chunks], ignore_index=True)
+        frame = frame.assign(**categories)[order]
+        # En texto JSON: pandas copia attrs en cada operación y copiar un texto no cuesta nada
+        frame.attrs = {'fechas_invalidas': json.dumps(invalid, ensure_ascii=False)}
+        return frame
+
+    def read(self, source):
+        """Lee un CSV (ruta o archivo abierto) por bloques y devuelve la tabla tipada.
+
+        En memoria hay a la vez un solo bloque en texto y los bloques anteriores ya tipados.
+        """
+        chunks = []
+        with pd.read_csv(
+            source, header=0, usecols=lambda col: col in self.columns, dtype=str, chunksize=self.chunksize
+        ) as reader:
+            for chunk in reader:
+                chunks.append(self.clean(chunk))
+        return self.combine(chunks)
+
+
+# Hojas de la página 0: solo las columnas que usan la unión y el KPI
+SHEET_SPECS = {
+    'proyectos': SheetSpec(
+        'proyectos', ['NÚMERO', 'NO. OPERACION'] + PROJECT_DATE_COLUMNS + ['SEC', 'ARE', 'Estado'],
+        date_columns=PROJECT_DATE_COLUMNS, key_columns=['NÚMERO', 'NO. OPERACION'],
+        category_columns=['SEC', 'ARE', 'Estado']
+    ),
+    # Estado se conserva aunque no se use: su choque con el de proyectos da el nombre Estado_x
+    'operaciones': SheetSpec(
+        'operaciones', ['NoProyecto', 'NoOperacion', 'Pais', 'Alias', 'Estado', 'FechaVigencia', 'FechaElegibilidad'],
+        date_columns=['FechaVigencia', 'FechaElegibilidad'], category_columns=['Pais', 'Estado']
+    ),
+    'desembolsos': SheetSpec(
+        'desembolsos', ['NoOperacion', 'FechaEfectiva'], date_columns=['FechaEfectiva']
+    ),
+}
@@ -0,0 +1,146 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Mapeo de estaciones a sus respectivas columnas de fecha (inicio, fin); son las que se
+# calculan por defecto
+STATIONS = {
+    'Vigencia - Aprobacion': ('APROBACIÓN', 'FechaVigencia'),
+    'Aprobacion - Carta Consulta': ('CARTA CONSULTA', 'APROBACIÓN'),
+    'Elegibilidad - Vigencia': ('FechaVigencia', 'FechaElegibilidad'),
+    'PrimerDesembolso - Elegibilidad': ('FechaEfectiva', 'FechaElegibilidad')
+}
+# Registro de todas las estaciones disponibles (las de STATIONS y otras que se calculan a pedido)
+STATION_REGISTRY = dict(STATIONS, **{
+    'Propuesta - Perfil': ('PERFIL', 'PROPUESTA OPERATIVA')
+})
+# Archivo JSON opcional con estaciones adicionales: {"Nombre": ["COLUMNA_INICIO", "COLUMNA_FIN"]}
+STATIONS_FILE = os.environ.get('EFICIENCIA_STATIONS_FILE')
+
+# Umbrales (en meses) de las bandas de productividad
+PRODUCTIVITY_BINS = [6, 8, 12]
+PRODUCTIVITY_LABELS = ['Eficiente', 'Aceptable', 'Con Demora', 'Alta Demora']
+NO_DATA_LABEL = 'Datos insuficientes'
+
+RESULT_COLUMNS = [
+    'ESTACIONES', 'ANO', 'PAIS', 'CODIGO', 'APODO', 'Indicador_Principal',
+    'Indicador_Secundario', 'TIPO_DE_KPI', 'KPI', 'Productividad'
+]
+
+
+# Función para agregar (o reemplazar) una estación en el registro
+def register_station(name, start_col, end_col, registry=STATION_REGISTRY):
+    registry[name] = (start_col, end_col)
+
+
+# Función para agregar al registro las estaciones de un archivo JSON
+def load_stations_file(path, registry=STATION_REGISTRY):
+    with open(path, encoding='utf-8') as f:
+        for name, (start_col, end_col) in json.load(f).items():
+            register_station(name, start_col, end_col, registry)
+
+
+if STATIONS_FILE:
+    load_stations_file(STATIONS_FILE)
+
+
+# Función para obtener una columna de fechas como datetime64
+def as_datetime(column):
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column
+    # Las fechas llegan como texto dd/mm/aaaa desde el preprocesamiento;
+    # solo se convierten los valores únicos
+    codes, uniques = pd.factorize(column)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format='%d/%m/%Y', errors='coerce')
+    values = parsed.to_numpy(dtype='datetime64[ns]')
+    result = np.full(len(codes), np.datetime64('NaT'), dtype='datetime64[ns]')
+    result[codes >= 0] = values[codes[codes >= 0]]
+    return pd.Series(result, index=column.index, name=column.name)
+
+
+# Función para calcular el KPI (meses) de una columna completa de fechas
+def kpi_months(end_days, start_days):
+    # Fechas en resolución de días (datetime64[D]); NaT produce NaN
+    days = (end_days - start_days).astype('float64')
+    days[np.isnat(end_days) | np.isnat(start_days)] = np.nan
+    kpi = np.round(days / 30, 2)
+    # Los KPI negativos se consideran datos inválidos
+    kpi[kpi < 0] = np.nan
+    return kpi
+
+
+# Función para asignar la banda de productividad a un arreglo de KPI
+def productivity_band(kpi):
+    codes = np.searchsorted(PRODUCTIVITY_BINS, kpi, side='right')
+    codes[np.isnan(kpi)] = len(PRODUCTIVITY_LABELS)
+    return pd.Categorical.from_codes(codes, PRODUCTIVITY_LABELS + [NO_DATA_LABEL])
+
+
+# Función para formatear días distintos como dd/mm/aaaa, con un NA final para las fechas faltantes
+def date_labels(days):
+    return pd.array(pd.DatetimeIndex(days).strftime('%d/%m/%Y').tolist() + [None], dtype='string')
+
+
+# Función para obtener las etiquetas de fecha a partir de sus códigos (-1 si falta)
+def format_dates(labels, codes):
+    return labels.take(np.where(codes < 0, len(labels) - 1, codes))
+
+
+# Función para calcular los KPI de todas las estaciones por columnas completas
+def compute_kpis(data, stations=STATIONS):
+    n = len(data)
+    k = len(stations)
+    if k == 0:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    # Cada columna de fecha se convierte una sola vez, aunque varias estaciones la usen
+    date_cols = list(dict.fromkeys(col for pair in stations.values() for col in pair))
+    days = {col: as_datetime(data[col]).to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+            for col in date_cols}
+
+    # Tabla común de días distintos para formatear y obtener el año de cada fecha
+    all_days = np.unique(np.concatenate([d[~np.isnat(d)] for d in days.values()]))
+    day_codes = {}
+    for col, d in days.items():
+        codes = np.searchsorted(all_days, d)
+        codes[np.isnat(d)] = -1
+        day_codes[col] = codes
+    day_years = all_days.astype('datetime64[Y]').astype('int64') + 1970
+    labels = date_labels(all_days)
+
+    kpi = np.empty((n, k), dtype='float64')
+    end_codes = np.empty((n, k), dtype='int64')
+    start_codes = np.empty((n, k), dtype='int64')
+    for j, (start_col, end_col) in enumerate(stations.values()):
+        kpi[:, j] = kpi_months(days[end_col], days[start_col])
+        end_codes[:, j] = day_codes[end_col]
+        start_codes[:, j] = day_codes[start_col]
+
+    # Resultado en formato largo: una fila por operación y estación, en el orden original
+    end_codes = end_codes.ravel()
+    # Sin fecha de fin el año es 0 (solo se indexan los códigos válidos: all_days puede estar vacío)
+    years = np.zeros(len(end_codes), dtype='int64')
+    years[end_codes >= 0] = day_years[end_codes[end_codes >= 0]]
+    rows = np.repeat(np.arange(n), k)
+    # Las columnas de estación son categóricas: k etiquetas repetidas n veces
+    names = list(stations)
+    first_words = [name.split()[0] for name in names]
+    station_codes = np.tile(np.arange(k), n)
+    kpi = kpi.ravel()
+    results_df = pd.DataFrame({
+        'ESTACIONES': pd.Categorical(first_words)[station_codes],
+        'ANO': pd.arrays.IntegerArray(years, end_codes < 0),
+        'PAIS': data['Pais'].array.take(rows),
+        'CODIGO': data['NoOperacion'].array.take(rows),
+        'APODO': data['Alias'].array.take(rows),
+        'Indicador_Principal': format_dates(labels, end_codes),
+        'Indicador_Secundario': format_dates(labels, start_codes.ravel()),
+        'TIPO_DE_KPI': pd.Categorical.from_codes(station_codes, names),
+        'KPI': kpi,
+        'Productividad': productivity_band(kpi)
+    })
+
+    # Mantener solo las filas donde el KPI es mayor a 0
+    return results_df[results_df['KPI'] > 0]
@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from eficiencia import paralelo
+from eficiencia.carga import SHEET_SOURCES, resolve_source
+from eficiencia.esquema import concat_typed
+from eficiencia.fechas import parse_dates
+from eficiencia.kpi import STATION_REGISTRY, STATIONS
+from eficiencia.pipeline import build_tables, project_keys
+
+SHEETS = ['proyectos', 'operaciones', 'desembolsos']
+# Criterios de partición: columna de la que sale la etiqueta de cada operación
+SHARD_COLUMNS = {'pais': 'Pais', 'ano': 'APROBACIÓN'}
+FORMATS = ['parquet', 'csv']
+# Etiqueta de las operaciones sin valor en la columna de partición
+NO_VALUE = 'sin-valor'
+
+
+# Función para encontrar el archivo de una hoja en la carpeta de una instantánea: <hoja>.parquet,
+# <hoja>.csv o el nombre de la copia de Google Sheets (gid-<gid>.csv, como en EFICIENCIA_SOURCE_DIR)
+def sheet_path(folder, name):
+    for path in (os.path.join(folder, f"{name}.parquet"), os.path.join(folder, f"{name}.csv"),
+                 resolve_source(SHEET_SOURCES[name], folder)):
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No se encontró la hoja {name} en {folder}")
+
+
+# Función para leer una hoja como la leen las páginas (CSV con los tipos inferidos) o desde Parquet
+def read_sheet(path):
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path, header=0, low_memory=False)
+
+
+# Función para obtener la etiqueta de partición de cada operación: su país o el año de aprobación de
+# su proyecto (así todas las operaciones de un proyecto quedan en la misma parte)
+def operation_labels(data, data_operaciones, by):
+    if by == 'pais':
+        labels = data_operaciones['Pais'].astype(object)
+    else:
+        years = parse_dates(data[SHARD_COLUMNS['ano']]).dt.year.astype('Int64').astype(object)
+        by_project = pd.Series(years.to_numpy(), index=project_keys(data).to_numpy())
+        by_project = by_project[~by_project.index.duplicated()]
+        labels = data_operaciones['NoProyecto'].map(by_project)
+    return labels.where(labels.notna(), NO_VALUE).astype(str)
+
+
+# Función para dividir las tres hojas en partes por operación: cada parte tiene sus operaciones, los
+# proyectos a los que pertenecen y sus desembolsos. La unión de las partes da las mismas filas que
+# la tabla completa, porque cada fila de la unión corresponde a una sola operación.
+def split_sources(data, data_operaciones, data_desembolsos, by):
+    if by is None:
+        yield 'todo', (data, data_operaciones, data_desembolsos)
+        return
+    labels = operation_labels(data, data_operaciones, by)
+    keys = project_keys(data)
+    for label in sorted(labels.unique()):
+        operations = data_operaciones[(labels == label).to_numpy()]
+        projects = data[keys.isin(operations['NoProyecto']).to_numpy()]
+        disbursements = data_desembolsos[data_desembolsos['NoOperacion'].isin(operations['NoOperacion']).to_numpy()]
+        yield label, (projects, operations, disbursements)
+
+
+# Función que inicia cada proceso del lote: procesos para interpretar fechas dentro de ese proceso
+# (1: los procesos del lote ya reparten el trabajo, sin grupos de procesos anidados)
+def _init_worker(date_workers):
+    paralelo.DATE_WORKERS = date_workers
+
+
+# Función que corre en cada proceso: lee una instantánea y escribe sus partes en Feather sin
+# compresión, para que cada parte se lea mapeada en memoria sin pasar por el proceso principal.
+# Devuelve las carpetas de las partes.
+def split_snapshot(folder, by, work_dir):
+    sheets = [read_sheet(sheet_path(folder, name)) for name in SHEETS]
+    parts = []
+    for i, (label, frames) in enumerate(split_sources(*sheets, by)):
+        if frames[1].empty:
+            continue
+        part_dir = os.path.join(work_dir, f"{i:05d}")
+        os.makedirs(part_dir, exist_ok=True)
+        for name, frame in zip(SHEETS, frames):
+            feather.write_feather(frame.reset_index(drop=True), os.path.join(part_dir, f"{name}.feather"),
+                                  compression='uncompressed')
+        parts.append(part_dir)
+    return parts
+
+
+# Función que corre en cada proceso: calcula la tabla de KPI de una parte y la guarda en Parquet
+def run_part(part_dir, stations):
+    start = time.perf_counter()
+    sheets = [feather.read_table(os.path.join(part_dir, f"{name}.feather"), memory_map=True).to_pandas()
+              for name in SHEETS]
+    _, results_df = build_tables(*sheets, stations=stations)
+    path = os.path.join(part_dir, 'kpi.parquet')
+    results_df.to_parquet(path, index=False)
+    return path, len(results_df), time.perf_counter() - start
+
+
+# Función para escribir la tabla de KPI de una instantánea
+def write_results(results_df, path, output_format):
+    if output_format == 'csv':
+        results_df.to_csv(path, index=False)
+    else:
+        results_df.to_parquet(path, index=False)
+
+
+# Función para procesar instantáneas (carpetas con las tres hojas) fuera de Streamlit: cada instantánea
+# se divide en partes (por país, por año o ninguna) que se calculan en paralelo en workers procesos, y
+# las partes se unen en una tabla de KPI por instantánea, <output>/<instantánea>.<formato>.
+# date_workers son los procesos para interpretar fechas dentro de cada proceso del lote.
+# Devuelve el resumen que también se guarda en <output>/manifest.json.
+def run_batch(folders, output, by=None, stations=STATIONS, workers=None, output_format='parquet',
+              date_workers=1):
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output, exist_ok=True)
+    names = [os.path.basename(os.path.normpath(folder)) for folder in folders]
+    if len(set(names)) != len(names):
+        raise ValueError("Las instantáneas deben tener nombres de carpeta distintos")
+    work_dir = tempfile.mkdtemp(dir=output, prefix='.partes-')
+    summary = {'shard': by, 'stations': list(stations), 'workers': workers, 'snapshots': {}}
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'),
+                                 initializer=_init_worker, initargs=(date_workers,)) as pool:
+            split = [
+                pool.submit(split_snapshot, folder, by, os.path.join(work_dir, str(i)))
+                for i, folder in enumerate(folders)
+            ]
+            runs = {
+                name: [pool.submit(run_part, part_dir, stations) for part_dir in future.result()]
+                for name, future in zip(names, split)
+            }
+            for name, futures in runs.items():
+                parts = [future.result() for future in futures]
+                frames = [pd.read_parquet(path) for path, _, _ in parts]
+                results_df = concat_typed(frames) if frames else pd.DataFrame()
+                path = os.path.join(output, f"{name}.{output_format}")
+                write_results(results_df, path, output_format)
+                summary['snapshots'][name] = {
+                    'file': os.path.basename(path),
+                    'rows': len(results_df),
+                    'parts': len(parts),
+                    'part_seconds': float(np.sum([seconds for _, _, seconds in parts]))
+                }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    summary['seconds'] = time.perf_counter() - start
+    with open(os.path.join(output, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Calcula la tabla de KPI de la página 0 desde archivos locales, sin Streamlit'
+    )
+    parser.add_argument('snapshots', nargs='+',
+                        help='carpetas con proyectos, operaciones y desembolsos (.parquet, .csv o gid-<gid>.csv)')
+    parser.add_argument('--output', required=True, help='carpeta de salida')
+    parser.add_argument('--shard', choices=list(SHARD_COLUMNS), help='partición de cada instantánea')
+    parser.add_argument('--workers', type=int, help='procesos (por defecto, los núcleos del equipo)')
+    parser.add_argument('--format', choices=FORMATS, default='parquet', help='formato de salida')
+    parser.add_argument('--date-workers', type=int, default=1,
+                        help='procesos para interpretar fechas dentro de cada proceso del lote')
+    parser.add_argument('--stations', nargs='+', choices=list(STATION_REGISTRY), default=list(STATIONS),
+                        help='estaciones a calcular')
+    args = parser.parse_args()
+    summary = run_batch(
+        args.snapshots, args.output, args.shard, {name: STATION_REGISTRY[name] for name in args.stations},
+        args.workers, args.format, args.date_workers
+    )
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
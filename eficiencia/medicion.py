@@ -0,0 +1,199 @@
+import contextvars
+import cProfile
+import io
+import json
+import marshal
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Muestra el panel de depuración en todas las sesiones (también se activa con ?debug=1)
+DEBUG = os.environ.get('EFICIENCIA_DEBUG', '') not in ('', '0')
+# Archivo opcional donde se agregan las mediciones de cada ejecución como líneas JSON
+METRICS_FILE = os.environ.get('EFICIENCIA_METRICS_FILE')
+
+# Medición activa en el hilo de la sesión (None si no se está midiendo)
+_current = contextvars.ContextVar('eficiencia_medicion', default=None)
+_file_lock = threading.Lock()
+# Mediciones que usan tracemalloc a la vez; se detiene cuando termina la última
+_tracing = {'users': 0, 'started': False}
+_tracing_lock = threading.Lock()
+
+
+# Función para obtener la cantidad de filas de una tabla o de una tupla de tablas (None si no aplica)
+def count_rows(value):
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (tuple, list)):
+        counts = [count for count in map(count_rows, value) if count is not None]
+        return sum(counts) if counts else None
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+class _Stage:
+    """Etapa en curso; rows_out se completa dentro del bloque."""
+
+    def __init__(self, name, rows_in):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+
+
+class StageRecorder:
+    """Tiempo, filas de entrada y salida y memoria máxima de cada etapa de una ejecución de página."""
+
+    def __init__(self, page, track_memory=False):
+        self.page = page
+        self.track_memory = track_memory
+        self.records = []
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        current = _Stage(name, count_rows(rows_in) if rows_in is not None else None)
+        # tracemalloc es global al proceso: con varias sesiones a la vez el pico incluye las demás
+        if self.track_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield current
+        finally:
+            seconds = time.perf_counter() - start
+            peak = max(tracemalloc.get_traced_memory()[1] - base, 0) if self.track_memory else None
+            self.records.append({
+                'page': self.page,
+                'stage': name,
+                'seconds': seconds,
+                'rows_in': current.rows_in,
+                'rows_out': current.rows_out,
+                'peak_bytes': peak,
+                'started_at': self.started_at
+            })
+
+    def mark(self, name):
+        """Registra un hito: segundos desde el inicio de la ejecución (p. ej. hasta la primera tabla visible)."""
+        self.records.append({
+            'page': self.page,
+            'stage': name,
+            'seconds': time.perf_counter() - self._start,
+            'rows_in': None,
+            'rows_out': None,
+            'peak_bytes': None,
+            'started_at': self.started_at
+        })
+
+    @contextmanager
+    def activate(self):
+        """Hace que stage() de este módulo registre en esta medición durante el bloque."""
+        token = _current.set(self)
+        if self.track_memory:
+            _start_tracing()
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+            if self.track_memory:
+                _stop_tracing()
+            if METRICS_FILE:
+                self.append_to(METRICS_FILE)
+
+    def to_jsonl(self):
+        return ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in self.records)
+
+    def to_prometheus(self):
+        """Mediciones en el formato de texto de Prometheus, una métrica por campo.
+
+        Las etapas que se repiten en la ejecución se suman (la memoria máxima se toma como máximo).
+        """
+        metrics = [
+            ('seconds', 'eficiencia_stage_seconds', 'Duración de la etapa en segundos', sum),
+            ('rows_in', 'eficiencia_stage_rows_in', 'Filas de entrada de la etapa', sum),
+            ('rows_out', 'eficiencia_stage_rows_out', 'Filas de salida de la etapa', sum),
+            ('peak_bytes', 'eficiencia_stage_peak_bytes', 'Memoria máxima asignada durante la etapa', max),
+        ]
+        lines = []
+        for field, metric, description, combine in metrics:
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} gauge"]
+            values = {}
+            for record in self.records:
+                if record[field] is not None:
+                    values.setdefault(record['stage'], []).append(record[field])
+            for name, stage_values in values.items():
+                lines.append(f'{metric}{{page="{self.page}",stage="{name}"}} {combine(stage_values)}')
+        return '\n'.join(lines) + '\n'
+
+    def append_to(self, path):
+        with _file_lock, open(path, 'a', encoding='utf-8') as f:
+            f.write(self.to_jsonl())
+
+
+# Función para iniciar tracemalloc si ninguna otra medición lo está usando
+def _start_tracing():
+    with _tracing_lock:
+        if _tracing['users'] == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing['started'] = True
+        _tracing['users'] += 1
+
+
+# Función para detener tracemalloc al terminar la última medición que lo usa (si se inició aquí)
+def _stop_tracing():
+    with _tracing_lock:
+        _tracing['users'] -= 1
+        if _tracing['users'] == 0 and _tracing['started']:
+            tracemalloc.stop()
+            _tracing['started'] = False
+
+
+# Función para medir una etapa en la medición activa de la sesión; sin medición activa no hace nada
+@contextmanager
+def stage(name, rows_in=None):
+    recorder = _current.get()
+    if recorder is None:
+        yield _Stage(name, None)
+        return
+    with recorder.stage(name, rows_in) as current:
+        yield current
+
+
+# Función para registrar un hito en la medición activa de la sesión; sin medición activa no hace nada
+def mark(name):
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.mark(name)
+
+
+# Función para perfilar un bloque con cProfile. Devuelve un diccionario que, al terminar el bloque,
+# tiene el resumen en texto ('text') y el perfil binario para pstats/snakeviz ('data').
+@contextmanager
+def profile(enabled=True, limit=30):
+    result = {}
+    if not enabled:
+        yield result
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Desde Python 3.12 solo puede haber un perfilador activo en el proceso
+        result['error'] = str(e)
+        yield result
+        return
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(limit)
+        result['text'] = text.getvalue()
+        # Mismo formato binario que `python -m cProfile -o`
+        profiler.create_stats()
+        result['data'] = marshal.dumps(profiler.stats)
@@ -0,0 +1,124 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+PAGE_SIZES = [25, 50, 100, 500]
+
+
+class PagedView:
+    """Vista de una tabla que filtra y ordena por posiciones y entrega solo la página visible.
+
+    Los órdenes y filtros ya calculados se recuerdan, así que cambiar de página o de tamaño de
+    página no vuelve a recorrer la tabla.
+    """
+
+    def __init__(self, frame, maxsize=16):
+        # Referencia débil: la vista no mantiene viva a la tabla
+        self._frame = weakref.ref(frame)
+        self.maxsize = maxsize
+        self._orders = OrderedDict()
+        self._masks = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def frame(self):
+        return self._frame()
+
+    def _remember(self, store, key, build):
+        with self._lock:
+            if key in store:
+                store.move_to_end(key)
+                return store[key]
+        value = build()
+        with self._lock:
+            store[key] = value
+            while len(store) > self.maxsize:
+                store.popitem(last=False)
+        return value
+
+    def _order(self, sort_by, ascending):
+        if sort_by is None:
+            return np.arange(len(self.frame))
+        # Orden estable con los vacíos al final; las categóricas se ordenan por sus categorías
+        column = self.frame[sort_by].reset_index(drop=True)
+        return self._remember(self._orders, (sort_by, ascending), lambda: column.sort_values(
+            ascending=ascending, na_position='last', kind='stable'
+        ).index.to_numpy())
+
+    def _mask(self, column, condition):
+        kind, value = condition
+        if kind == 'in':
+            return self.frame[column].isin(value).to_numpy(dtype=bool)
+        # Búsqueda de texto sin distinguir mayúsculas
+        text = self.frame[column].astype('string')
+        return text.str.contains(value, case=False, regex=False).fillna(False).to_numpy(dtype=bool)
+
+    def positions(self, filters=None, sort_by=None, ascending=True):
+        """Posiciones de las filas que cumplen los filtros, en el orden pedido.
+
+        filters es un diccionario columna → lista de valores aceptados o texto a buscar.
+        """
+        order = self._order(sort_by, ascending)
+        conditions = _conditions(filters)
+        if not conditions:
+            return order
+        mask = np.ones(len(self.frame), dtype=bool)
+        for column, condition in conditions:
+            mask &= self._remember(self._masks, (column, condition), lambda: self._mask(column, condition))
+        return order[mask[order]]
+
+    def window(self, filters=None, sort_by=None, ascending=True, page=1, page_size=PAGE_SIZES[0]):
+        """Devuelve la página pedida (solo esas filas) y un resumen con las cantidades de filas."""
+        positions = self.positions(filters, sort_by, ascending)
+        pages = max(-(-len(positions) // page_size), 1)
+        page = min(max(page, 1), pages)
+        start = (page - 1) * page_size
+        rows = positions[start:start + page_size]
+        summary = {
+            'total': len(self.frame),
+            'filtered': len(positions),
+            'page': page,
+            'pages': pages,
+            'first': start + 1 if len(rows) else 0,
+            'last': start + len(rows)
+        }
+        return self.frame.iloc[rows], summary
+
+    def counts(self, column, filters=None):
+        """Cantidad de filas por valor de una columna, entre las filas que cumplen los filtros."""
+        positions = self.positions(filters)
+        values = self.frame[column].iloc[positions]
+        return values.value_counts(dropna=False, sort=False).rename('filas')
+
+
+# Función para normalizar los filtros a una tupla ordenada de condiciones (hashables, sin vacíos)
+def _conditions(filters):
+    conditions = []
+    for column, value in sorted((filters or {}).items()):
+        if isinstance(value, str):
+            if value.strip():
+                conditions.append((column, ('text', value.strip())))
+        elif value:
+            conditions.append((column, ('in', tuple(value))))
+    return tuple(conditions)
+
+
+# Vistas por tabla, mientras la tabla exista (las tablas compartidas se reutilizan entre ejecuciones)
+_views = {}
+_views_lock = threading.Lock()
+
+
+# Función para obtener la vista paginada de una tabla, reutilizando la de ejecuciones anteriores
+def paged_view(frame):
+    key = id(frame)
+    with _views_lock:
+        entry = _views.get(key)
+        if entry is not None and entry[0]() is frame:
+            return entry[1]
+        view = PagedView(frame)
+        _views[key] = (weakref.ref(frame), view)
+        # Al liberarse la tabla se descarta su vista
+        weakref.finalize(frame, _views.pop, key, None)
+        return view
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from eficiencia.fechas import ParseCache, _parse_text, parse_cache
+
+# Procesos para interpretar fechas en paralelo (1 = siempre en serie)
+DATE_WORKERS = int(os.environ.get('EFICIENCIA_DATE_WORKERS', os.cpu_count() or 1))
+# Cantidad mínima de textos distintos sin interpretar para repartirlos entre procesos; por debajo
+# el costo de repartir supera lo que se gana y se interpretan en serie
+PARALLEL_MIN_VALUES = int(os.environ.get('EFICIENCIA_PARALLEL_MIN_VALUES', 20_000))
+# Carpeta de los archivos compartidos con los procesos (en memoria si el sistema tiene /dev/shm)
+SHARED_DIR = os.environ.get('EFICIENCIA_SHARED_DIR', '/dev/shm' if os.path.isdir('/dev/shm') else None)
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+# Función para obtener el grupo de procesos compartido (se crea la primera vez y se reutiliza).
+# Los procesos se inician con spawn: el servidor de Streamlit tiene hilos y fork no es seguro.
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+# Función para cerrar el grupo de procesos
+def shutdown_pool(wait=True):
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait)
+            _pool = None
+
+
+# Función que corre en cada proceso: lee su tramo de textos del archivo Arrow mapeado en memoria y
+# escribe las fechas (datetime64[ns] como int64) en su tramo del arreglo de salida, también mapeado.
+# Solo viajan entre procesos las rutas y los límites del tramo.
+def _parse_shard(input_path, output_path, size, start, stop):
+    with pa.memory_map(input_path) as source:
+        texts = pa.ipc.open_file(source).read_all().column(0).slice(start, stop - start)
+        values = texts.to_numpy(zero_copy_only=False)
+    output = np.memmap(output_path, dtype='int64', mode='r+', shape=(size,))
+    output[start:stop] = _parse_text(values).view('int64')
+    output.flush()
+    del output
+    return stop - start
+
+
+# Función para interpretar un arreglo de textos distintos repartiéndolo en tramos entre procesos
+def _parse_parallel(values, workers):
+    size = len(values)
+    bounds = np.linspace(0, size, min(workers, size) + 1, dtype=int)
+    with tempfile.TemporaryDirectory(dir=SHARED_DIR, prefix='eficiencia-fechas-') as folder:
+        input_path = os.path.join(folder, 'textos.arrow')
+        output_path = os.path.join(folder, 'fechas.bin')
+        table = pa.table({'texto': pa.array(values, type=pa.string())})
+        with pa.OSFile(input_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        output = np.memmap(output_path, dtype='int64', mode='w+', shape=(size,))
+        del output
+        pool = _get_pool(workers)
+        futures = [
+            pool.submit(_parse_shard, input_path, output_path, size, start, stop)
+            for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+        ]
+        for future in futures:
+            future.result()
+        output = np.memmap(output_path, dtype='int64', mode='r', shape=(size,))
+        result = np.array(output).view('datetime64[ns]')
+        del output
+    return result
+
+
+# Función para interpretar de una vez los textos distintos de varias columnas de fechas. Los textos
+# que no están en la caché se interpretan en paralelo si son al menos min_values y hay más de un
+# proceso (workers, por defecto DATE_WORKERS al momento de la llamada); si no, en serie como en
+# parse_dates. Devuelve los textos distintos y sus fechas (NaT si no se pudieron interpretar).
+def parse_distinct(columns, cache=None, workers=None, min_values=PARALLEL_MIN_VALUES):
+    cache = parse_cache if cache is None else cache
+    workers = DATE_WORKERS if workers is None else workers
+    texts = [
+        np.asarray(column.dropna().unique(), dtype=object)
+        for column in columns if not pd.api.types.is_datetime64_any_dtype(column)
+    ]
+    values = pd.unique(np.concatenate(texts)) if texts else np.empty(0, dtype=object)
+    values = values[np.fromiter((isinstance(value, str) for value in values), dtype=bool, count=len(values))]
+    result, missing = cache.lookup(values)
+    if missing.any():
+        pending = values[missing]
+        parsed = None
+        if workers > 1 and len(pending) >= min_values:
+            try:
+                parsed = _parse_parallel(pending, workers)
+            except BrokenProcessPool:
+                # Un proceso terminó de forma abrupta: se descarta el grupo y se sigue en serie
+                shutdown_pool(wait=False)
+        if parsed is None:
+            parsed = _parse_text(pending)
+        result[missing] = parsed
+        cache.store(pending, parsed)
+    return values, result
+
+
+# Función para obtener una caché con todos los textos de esas columnas ya interpretados (con
+# parse_distinct), para pasarla a parse_dates o normalize_dates, que así no interpretan nada más
+def date_cache(columns, cache=None, workers=None, min_values=PARALLEL_MIN_VALUES):
+    values, dates = parse_distinct(columns, cache, workers, min_values)
+    batch = ParseCache(maxsize=len(values))
+    batch.store(values, dates)
+    return batch
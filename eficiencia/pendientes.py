@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+
+from eficiencia.compartido import result_cache
+from eficiencia.cubo import _combine, _encode
+from eficiencia.kpi import STATIONS, as_datetime
+
+# Dimensiones de los pendientes: la estación y, desde la tabla filtrada, país y SEC de cada operación
+FIELD_COLUMNS = {'PAIS': 'Pais', 'SEC': 'SEC'}
+# Día faltante (sin fecha de inicio o de fin), mayor que cualquier día
+NO_DAY = np.iinfo('int64').max
+
+
+# Función para obtener, por operación, el día más temprano de una columna de fechas entre sus filas
+# (la tabla filtrada tiene una fila por desembolso); NO_DAY si la operación no tiene fecha
+def earliest_days(column, operations, n_operations):
+    days = as_datetime(column).to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+    values = np.where(np.isnat(days), NO_DAY, days.astype('int64'))
+    result = np.full(n_operations, NO_DAY, dtype='int64')
+    valid = operations >= 0
+    np.minimum.at(result, operations[valid], values[valid])
+    return result
+
+
+# Función para obtener las fechas pedidas como días (datetime64[D])
+def as_days(dates):
+    return pd.DatetimeIndex(np.atleast_1d(pd.to_datetime(dates))).to_numpy().astype('datetime64[D]')
+
+
+class BacklogIndex:
+    """Intervalos en estación de cada operación, ordenados para contar pendientes a cualquier fecha.
+
+    Una operación está en una estación desde su fecha de inicio (incluida) hasta la de fin (excluida);
+    con inicio y sin fin sigue en la estación (open_ended). Los inicios y los fines se guardan
+    ordenados como enteros celda * rango + día, donde la celda es la combinación de estación, país y
+    SEC: los pendientes de una celda a una fecha son los inicios hasta esa fecha menos los fines, y
+    los de todas las celdas a todas las fechas salen de dos búsquedas binarias, sin recorrer las filas.
+    """
+
+    def __init__(self, filtered_df, stations=STATIONS, open_ended=True):
+        operations, uniques = pd.factorize(filtered_df['NoOperacion'])
+        operations = operations.astype('int64')
+        n_operations = len(uniques)
+        # Primera fila de cada operación, de la que salen su país y su SEC
+        first = np.full(n_operations, len(operations), dtype='int64')
+        valid = operations >= 0
+        np.minimum.at(first, operations[valid], np.flatnonzero(valid))
+
+        fields = {dim: col for dim, col in FIELD_COLUMNS.items() if col in filtered_df}
+        encoded = [_encode(filtered_df[col].iloc[first].reset_index(drop=True)) for col in fields.values()]
+        self.dimensions = ['ESTACION'] + list(fields)
+        self.levels = {'ESTACION': pd.Index(list(stations), dtype=object)}
+        self.levels.update({dim: levels for dim, (_, levels) in zip(fields, encoded)})
+        codes = [c for c, _ in encoded]
+        field_cell = _combine(codes)
+        n_fields = int(field_cell.max()) + 1 if len(field_cell) else 0
+        field_first = np.unique(field_cell, return_index=True)[1]
+
+        # Intervalos válidos de cada estación (con inicio y, si tienen fin, posterior al inicio)
+        cells, starts, ends = [], [], []
+        for j, (start_col, end_col) in enumerate(stations.values()):
+            start = earliest_days(filtered_df[start_col], operations, n_operations)
+            end = earliest_days(filtered_df[end_col], operations, n_operations)
+            closed = end != NO_DAY
+            keep = (start != NO_DAY) & ((end > start) if open_ended else (closed & (end > start)))
+            cells.append(j * n_fields + field_cell[keep])
+            starts.append(start[keep])
+            ends.append(end[keep])
+        cell = np.concatenate(cells) if cells else np.array([], dtype='int64')
+        start = np.concatenate(starts) if starts else np.array([], dtype='int64')
+        end = np.concatenate(ends) if ends else np.array([], dtype='int64')
+        closed = end != NO_DAY
+
+        # Días relativos al primero; el rango deja libre el día -1 de cada celda (fechas anteriores)
+        days = np.concatenate([start, end[closed]])
+        self.origin = int(days.min()) if len(days) else 0
+        last = int(days.max()) if len(days) else 0
+        self.span = last - self.origin + 2
+        self.start_keys = np.sort(cell * self.span + (start - self.origin))
+        self.end_keys = np.sort(cell[closed] * self.span + (end[closed] - self.origin))
+        self.first_day = np.datetime64(self.origin, 'D')
+        self.last_day = np.datetime64(last, 'D')
+
+        # Niveles de cada celda, una fila por dimensión
+        n_cells = len(stations) * n_fields
+        self.cell_codes = np.stack(
+            [np.repeat(np.arange(len(stations)), n_fields)] +
+            [np.tile(c[field_first], len(stations)) for c in codes]
+        ).astype('int32') if n_cells else np.zeros((len(self.dimensions), 0), dtype='int32')
+
+    @property
+    def nbytes(self):
+        return self.start_keys.nbytes + self.end_keys.nbytes + self.cell_codes.nbytes
+
+    def __len__(self):
+        return self.cell_codes.shape[1]
+
+    def _cell_mask(self, filters):
+        mask = np.ones(len(self), dtype=bool)
+        for dim, wanted in (filters or {}).items():
+            if not wanted:
+                continue
+            codes = np.flatnonzero(self.levels[dim].isin(list(wanted)))
+            mask &= np.isin(self.cell_codes[self.dimensions.index(dim)], codes)
+        return mask
+
+    def counts(self, cells, dates):
+        """Operaciones en estación de cada celda (filas) a cada fecha (columnas)."""
+        offsets = np.clip(as_days(dates).astype('int64') - self.origin, -1, self.span - 2)
+        base = cells.astype('int64')[:, None] * self.span
+        keys = base + offsets[None, :]
+        started = np.searchsorted(self.start_keys, keys, 'right') - np.searchsorted(self.start_keys, base, 'left')
+        ended = np.searchsorted(self.end_keys, keys, 'right') - np.searchsorted(self.end_keys, base, 'left')
+        return started - ended
+
+    def query(self, dates, group_by=('ESTACION',), filters=None):
+        """Operaciones en estación a cada fecha, agrupadas por group_by, solo para las celdas que
+        cumplen los filtros (diccionario dimensión → lista de niveles aceptados).
+
+        Devuelve una fila por grupo y fecha con la cantidad de operaciones.
+        """
+        dates = as_days(dates)
+        cells = np.flatnonzero(self._cell_mask(filters))
+        group_by = list(group_by)
+        dim_rows = [self.dimensions.index(dim) for dim in group_by]
+        if group_by:
+            group = _combine([self.cell_codes[i][cells].astype('int64') for i in dim_rows])
+        else:
+            group = np.zeros(len(cells), dtype='int64')
+        groups = int(group.max()) + 1 if len(group) else 0
+        totals = np.zeros((groups, len(dates)), dtype='int64')
+        np.add.at(totals, group, self.counts(cells, dates))
+
+        result = {}
+        if group_by:
+            first = np.unique(group, return_index=True)[1]
+            # Grupos en el orden de los niveles de cada dimensión
+            keys = [self.cell_codes[i][cells][first] for i in dim_rows]
+            order = np.lexsort(keys[::-1])
+            totals = totals[order]
+            for dim, codes in zip(group_by, keys):
+                result[dim] = np.repeat(self.levels[dim].take(codes[order]), len(dates))
+        result['fecha'] = np.tile(dates.astype('datetime64[ns]'), len(totals))
+        result['operaciones'] = totals.ravel()
+        return pd.DataFrame(result)
+
+    def monthly(self, group_by=('ESTACION',), filters=None, start=None, end=None):
+        """Serie mensual de operaciones en estación (al último día de cada mes) entre start y end,
+        por defecto desde el primer inicio hasta el último día con un inicio o un fin."""
+        start = pd.Timestamp(start if start is not None else self.first_day)
+        end = pd.Timestamp(end if end is not None else self.last_day)
+        dates = pd.date_range(start, end + pd.offsets.MonthEnd(0), freq='ME')
+        return self.query(dates, group_by, filters)
+
+
+# Función para obtener el índice de pendientes compartido por todas las sesiones; solo se reconstruye
+# cuando cambia la versión de alguna de las hojas (versions es la de eficiencia.pipeline.source_versions,
+# más las estaciones elegidas)
+def shared_backlog(filtered_df, stations, versions, cache=result_cache):
+    return cache.get(('pendientes',) + tuple(versions), lambda: BacklogIndex(filtered_df, stations))
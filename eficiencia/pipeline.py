@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+from eficiencia.esquema import apply_schema
+from eficiencia.fechas import parse_dates
+from eficiencia.kpi import STATIONS, compute_kpis
+from eficiencia.medicion import stage
+from eficiencia.paralelo import date_cache
+from eficiencia.uniones import indexed_merge, merged_version
+
+# Columnas de fecha de la hoja de proyectos
+PROJECT_DATE_COLUMNS = ['ABSTRACTO', 'CARTA CONSULTA', 'PERFIL', 'PROPUESTA OPERATIVA', 'ACTA NEGOCIACION', 'APROBACIÓN']
+# Columnas de fecha que llegan de las hojas de operaciones y desembolsos
+OPERATION_DATE_COLUMNS = ['FechaVigencia', 'FechaElegibilidad', 'FechaEfectiva']
+
+# Columnas que se conservan de la unión de las tres hojas
+SELECTED_COLUMNS = [
+    'NoProyecto', 'NoOperacion', 'Pais', 'Alias', 'SEC', 'ARE',
+    'CARTA CONSULTA', 'APROBACIÓN', 'PERFIL', 'PROPUESTA OPERATIVA',
+    'FechaVigencia', 'FechaElegibilidad', 'FechaEfectiva', 'Estado_x'
+]
+
+
+# Función para obtener la clave de proyecto (NÚMERO sin guiones) de la hoja de proyectos
+def project_keys(data):
+    return data['NÚMERO'].str.replace('-', '', regex=False)
+
+
+# Función para obtener la posición de cada operación en la hoja de operaciones (la primera, si se repite)
+def operation_positions(data_operaciones):
+    positions = pd.Series(np.arange(len(data_operaciones)), index=data_operaciones['NoOperacion'].to_numpy())
+    return positions[~positions.index.duplicated()]
+
+
+# Función para obtener el orden de las filas de una tabla según la posición de su operación (key_col)
+# en la hoja de operaciones; el orden es estable y las operaciones que no están en la hoja van al final
+def operation_order(frame, key_col, positions):
+    ranks = positions.reindex(frame[key_col]).to_numpy(dtype='float64', na_value=np.inf)
+    return np.argsort(ranks, kind='stable')
+
+
+# Función para convertir las fechas a datetime64 y normalizar las claves de la hoja de proyectos
+# (sin modificar la original)
+def prepare_projects(data):
+    with stage('fechas', rows_in=data) as current:
+        dates = date_cache([data[col] for col in PROJECT_DATE_COLUMNS])
+        data = data.assign(**{col: parse_dates(data[col], dates) for col in PROJECT_DATE_COLUMNS})
+        current.rows_out = len(data)
+    data['NO. OPERACION'] = data['NO. OPERACION'].str.replace('-', '', regex=False)
+    data['NÚMERO'] = project_keys(data)
+    return data.rename(columns={'NÚMERO': 'NoProyecto', 'NO.OPERACION': 'NoOperacion'})
+
+
+# Función para unir las tres hojas. versions son las versiones (hash de la copia local) de
+# proyectos, operaciones y desembolsos; si se conocen, los índices y planes de unión se reutilizan.
+# Devuelve la tabla unida y el diagnóstico de cada unión.
+def merge_sources(data, data_operaciones, data_desembolsos, how='inner', versions=(None, None, None)):
+    projects_version, operations_version, disbursements_version = versions
+    # La versión de la hoja de proyectos preparada incluye la preparación aplicada
+    projects_version = merged_version('prepare_projects', projects_version, 'NoProyecto', how)
+    data = prepare_projects(data)
+    with stage('union', rows_in=(data, data_operaciones, data_desembolsos)) as current:
+        data_merged, first = indexed_merge(
+            data, data_operaciones, 'NoProyecto', how, projects_version, operations_version
+        )
+        data_merged_total, second = indexed_merge(
+            data_merged, data_desembolsos, 'NoOperacion', how,
+            merged_version(projects_version, operations_version, 'NoProyecto', how), disbursements_version
+        )
+        current.rows_out = len(data_merged_total)
+    return data_merged_total, [first, second]
+
+
+# Función para unir las tres hojas y conservar las columnas seleccionadas con el esquema de
+# eficiencia.esquema (fechas datetime64, categóricas y claves compactas), con las filas en el orden
+# de las operaciones en su hoja.
+# El diagnóstico de las uniones queda en filtered_df.attrs['joins'].
+def build_filtered(data, data_operaciones, data_desembolsos, how='inner', versions=(None, None, None)):
+    data_merged_total, joins = merge_sources(data, data_operaciones, data_desembolsos, how, versions)
+    with stage('esquema', rows_in=data_merged_total) as current:
+        filtered_df = apply_schema(data_merged_total[SELECTED_COLUMNS])
+        # Filas en el orden de las operaciones, el mismo que mantiene la actualización incremental
+        order = operation_order(filtered_df, 'NoOperacion', operation_positions(data_operaciones))
+        filtered_df = filtered_df.iloc[order].reset_index(drop=True)
+        current.rows_out = len(filtered_df)
+    filtered_df.attrs['joins'] = joins
+    return filtered_df
+
+
+# Función para construir la tabla filtrada y la de KPI a partir de las tres hojas
+def build_tables(data, data_operaciones, data_desembolsos, stations=STATIONS, versions=(None, None, None)):
+    filtered_df = build_filtered(data, data_operaciones, data_desembolsos, versions=versions)
+    with stage('kpi', rows_in=filtered_df) as current:
+        results_df = compute_kpis(filtered_df, stations)
+        current.rows_out = len(results_df)
+    return filtered_df, results_df
+
+
+# Función para obtener las versiones de las tres hojas tal como se cargaron (None si no se conocen)
+def source_versions(data, data_operaciones, data_desembolsos):
+    return tuple(frame.attrs.get('snapshot') for frame in (data, data_operaciones, data_desembolsos))
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+
+from eficiencia.calidad import shared_check_sheets
+from eficiencia.carga import SHEET_SOURCES
+from eficiencia.cubo import shared_cube
+from eficiencia.estaciones import select_kpis
+from eficiencia.exportacion import EXPORT_DIR, export_if_changed, load_sources
+from eficiencia.incremental import shared_refresh
+from eficiencia.kpi import STATIONS
+from eficiencia.pendientes import shared_backlog
+from eficiencia.pipeline import source_versions
+
+# Actualización periódica de las tablas de la página 0 fuera de la ejecución de la página
+BACKGROUND_REFRESH = os.environ.get('EFICIENCIA_BACKGROUND_REFRESH', '') not in ('', '0')
+# Segundos entre actualizaciones
+REFRESH_INTERVAL = float(os.environ.get('EFICIENCIA_REFRESH_INTERVAL', 300))
+# Espera inicial tras un error (se duplica con cada error seguido) y espera máxima
+REFRESH_BACKOFF = float(os.environ.get('EFICIENCIA_REFRESH_BACKOFF', 10))
+REFRESH_MAX_BACKOFF = float(os.environ.get('EFICIENCIA_REFRESH_MAX_BACKOFF', 600))
+
+
+class TableVersion:
+    """Tablas de una actualización completa; una vez publicada no se modifica."""
+
+    def __init__(self, filtered_df, results_df, cube, versions, stats, timings, seconds, anomalies=None):
+        self.filtered_df = filtered_df
+        self.results_df = results_df
+        self.cube = cube
+        self.versions = versions
+        # Resumen de la actualización incremental y tiempos de carga de cada hoja
+        self.stats = stats
+        self.timings = timings
+        self.seconds = seconds
+        # Anomalías de las hojas (eficiencia.calidad.check_sheets)
+        self.anomalies = anomalies
+        self.refreshed_at = time.time()
+
+    @property
+    def age(self):
+        return time.time() - self.refreshed_at
+
+
+# Función para construir una versión de las tablas: revalida las tres hojas (con el TTL ttl; 0
+# consulta siempre la fuente), actualiza la tabla filtrada, calcula el KPI de las estaciones por
+# defecto, el cubo y el índice de pendientes, valida las hojas y exporta para el arranque rápido si
+# las hojas cambiaron
+def build_version(sources=SHEET_SOURCES, cache=None, folder=EXPORT_DIR, ttl=None):
+    start = time.perf_counter()
+    # Sin reintentos: el programador de actualizaciones tiene su propia espera tras un error
+    sheets, timings = load_sources(sources, cache, retries=0, ttl=ttl)
+    versions = source_versions(*sheets)
+    anomalies = shared_check_sheets(*sheets, versions)
+    filtered_df, _, stats = shared_refresh(*sheets)
+    results_df = select_kpis(filtered_df, list(STATIONS), versions)
+    cube = shared_cube(results_df, filtered_df, versions + (tuple(STATIONS),))
+    # Índice de pendientes de las estaciones por defecto, ya listo para la página 0
+    shared_backlog(filtered_df, STATIONS, versions + (tuple(STATIONS),))
+    export_if_changed(filtered_df, results_df, versions, folder, time.perf_counter() - start)
+    return TableVersion(
+        filtered_df, results_df, cube, versions, stats, timings, time.perf_counter() - start, anomalies
+    )
+
+
+class Refresher:
+    """Actualiza las tablas en un hilo aparte cada interval segundos y publica cada versión completa.
+
+    current siempre es la última versión terminada: una actualización en curso o fallida no la
+    modifica, y la nueva versión se publica de una sola vez al terminar. Tras un error se reintenta
+    con espera exponencial (backoff, 2 * backoff, ...) hasta max_backoff.
+    """
+
+    def __init__(self, build=build_version, interval=REFRESH_INTERVAL, backoff=REFRESH_BACKOFF,
+                 max_backoff=REFRESH_MAX_BACKOFF):
+        self.build = build
+        self.interval = interval
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.current = None
+        self.failures = 0
+        self.last_error = None
+        self.last_attempt = None
+        self.next_run = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._published = threading.Condition()
+
+    def start(self):
+        """Inicia el hilo de actualización, si no está en marcha."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, daemon=True, name='refresco')
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def refresh_now(self):
+        """Adelanta la próxima actualización."""
+        self._wake.set()
+
+    def delay(self):
+        """Espera hasta la próxima actualización según el resultado de la última."""
+        if self.failures:
+            return min(self.backoff * 2 ** (self.failures - 1), self.max_backoff)
+        return self.interval
+
+    def run_once(self):
+        """Construye una versión y la publica; devuelve True si terminó sin errores."""
+        self.last_attempt = time.time()
+        try:
+            version = self.build()
+        except Exception as e:
+            self.failures += 1
+            self.last_error = e
+            return False
+        with self._published:
+            self.current = version
+            self._published.notify_all()
+        self.failures = 0
+        self.last_error = None
+        return True
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self.next_run = time.time() + self.delay()
+            self._wake.wait(self.delay())
+            self._wake.clear()
+
+    def wait(self, timeout=None):
+        """Espera a que haya una versión publicada; devuelve la actual (None si se agotó el tiempo)."""
+        with self._published:
+            self._published.wait_for(lambda: self.current is not None, timeout)
+            return self.current
+
+    def status(self):
+        """Antigüedad de la versión actual, duración de la última actualización y errores seguidos."""
+        current = self.current
+        return {
+            'age': current.age if current is not None else None,
+            'seconds': current.seconds if current is not None else None,
+            'failures': self.failures,
+            'error': self.last_error,
+            'next_in': max(self.next_run - time.time(), 0) if self.next_run is not None else None
+        }
+
+
+# TTL de las cargas del programador: cada actualización revalida la copia local compartida con la
+# fuente (condicional: ETag/Last-Modified o hash del contenido)
+POLL_TTL = 0
+
+# Programador compartido por todas las sesiones del proceso
+refresher = Refresher(lambda: build_version(ttl=POLL_TTL))
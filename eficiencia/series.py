@@ -0,0 +1,127 @@
+import hashlib
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from eficiencia.compartido import result_cache
+
+# Puntos máximos que se envían a un gráfico; por encima, cada serie se reduce (al menos 3 puntos por serie)
+CHART_POINTS = int(os.environ.get('EFICIENCIA_CHART_POINTS', 5000))
+# Reducciones disponibles: LTTB (conserva la forma de la serie) o promedio por períodos de varios años
+REDUCTIONS = ['lttb', 'periodo']
+
+
+# Función para obtener la versión de una tabla a partir de su contenido (índice, columnas y valores)
+def frame_version(frame):
+    digest = hashlib.sha1(repr(list(frame.columns)).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+# Función para elegir n puntos de series con Largest-Triangle-Three-Buckets: el primero, el último
+# y, en cada tramo intermedio, el que forma el triángulo de mayor área con el punto elegido del tramo
+# anterior y el promedio del tramo siguiente. y es una serie o una matriz (una serie por fila, con x
+# común); cada tramo se resuelve para todas las series a la vez. Devuelve las posiciones elegidas
+# (una fila por serie si y es una matriz).
+def lttb(x, y, n):
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    size = len(x)
+    if n >= size or n < 3:
+        return np.broadcast_to(np.arange(size), y.shape).copy()
+    matrix = np.atleast_2d(y)
+    rows = np.arange(len(matrix))
+    edges = np.floor(np.linspace(1, size - 1, n - 1)).astype('int64')
+    chosen = np.empty((len(matrix), n), dtype='int64')
+    chosen[:, 0], chosen[:, -1] = 0, size - 1
+    for i in range(n - 2):
+        start, stop = edges[i], max(edges[i + 1], edges[i] + 1)
+        following = slice(stop, edges[i + 2] if i + 2 < len(edges) else size)
+        mean_x, mean_y = x[following].mean(), matrix[:, following].mean(axis=1, keepdims=True)
+        prev_x, prev_y = x[chosen[:, i]][:, None], matrix[rows, chosen[:, i]][:, None]
+        area = np.abs((prev_x - mean_x) * (matrix[:, start:stop] - prev_y)
+                      - (prev_x - x[start:stop]) * (mean_y - prev_y))
+        chosen[:, i + 1] = start + np.argmax(area, axis=1)
+    return chosen if y.ndim > 1 else chosen[0]
+
+
+class RegionSeries:
+    """Series de cada región en formato largo (región, año, valor), ya escaladas y ordenadas por región.
+
+    Las filas de cada región son contiguas: elegir regiones es tomar sus tramos, sin volver a
+    dividir, transponer ni pasar a formato largo en cada ejecución de la página.
+    """
+
+    def __init__(self, frame, scale=1.0, value_name='value', region_name='Region', year_name='year'):
+        self.wide = frame.sort_index() / scale
+        self.regions = self.wide.index
+        self.value_name = value_name
+        self.region_name = region_name
+        self.year_name = year_name
+        self.years = pd.to_datetime(self.wide.columns.astype(str), format='%Y')
+        n_regions, n_years = self.wide.shape
+        self.long = pd.DataFrame({
+            year_name: np.tile(self.years.to_numpy(), n_regions),
+            region_name: np.repeat(self.regions.to_numpy(), n_years),
+            value_name: self.wide.to_numpy(dtype='float64').ravel()
+        })
+
+    @property
+    def nbytes(self):
+        return int(self.wide.memory_usage(index=True, deep=True).sum() + self.long.memory_usage(deep=True).sum())
+
+    def positions(self, regions):
+        """Posiciones (en el orden de la tabla) de las regiones elegidas que existen."""
+        positions = self.regions.get_indexer(list(dict.fromkeys(regions)))
+        return np.sort(positions[positions >= 0])
+
+    def table(self, regions):
+        """Tabla ancha (una fila por región) de las regiones elegidas, ordenada por región."""
+        return self.wide.iloc[self.positions(regions)]
+
+    def select(self, regions):
+        """Filas en formato largo de las regiones elegidas."""
+        n_years = len(self.years)
+        rows = (self.positions(regions)[:, None] * n_years + np.arange(n_years)).ravel()
+        return self.long.iloc[rows].reset_index(drop=True)
+
+    def chart_data(self, regions, budget=CHART_POINTS, reduction='lttb'):
+        """Puntos del gráfico de las regiones elegidas; si superan budget y se indicó una reducción
+        (una de REDUCTIONS), cada serie se reduce a budget / regiones puntos."""
+        data = self.select(regions)
+        n_series = len(self.positions(regions))
+        if reduction is None or len(data) <= budget or not n_series:
+            return data
+        points = max(budget // n_series, 3)
+        if reduction == 'periodo':
+            return self._period_means(data, points)
+        # Todas las series tienen los mismos años: se reducen juntas como una matriz. Los valores
+        # faltantes cuentan como 0 al elegir los puntos y no se envían al gráfico.
+        n_years = len(self.years)
+        values = data[self.value_name].to_numpy(dtype='float64').reshape(n_series, n_years)
+        x = self.years.to_numpy(dtype='datetime64[D]').astype('float64')
+        chosen = lttb(x, np.nan_to_num(values), points)
+        rows = (np.arange(n_series)[:, None] * n_years + chosen).ravel()
+        data = data.iloc[rows]
+        return data[data[self.value_name].notna()].reset_index(drop=True)
+
+    def _period_means(self, data, points):
+        # Períodos de varios años consecutivos; cada período se representa por su primer año
+        n_years = len(self.years)
+        width = math.ceil(n_years / points)
+        period = np.tile(np.arange(n_years) // width, len(data) // n_years)
+        grouped = data.assign(_periodo=period).groupby([self.region_name, '_periodo'], sort=False)
+        return grouped.agg({self.year_name: 'first', self.value_name: 'mean'}).reset_index()[
+            [self.year_name, self.region_name, self.value_name]
+        ]
+
+
+# Función para obtener las series por región compartidas por todas las sesiones; solo se recalculan
+# cuando cambia el contenido de la tabla (frame_version)
+def shared_series(frame, scale=1.0, value_name='value', cache=result_cache):
+    return cache.get(
+        ('series', frame_version(frame), scale, value_name),
+        lambda: RegionSeries(frame, scale, value_name), persist=False
+    )
@@ -0,0 +1,163 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+class KeyIndex:
+    """Índice de una columna clave: claves distintas codificadas como enteros y filas agrupadas por código."""
+
+    def __init__(self, keys):
+        # NaN se trata como una clave más, igual que en pd.merge
+        codes, uniques = pd.factorize(keys, use_na_sentinel=False)
+        self.keys = pd.Index(uniques)
+        counts = np.bincount(codes, minlength=len(uniques))
+        # Un elemento centinela al final: el código -1 (clave inexistente) tiene 0 filas
+        self.counts = np.append(counts, 0)
+        self.offsets = np.append(np.cumsum(counts) - counts, 0).astype('int64')
+        # Filas ordenadas por código; el orden estable conserva el orden original dentro de cada clave
+        self.order = np.argsort(codes, kind='stable')
+        self.size = len(codes)
+
+    def lookup(self, keys):
+        """Devuelve el código de cada clave buscada (-1 si no existe en el índice)."""
+        try:
+            # Búsqueda por hash en Arrow; NaN/None coincide con NaN/None, igual que en pd.merge
+            codes = pc.index_in(
+                pa.array(keys, from_pandas=True), value_set=pa.array(self.keys, from_pandas=True), skip_nulls=False
+            )
+            return pc.fill_null(codes, -1).to_numpy().astype('int64')
+        except (pa.ArrowException, TypeError):
+            # Claves de tipos mixtos o no soportados por Arrow
+            return self.keys.get_indexer(pd.Index(keys))
+
+
+class JoinPlan:
+    """Filas de cada tabla que forman el resultado de una unión, con su diagnóstico."""
+
+    def __init__(self, left_keys, index, how, sample_size=10):
+        left_codes = index.lookup(left_keys)
+        matches = index.counts[left_codes]
+        # En la unión 'left' las filas sin correspondencia se conservan una vez, con la parte derecha vacía
+        repeats = np.maximum(matches, 1) if how == 'left' else matches
+
+        self.left_take = np.repeat(np.arange(len(left_codes)), repeats)
+        # Posición de cada fila de salida dentro del grupo de su clave en la tabla derecha
+        group_start = np.repeat(index.offsets[left_codes], repeats)
+        within = np.arange(len(self.left_take)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        right_take = index.order[group_start + within] if index.size else np.zeros(len(self.left_take), dtype='int64')
+        self.right_take = np.where(np.repeat(matches > 0, repeats), right_take, -1)
+
+        # Diagnóstico a partir de los códigos ya calculados, sin otra pasada sobre las tablas
+        unmatched = left_codes < 0
+        unmatched_keys = pd.unique(np.asarray(left_keys, dtype=object)[unmatched])
+        left_per_key = np.bincount(left_codes[~unmatched], minlength=len(index.keys))
+        self.diagnostics = {
+            'how': how,
+            'left_rows': len(left_codes),
+            'right_rows': index.size,
+            'output_rows': len(self.left_take),
+            'cardinality': _cardinality(left_per_key, index.counts[:-1]),
+            'unmatched_left_rows': int(unmatched.sum()),
+            'unmatched_left_keys': len(unmatched_keys),
+            'unmatched_right_keys': int((left_per_key == 0).sum()),
+            'unmatched_sample': list(unmatched_keys[:sample_size])
+        }
+
+
+# Función para describir la cardinalidad de una unión a partir de los conteos por clave
+def _cardinality(left_per_key, right_per_key):
+    used = left_per_key > 0
+    if not used.any():
+        return '1:1'
+    many_left = bool(left_per_key.max() > 1)
+    many_right = bool(right_per_key[used].max() > 1)
+    return {(False, False): '1:1', (False, True): '1:N', (True, False): 'N:1', (True, True): 'N:M'}[
+        (many_left, many_right)
+    ]
+
+
+class JoinCache:
+    """Índices y planes de unión reutilizados mientras no cambie la versión de las copias locales."""
+
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        # Sin versión no hay forma segura de reutilizar: se construye cada vez
+        if None in key:
+            return build()
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        value = build()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Instancia compartida por todas las páginas y sesiones del proceso
+join_cache = JoinCache()
+
+
+# Función para armar la tabla unida a partir de un plan
+def _apply_plan(left, right, on, plan, suffixes):
+    # Columnas repetidas (excepto la clave) con sufijos, como pd.merge
+    overlap = (set(left.columns) & set(right.columns)) - {on}
+    left_part = left.take(plan.left_take).reset_index(drop=True)
+    left_part.columns = [f"{col}{suffixes[0]}" if col in overlap else col for col in left.columns]
+    right_columns = [col for col in right.columns if col != on]
+    right_part = right[right_columns].reset_index(drop=True)
+    if (plan.right_take < 0).any():
+        # reindex deja vacías (NaN) las filas sin correspondencia, con los mismos tipos que pd.merge
+        right_part = right_part.reindex(plan.right_take)
+    else:
+        right_part = right_part.take(plan.right_take)
+    right_part = right_part.reset_index(drop=True)
+    right_part.columns = [f"{col}{suffixes[1]}" if col in overlap else col for col in right_columns]
+    return pd.concat([left_part, right_part], axis=1)
+
+
+# Función para unir dos tablas por una columna, como pd.merge(left, right, on=on, how=how) con how
+# 'inner' o 'left'. Las filas conservan el orden de la tabla izquierda. Si se indican las versiones
+# de ambas tablas (p. ej. el hash de su copia local), el índice de la tabla derecha y el plan de la
+# unión se reutilizan entre ejecuciones. Devuelve la tabla unida y un diccionario de diagnóstico.
+def indexed_merge(left, right, on, how='inner', left_version=None, right_version=None,
+                  suffixes=('_x', '_y'), cache=join_cache):
+    if how not in ('inner', 'left'):
+        raise ValueError(f"Tipo de unión no soportado: {how}")
+    index = cache.get(('index', on, right_version), lambda: KeyIndex(right[on]))
+    plan = cache.get(('plan', on, how, left_version, right_version), lambda: JoinPlan(left[on], index, how))
+    diagnostics = dict(plan.diagnostics, on=on)
+    return _apply_plan(left, right, on, plan, suffixes), diagnostics
+
+
+# Función para obtener la versión de una tabla unida a partir de las versiones de sus partes
+def merged_version(left_version, right_version, on, how):
+    if left_version is None or right_version is None:
+        return None
+    return (left_version, right_version, on, how)
+
+
+# Función para presentar los diagnósticos de varias uniones como una tabla
+def diagnostics_frame(diagnostics):
+    frame = pd.DataFrame(diagnostics)
+    if 'unmatched_sample' in frame:
+        frame['unmatched_sample'] = frame['unmatched_sample'].map(lambda keys: ', '.join(map(str, keys)))
+    return frame
@@ -1,197 +1,239 @@
 import streamlit as st
-import pandas as pd
-import re
-from datetime import datetime
-from dateutil import parser
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from eficiencia.calidad import check_operations, combine_anomalies, shared_check_sheets
+from eficiencia.compartido import result_cache
+from eficiencia.cubo import shared_cube
+from eficiencia.esquema import DATE_COLUMNS, memory_report
+from eficiencia.estaciones import available_stations, select_kpis
+from eficiencia.exportacion import FAST_START, SHEETS, open_export
+from eficiencia.incremental import shared_refresh
+from eficiencia.ingesta import SHEET_SPECS, STREAMING
+from eficiencia.kpi import STATION_REGISTRY, STATIONS
+from eficiencia.pipeline import source_versions
+from eficiencia.medicion import mark, profile, stage
+from eficiencia.pendientes import shared_backlog
+from eficiencia.refresco import BACKGROUND_REFRESH, refresher
+from eficiencia.uniones import diagnostics_frame
+from utils import debug_panel, load_sources, paged_table, show_anomalies, start_measurement
 
 # Configuración inicial de la página
 st.set_page_config(page_title="Análisis de Eficiencia Operativa", page_icon="📊")
 
-# URL del Google Sheet en formato CSV
-# Asegúrate de reemplazar 'SheetName' con el nombre real de tu hoja
-sheet_url_csv = "https://docs.google.com/spreadsheets/d/e/2PACX-1vTG0WVV5FQNxYyOz0UM0YEkT9u8vGnzrwfUt7pVmJUHKGjDyKas_scI6XhY_ce_sTxRPtwVZw1Ggfyi/pub?gid=918102047&single=true&output=csv"
-sheet_operaciones_url_csv="https://docs.google.com/spreadsheets/d/e/2PACX-1vTG0WVV5FQNxYyOz0UM0YEkT9u8vGnzrwfUt7pVmJUHKGjDyKas_scI6XhY_ce_sTxRPtwVZw1Ggfyi/pub?gid=1958213072&single=true&output=csv"
-sheet_desembolsos_url_csv = "https://docs.google.com/spreadsheets/d/e/2PACX-1vTG0WVV5FQNxYyOz0UM0YEkT9u8vGnzrwfUt7pVmJUHKGjDyKas_scI6XhY_ce_sTxRPtwVZw1Ggfyi/pub?gid=1839704968&single=true&output=csv"
-
-# Función para cargar los datos desde la URL
-def load_data_from_url(url):
-    try:
-        return pd.read_csv(url, header=0)
-    except Exception as e:
-        st.error("Error al cargar los datos: " + str(e))
-        return None
-
-# Función para convertir las fechas del formato español al formato estándar
-def convert_spanish_date(date_str):
-    months = {
-        'ENE': 'Jan', 'FEB': 'Feb', 'MAR': 'Mar', 'ABR': 'Apr', 'MAY': 'May', 'JUN': 'Jun',
-        'JUL': 'Jul', 'AGO': 'Aug', 'SEP': 'Sep', 'OCT': 'Oct', 'NOV': 'Nov', 'DIC': 'Dec'
-    }
-    match = re.match(r"(\d{2}) (\w{3}) (\d{2})", date_str)
-    if match:
-        day, spanish_month, year = match.groups()
-        english_month = months.get(spanish_month.upper())
-        if english_month:
-            return datetime.strptime(f"{day} {english_month} 20{year}", "%d %b %Y").strftime("%d/%m/%Y")
-    return date_str
-
-def calculate_kpi(end_date, start_date):
-    try:
-        # Convertir a datetime si son cadenas
-        if isinstance(start_date, str):
-            start_date = pd.to_datetime(start_date, errors='coerce')
-        if isinstance(end_date, str):
-            end_date = pd.to_datetime(end_date, errors='coerce')
-
-        if pd.isnull(start_date) or pd.isnull(end_date):
-            return None
-
-        kpi_value = round(((end_date - start_date).days / 30), 2)
-        if kpi_value < 0:  # Comprobar si el KPI es negativo
-            return None  # Devolver None si el KPI es negativo
-        return kpi_value
-    except Exception as e:
-        # Manejar cualquier otro error inesperado
-        st.error(f"Error al calcular KPI: {e}")
-        return None
-
-def calculate_productivity(kpi):
-    if kpi is None:
-        return "Datos insuficientes"
-    if kpi < 6:
-        return "Eficiente"
-    elif kpi < 8:
-        return "Aceptable"
-    elif kpi < 12:
-        return "Con Demora"
+def run(results_df):
+    # Asegúrate de que 'results_df' contiene tus datos
+    if results_df is not None:
+        # Mostrar el DataFrame de resultados por páginas
+        paged_table(
+            results_df, 'kpi', filter_columns=['ESTACIONES', 'PAIS', 'Productividad'],
+            search_columns=['CODIGO'], count_column='Productividad'
+        )
+
+
+# Función para mostrar el resumen del KPI a partir del cubo de agregados (sin recorrer la tabla de KPI)
+def show_cube(cube):
+    st.subheader("Resumen de KPI")
+    group_by = st.multiselect(
+        "Agrupar por", cube.dimensions, default=['ESTACIONES', 'Productividad'], key='cubo_grupos'
+    )
+    filters = {}
+    with st.expander("Filtros del resumen"):
+        for dim in cube.dimensions:
+            filters[dim] = st.multiselect(dim, list(cube.levels[dim]), format_func=str, key=f'cubo_{dim}')
+    st.dataframe(cube.query(group_by, filters), hide_index=True)
+
+
+# Función para mostrar las operaciones en estación a una fecha y su serie mensual, desde el índice de
+# pendientes (sin filtrar la tabla por cada fecha)
+def show_backlog(backlog):
+    st.subheader("Operaciones en estación")
+    if not len(backlog):
+        st.info("No hay estaciones elegidas con operaciones.")
+        return
+    group_by = st.multiselect("Agrupar por", backlog.dimensions, default=['ESTACION'], key='pendientes_grupos')
+    filters = {}
+    with st.expander("Filtros de pendientes"):
+        for dim in backlog.dimensions:
+            filters[dim] = st.multiselect(dim, list(backlog.levels[dim]), format_func=str, key=f'pendientes_{dim}')
+    date = st.date_input(
+        "Fecha", value=backlog.last_day.item(), min_value=backlog.first_day.item(),
+        max_value=backlog.last_day.item(), key='pendientes_fecha'
+    )
+    st.dataframe(backlog.query(date, group_by, filters), hide_index=True)
+    # Serie mensual: una línea por grupo
+    series = backlog.monthly(group_by, filters)
+    if group_by:
+        series = series.assign(grupo=series[group_by].astype(str).agg(' / '.join, axis=1))
+        series = series.pivot(index='fecha', columns='grupo', values='operaciones')
     else:
-        return "Alta Demora"
-
-def get_year_for_operation(date_str):
-    if pd.notnull(date_str):
-        try:
-            # Parsear la fecha y devolver el año
-            return parser.parse(date_str).year
-        except (ValueError, TypeError):
-            # Devuelve None si hay un problema al parsear la fecha
-            return None
-    else:
-        return None
-
-def get_first_word(station):
-    return station.split()[0] if station else None
-
-# Función para preprocesar y estandarizar las fechas
-def preprocess_date(date_str):
-    try:
-        # Intenta parsear la fecha con dateutil.parser que es flexible con los formatos
-        dt = parser.parse(date_str)
-        # Formatea la fecha al formato día/mes/año
-        return dt.strftime('%d/%m/%Y')
-    except (ValueError, TypeError):
-        # Devuelve None si hay un problema al parsear la fecha
-        return None
-
-def run(filtered_df):
-    # Asegúrate de que 'filtered_df' contiene tus datos
-    if filtered_df is not None:
-        data = filtered_df.copy()
-
-        # Convertir las columnas de fecha a datetime si aún no lo están
-        date_columns = ['CARTA CONSULTA', 'APROBACIÓN', 'FechaVigencia', 'FechaEfectiva']
-        for col in date_columns:
-            data[col] = pd.to_datetime(data[col], errors='coerce')
-
-        # Mapeo de estaciones a sus respectivas columnas de fecha
-        operations = {
-            'Vigencia - Aprobacion': ('APROBACIÓN', 'FechaVigencia'),
-            'Aprobacion - Carta Consulta': ('CARTA CONSULTA', 'APROBACIÓN'),
-            'Elegibilidad - Vigencia': ('FechaVigencia', 'FechaElegibilidad'),
-            'PrimerDesembolso - Elegibilidad': ('FechaEfectiva', 'FechaElegibilidad')
-        }
-
-        # Lista para almacenar los resultados
-        results = []
-
-        # Procesar las filas del DataFrame
-        for index, row in data.iterrows():
-            for operation, (start_col, end_col) in operations.items():
-                kpi = calculate_kpi(row[end_col], row[start_col])
-                productividad = calculate_productivity(kpi)
-                year = get_year_for_operation(row[end_col])
-
-                # Usar strftime solo si la fecha es un objeto datetime
-                indicador_principal = row[end_col].strftime('%d/%m/%Y') if pd.notnull(row[end_col]) and isinstance(row[end_col], datetime) else None
-                indicador_secundario = row[start_col].strftime('%d/%m/%Y') if pd.notnull(row[start_col]) and isinstance(row[start_col], datetime) else None
-
-                results.append({
-                    'ESTACIONES': get_first_word(operation),
-                    'ANO': year,
-                    'PAIS': row['Pais'],
-                    'CODIGO': row['NoOperacion'],
-                    'APODO': row['Alias'],
-                    'Indicador_Principal': indicador_principal,
-                    'Indicador_Secundario': indicador_secundario,
-                    'TIPO_DE_KPI': operation,
-                    'KPI': kpi,
-                    'Productividad': productividad
-                })
-
-        # Convertir la lista de resultados en un DataFrame
-        results_df = pd.DataFrame(results)
-
-        # Limpiar los valores negativos o None de KPI y establecerlos en None
-        results_df['KPI'] = results_df['KPI'].apply(lambda x: x if x is not None and x >= 0 else None)
-
-        # Filtrar para mantener solo las filas donde el KPI es mayor a 0
-        results_df = results_df[results_df['KPI'] > 0]
-
-        # Mostrar el DataFrame de resultados
-        st.write(results_df)
+        series = series.set_index('fecha')[['operaciones']]
+    st.line_chart(series)
+
+
+# Función para mostrar las tablas, el cubo y los paneles de la barra lateral. results_df, si se
+# conoce, es la tabla de KPI de las estaciones por defecto (STATIONS); sheet_anomalies, las
+# anomalías de las hojas (no se conocen al arrancar desde una exportación)
+def show_tables(filtered_df, versions, joins, results_df=None, sheet_anomalies=None):
+    # Estaciones del registro a mostrar; las que tienen sus dos columnas de fecha en la tabla
+    options = available_stations(filtered_df)
+    selected = st.sidebar.multiselect(
+        "Estaciones", options, default=[name for name in STATIONS if name in options], key='estaciones'
+    )
+
+    # Mostrar el DataFrame con las fechas preprocesadas (datetime64 presentadas como dd/mm/aaaa)
+    with stage('presentacion', rows_in=filtered_df):
+        paged_table(
+            filtered_df, 'filtradas', filter_columns=['Pais', 'SEC'], search_columns=['NoOperacion'],
+            count_column='Pais', column_config={
+                col: st.column_config.DateColumn(format="DD/MM/YYYY") for col in DATE_COLUMNS if col in filtered_df
+            }
+        )
+        # Tiempo hasta la primera tabla visible
+        mark('primera_vista')
+
+    # KPI solo de las estaciones elegidas; cada estación se calcula una vez por versión de las hojas
+    if results_df is None or selected != list(STATIONS):
+        with stage('kpi', rows_in=filtered_df) as current:
+            results_df = select_kpis(filtered_df, selected, versions)
+            current.rows_out = len(results_df)
+    with stage('presentacion', rows_in=results_df):
+        # Llama a la función run para realizar el análisis adicional
+        run(results_df)
+
+    # Cubo de agregados del KPI, reconstruido solo cuando cambian las hojas o las estaciones elegidas
+    with stage('cubo', rows_in=results_df):
+        cube = shared_cube(results_df, filtered_df, tuple(versions) + (tuple(selected),))
+    with stage('presentacion'):
+        show_cube(cube)
+
+    # Índice de operaciones en estación, reconstruido solo cuando cambian las hojas o las estaciones
+    with stage('pendientes', rows_in=filtered_df):
+        backlog = shared_backlog(
+            filtered_df, {name: STATION_REGISTRY[name] for name in selected}, tuple(versions) + (tuple(selected),)
+        )
+    with stage('presentacion'):
+        show_backlog(backlog)
+
+    # Validación de fechas y duraciones de las estaciones elegidas, una vez por versión de las hojas
+    with stage('calidad', rows_in=filtered_df) as current:
+        anomalies = combine_anomalies(sheet_anomalies, result_cache.get(
+            ('calidad', 'unida') + tuple(versions) + (tuple(selected),),
+            lambda: check_operations(filtered_df, {name: STATION_REGISTRY[name] for name in selected})
+        ))
+        current.rows_out = len(anomalies)
+    with stage('presentacion', rows_in=anomalies):
+        show_anomalies(anomalies)
+
+    # Paneles de la barra lateral, después de las tablas
+    with st.sidebar.expander("Resultados compartidos"):
+        cache_stats = result_cache.stats()
+        st.caption(
+            f"{cache_stats['entries']} resultados, {cache_stats['bytes'] / 2 ** 20:.1f} de "
+            f"{cache_stats['max_bytes'] / 2 ** 20:.0f} MB; {cache_stats['hits']} aciertos, "
+            f"{cache_stats['waits']} esperas"
+        )
+        st.dataframe(result_cache.entries_frame())
+    if joins:
+        with st.sidebar.expander("Diagnóstico de uniones"):
+            st.dataframe(diagnostics_frame(joins))
+
+    with st.sidebar.expander("Memoria por columna"):
+        # Se calcula una vez por versión de las hojas (convertir a objetos para comparar es costoso)
+        st.dataframe(result_cache.get(('memoria',) + tuple(versions), lambda: memory_report(filtered_df)))
+
+
+# Función para mostrar la última exportación mientras las hojas se cargan en segundo plano.
+# Devuelve False si no hay exportación (la página carga las hojas como siempre).
+def show_export():
+    with stage('exportacion'):
+        exported = open_export()
+    if exported is None:
+        return False
+    filtered_df, results_df, manifest = exported
+    st.sidebar.caption(
+        f"Datos de la exportación {manifest['version']} del {manifest['built_at'][:19]} UTC; "
+        "actualizando en segundo plano"
+    )
+    show_refresh_error()
+    versions = tuple(manifest['sources'][name] for name in SHEETS)
+    show_tables(filtered_df, versions, filtered_df.attrs.get('joins'), results_df)
+    return True
+
+
+# Función para presentar una antigüedad en segundos, minutos u horas
+def age_text(seconds):
+    if seconds < 60:
+        return f"{seconds:.0f} s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+# Función para avisar si fallaron las últimas actualizaciones en segundo plano
+def show_refresh_error():
+    status = refresher.status()
+    if status['error'] is not None:
+        retry = f"; nuevo intento en {age_text(status['next_in'])}" if status['next_in'] is not None else ""
+        st.sidebar.warning(
+            f"Error en la actualización en segundo plano ({status['failures']} seguidos): {status['error']}{retry}"
+        )
+
+
+# Función para mostrar la última versión publicada por la actualización en segundo plano
+def show_version(version):
+    st.sidebar.caption(
+        f"Datos actualizados hace {age_text(version.age)} (actualización de {version.seconds:.2f} s); "
+        f"la próxima en {age_text(refresher.status()['next_in'] or 0)}"
+    )
+    show_refresh_error()
+    stats = version.stats
+    st.sidebar.caption(
+        f"Actualización {stats['mode']}: {stats['affected_operations']} operaciones "
+        f"recalculadas en {stats['seconds']:.2f} s"
+    )
+    show_tables(version.filtered_df, version.versions, stats['joins'], version.results_df, version.anomalies)
 
 
 # Aplicación Streamlit
 def main():
     st.title("Mi Aplicación con Datos de Google Sheets")
 
+    # Con la actualización en segundo plano la página muestra la última versión terminada, sin
+    # esperar la carga de las hojas
+    if BACKGROUND_REFRESH or FAST_START:
+        refresher.start()
+        version = refresher.current
+        if version is not None:
+            show_version(version)
+            return
+        # Arranque rápido: hasta la primera actualización se muestra la última exportación
+        if FAST_START and show_export():
+            return
+
     # Carga los datos
-    data = load_data_from_url(sheet_url_csv)
-    data_operaciones = load_data_from_url(sheet_operaciones_url_csv)
-    data_desembolsos = load_data_from_url(sheet_desembolsos_url_csv)
+    data, data_operaciones, data_desembolsos = load_sources(specs=SHEET_SPECS if STREAMING else None)
 
     if data is not None and data_operaciones is not None and data_desembolsos is not None:
-        # Procesamiento de datos
-        date_columns = ['ABSTRACTO', 'CARTA CONSULTA', 'PERFIL', 'PROPUESTA OPERATIVA', 'ACTA NEGOCIACION', 'APROBACIÓN']
-        for col in date_columns:
-            data[col] = data[col].apply(lambda x: convert_spanish_date(x) if isinstance(x, str) else x)
-        data['NO. OPERACION'] = data['NO. OPERACION'].str.replace('-', '', regex=False)
-        data['NÚMERO'] = data['NÚMERO'].str.replace('-', '', regex=False)
-        data.rename(columns={'NÚMERO': 'NoProyecto'}, inplace=True)
-        data.rename(columns={'NO.OPERACION': 'NoOperacion'}, inplace=True)
-
-        # Unión de los datos
-        data_merged = pd.merge(data, data_operaciones, on='NoProyecto', how='inner')
-        data_merged_total = pd.merge(data_merged, data_desembolsos, on='NoOperacion', how='inner')
-
-        # Filtrar el DataFrame para conservar solo las columnas seleccionadas
-        selected_columns = [
-            'NoProyecto', 'NoOperacion', 'Pais', 'Alias', 'SEC', 'ARE', 
-            'CARTA CONSULTA', 'APROBACIÓN', 'PERFIL', 'PROPUESTA OPERATIVA', 
-            'FechaVigencia', 'FechaElegibilidad', 'FechaEfectiva', 'Estado_x'
-        ]
-        filtered_df = data_merged_total[selected_columns]
-
-        # Preprocesar las fechas en el DataFrame filtrado
-        date_columns = ['FechaVigencia', 'FechaElegibilidad', 'FechaEfectiva']
-        for date_col in date_columns:
-            filtered_df[date_col] = filtered_df[date_col].apply(preprocess_date)
-
-        # Mostrar el DataFrame con las fechas preprocesadas
-        st.write(filtered_df)
-
-        # Llama a la función run para realizar el análisis adicional
-        run(filtered_df)
+        # Unión de los datos, compartida entre sesiones; solo se recalculan las operaciones que cambiaron
+        ctx = get_script_run_ctx()
+        with stage('tablas', rows_in=(data, data_operaciones, data_desembolsos)) as current:
+            filtered_df, _, stats = shared_refresh(
+                data, data_operaciones, data_desembolsos, session=ctx.session_id if ctx else None
+            )
+            current.rows_out = len(filtered_df)
+        st.sidebar.caption(
+            f"Actualización {stats['mode']}: {stats['affected_operations']} operaciones "
+            f"recalculadas en {stats['seconds']:.2f} s"
+        )
+        versions = source_versions(data, data_operaciones, data_desembolsos)
+        with stage('calidad', rows_in=(data, data_operaciones, data_desembolsos)):
+            sheet_anomalies = shared_check_sheets(data, data_operaciones, data_desembolsos, versions)
+        show_tables(filtered_df, versions, stats['joins'], sheet_anomalies=sheet_anomalies)
 
 if __name__ == "__main__":
-    main()
+    # Medición de las etapas de la ejecución (y perfil, si se pidió desde el panel de depuración)
+    recorder, profiling = start_measurement("pagina_0")
+    with recorder.activate(), profile(profiling) as profile_result:
+        main()
+    debug_panel(recorder, profile_result)
 
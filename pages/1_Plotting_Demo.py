@@ -1,128 +1,55 @@
 import streamlit as st
-import pandas as pd
-import re
-from datetime import datetime
-import io
-import seaborn as sns
-import matplotlib.pyplot as plt
+
+from eficiencia.calidad import check_operations, combine_anomalies, shared_check_sheets
+from eficiencia.carga import PUBLISHED_SOURCES
+from eficiencia.compartido import result_cache
+from eficiencia.esquema import apply_schema, memory_report
+from eficiencia.fechas import parse_dates
+from eficiencia.medicion import profile, stage
+from eficiencia.paralelo import date_cache
+from eficiencia.pipeline import PROJECT_DATE_COLUMNS, source_versions
+from eficiencia.uniones import diagnostics_frame, indexed_merge
+from utils import debug_panel, load_sources, paged_table, show_anomalies, start_measurement
 
 # Configuración inicial de la página
 st.set_page_config(page_title="Análisis de Eficiencia Operativa", page_icon="📊")
 
-# URLs de las hojas de Google Sheets
-sheet_url_csv = "https://docs.google.com/spreadsheets/d/e/2PACX-1vTG0WVV5FQNxYyOz0UM0YEkT9u8vGnzrwfUt7pVmJUHKGjDyKas_scI6XhY_ce_sTxRPtwVZw1Ggfyi/pub?output=csv"
-sheet_operaciones_url_csv = "https://docs.google.com/spreadsheets/d/e/2PACX-1vTG0WVV5FQNxYyOz0UM0YEkT9u8vGnzrwfUt7pVmJUHKGjDyKas_scI6XhY_ce_sTxRPtwVZw1Ggfyi/pub?gid=1958213072&single=true&output=csv"
-sheet_desembolsos_url_csv = "https://docs.google.com/spreadsheets/d/e/2PACX-1vTG0WVV5FQNxYyOz0UM0YEkT9u8vGnzrwfUt7pVmJUHKGjDyKas_scI6XhY_ce_sTxRPtwVZw1Ggfyi/pub?gid=1839704968&single=true&output=csv"
-
-# Función para cargar los datos desde la URL
-def load_data_from_url(url):
-    try:
-        return pd.read_csv(url, header=0)
-    except Exception as e:
-        st.error("Error al cargar los datos: " + str(e))
-        return None
-
-# Función para convertir las fechas del formato español al formato estándar
-def convert_spanish_date(date_str):
-    months = {
-        'ENE': 'Jan', 'FEB': 'Feb', 'MAR': 'Mar', 'ABR': 'Apr', 'MAY': 'May', 'JUN': 'Jun',
-        'JUL': 'Jul', 'AGO': 'Aug', 'SEP': 'Sep', 'OCT': 'Oct', 'NOV': 'Nov', 'DIC': 'Dec'
-    }
-    match = re.match(r"(\d{2}) (\w{3}) (\d{2})", date_str)
-    if match:
-        day, spanish_month, year = match.groups()
-        english_month = months.get(spanish_month.upper())
-        if english_month:
-            return datetime.strptime(f"{day} {english_month} 20{year}", "%d %b %Y").strftime("%d/%m/%Y")
-    return date_str
-
-# Función para manejar diferentes formatos de fechas y valores nulos
-def convert_dates(date_str):
-    if pd.isnull(date_str):
-        return None
-
-    if not isinstance(date_str, str):
-        return date_str
-
-    months = {
-        'ene': '01', 'feb': '02', 'mar': '03', 'abr': '04', 'may': '05', 'jun': '06',
-        'jul': '07', 'ago': '08', 'sep': '09', 'oct': '10', 'nov': '11', 'dic': '12'
-    }
-
-    try:
-        day, month, year = date_str.split('-')
-        if len(year) == 2: 
-            year = f"20{year}"
-        month = months.get(month[:3].lower(), '00')
-        return f"{day.zfill(2)}/{month}/{year}"
-    except ValueError:
-        pass
-
-    try:
-        parts = date_str.split(' ')
-        day = parts[1]
-        month = parts[3].lower()[:3]
-        year = parts[5]
-        return f"{day.zfill(2)}/{months[month]}/{year}"
-    except (ValueError, IndexError):
-        pass
-
-    try:
-        return datetime.strptime(date_str, '%d-%b-%y').strftime('%d/%m/%Y')
-    except ValueError:
-        pass
-
-    return date_str
-
-# Función para calcular la diferencia en meses entre dos fechas
-def calculate_kpi(end_date, start_date):
-    if pd.isnull(start_date) or pd.isnull(end_date):
-        return None  # Si alguna de las fechas está vacía, el KPI no se calcula
-    return round(((end_date - start_date).days / 30), 2)
-
-# Función para calcular la productividad basada en el KPI
-def calculate_productivity(kpi):
-    if kpi is None:
-        return "Datos insuficientes"
-    if kpi < 6:
-        return "Eficiente"
-    elif kpi < 8:
-        return "Aceptable"
-    elif kpi < 12:
-        return "Con Demora"
-    else:
-        return "Alta Demora"
-
-# Función para obtener el año de una fecha
-def get_year_for_operation(date):
-    return date.year if pd.notnull(date) else None
-
-# Función para obtener solo la primera palabra de una cadena
-def get_first_word(station):
-    return station.split()[0] if station else None
-
 # Aplicación Streamlit
 def main():
     st.title("Mi Aplicación con Datos de Google Sheets")
 
     # Carga los datos
-    data = load_data_from_url(sheet_url_csv)
-    data_operaciones = load_data_from_url(sheet_operaciones_url_csv)
-    data_desembolsos = load_data_from_url(sheet_desembolsos_url_csv)
+    data, data_operaciones, data_desembolsos = load_sources(PUBLISHED_SOURCES)
 
     if data is not None and data_operaciones is not None and data_desembolsos is not None:
+        # Validación de las hojas tal como se cargan (antes de convertir sus fechas)
+        versions = source_versions(data, data_operaciones, data_desembolsos)
+        with stage('calidad', rows_in=(data, data_operaciones, data_desembolsos)):
+            sheet_anomalies = shared_check_sheets(data, data_operaciones, data_desembolsos, versions)
+
         # Procesamiento de datos
-        date_columns = ['ABSTRACTO', 'CARTA CONSULTA', 'PERFIL', 'PROPUESTA OPERATIVA', 'ACTA NEGOCIACION', 'APROBACIÓN']
-        for col in date_columns:
-            data[col] = data[col].apply(lambda x: convert_spanish_date(x) if isinstance(x, str) else x)
+        date_columns = list(PROJECT_DATE_COLUMNS)
+        with stage('fechas', rows_in=data):
+            dates = date_cache([data[col] for col in date_columns])
+            for col in date_columns:
+                data[col] = parse_dates(data[col], dates)
         data['NO. OPERACION'] = data['NO. OPERACION'].str.replace('-', '', regex=False)
         data['NÚMERO'] = data['NÚMERO'].str.replace('-', '', regex=False)
         data.rename(columns={'NÚMERO': 'NoProyecto'}, inplace=True)
         data.rename(columns={'NO.OPERACION': 'NoOperacion'}, inplace=True)
 
-        # Unión de los datos
-        data_merged = pd.merge(data, data_operaciones, on='NoProyecto', how='left')
-        data_merged_total = pd.merge(data_merged, data_desembolsos, on='NoOperacion', how='left')
+        # Unión de los datos (el índice de cada hoja se reutiliza mientras no cambie su copia local)
+        with stage('union', rows_in=(data, data_operaciones, data_desembolsos)) as current:
+            data_merged, first = indexed_merge(
+                data, data_operaciones, 'NoProyecto', 'left', right_version=data_operaciones.attrs.get('snapshot')
+            )
+            data_merged_total, second = indexed_merge(
+                data_merged, data_desembolsos, 'NoOperacion', 'left',
+                right_version=data_desembolsos.attrs.get('snapshot')
+            )
+            current.rows_out = len(data_merged_total)
+        with st.sidebar.expander("Diagnóstico de uniones"):
+            st.dataframe(diagnostics_frame([first, second]))
 
         # Filtrar el DataFrame para conservar solo las columnas seleccionadas
         selected_columns = [
@@ -130,26 +57,39 @@ def main():
             'CARTA CONSULTA', 'APROBACIÓN', 'PERFIL', 'PROPUESTA OPERATIVA', 'FechaElegibilidad',
             'FechaVigencia', 'FechaEfectiva', 'Estado_x'
         ]
-        filtered_df = data_merged_total[selected_columns]
-
-        # Convertir las fechas en las columnas seleccionadas usando la función convert_dates
-        for col in ['FechaElegibilidad', 'FechaVigencia', 'FechaEfectiva']:
-            filtered_df[col] = filtered_df[col].apply(convert_dates)
-
-        # Convertir las columnas de fecha al formato datetime
-        for col in date_columns:
-            filtered_df[col] = pd.to_datetime(filtered_df[col], errors='coerce')
+        # Las fechas quedan como datetime64, sin pasar por texto dd/mm/aaaa
+        with stage('esquema', rows_in=data_merged_total):
+            filtered_df = apply_schema(data_merged_total[selected_columns])
+        date_columns = [col for col in date_columns if col in filtered_df.columns]
 
         # Extraer el año de cada columna de fecha
         for col in date_columns:
             filtered_df[col + '_ANO'] = filtered_df[col].dt.year
         
-        # Mostrar el nuevo DataFrame filtrado
-        st.write(filtered_df)
+        # Mostrar el nuevo DataFrame filtrado por páginas
+        with stage('presentacion', rows_in=filtered_df):
+            paged_table(
+                filtered_df, 'filtradas', filter_columns=['Pais', 'SEC'], search_columns=['NoOperacion'],
+                count_column='Pais'
+            )
+        with st.sidebar.expander("Memoria por columna"):
+            # Se calcula una vez por versión de las hojas (convertir a objetos para comparar es costoso);
+            # la tabla de esta página tiene columnas de año que la de la página 0 no tiene
+            st.dataframe(result_cache.get(('memoria', 'pagina_1') + versions, lambda: memory_report(filtered_df)))
+
+        # Fechas fuera de orden y duraciones negativas o cero de las estaciones, con las anomalías de las hojas
+        with stage('calidad', rows_in=filtered_df) as current:
+            anomalies = combine_anomalies(sheet_anomalies, check_operations(filtered_df))
+            current.rows_out = len(anomalies)
+        show_anomalies(anomalies)
 
 # Ejecutar la aplicación Streamlit
 if __name__ == "__main__":
-    main()
+    # Medición de las etapas de la ejecución (y perfil, si se pidió desde el panel de depuración)
+    recorder, profiling = start_measurement("pagina_1")
+    with recorder.activate(), profile(profiling) as profile_result:
+        main()
+    debug_panel(recorder, profile_result)
 
 
 
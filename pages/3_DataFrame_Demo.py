@@ -18,7 +18,9 @@ import altair as alt
 import pandas as pd
 
 import streamlit as st
-from streamlit.hello.utils import show_code
+
+from eficiencia.series import CHART_POINTS, shared_series
+from utils import show_code
 
 
 def data_frame_demo():
@@ -28,22 +30,29 @@ def data_frame_demo():
         df = pd.read_csv(AWS_BUCKET_URL + "/agri.csv.gz")
         return df.set_index("Region")
 
+    # Long-format, scaled series indexed by region, computed once per dataset version
+    # and shared by all sessions: a selection is a slice, not a new melt
+    value_name = "Gross Agricultural Product ($B)"
+    reductions = {"LTTB": "lttb", "Period average": "periodo", "None": None}
+
     try:
         df = get_UN_data()
+        series = shared_series(df, 1000000.0, value_name)
         countries = st.multiselect(
             "Choose countries", list(df.index), ["China", "United States of America"]
         )
+        reduction = st.sidebar.radio(
+            f"Downsampling above {CHART_POINTS:,} points", list(reductions), key="reduction"
+        )
         if not countries:
             st.error("Please select at least one country.")
         else:
-            data = df.loc[countries]
-            data /= 1000000.0
-            st.write("### Gross Agricultural Production ($B)", data.sort_index())
+            st.write("### Gross Agricultural Production ($B)", series.table(countries))
 
-            data = data.T.reset_index()
-            data = pd.melt(data, id_vars=["index"]).rename(
-                columns={"index": "year", "value": "Gross Agricultural Product ($B)"}
-            )
+            data = series.chart_data(countries, CHART_POINTS, reductions[reduction])
+            total = len(series.positions(countries)) * len(series.years)
+            if len(data) < total:
+                st.caption(f"Showing {len(data):,} of {total:,} points ({reduction}).")
             chart = (
                 alt.Chart(data)
                 .mark_area(opacity=0.3)
@@ -12,11 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import inspect
-import textwrap
-
+import pandas as pd
 import streamlit as st
 
+from eficiencia.codigo import source_registry
+from eficiencia.medicion import DEBUG, StageRecorder, stage
+
+# Los módulos de carga, validación y paginación se importan dentro de las funciones que los usan:
+# la página 3 solo usa show_code y no debe cargar el pipeline (hilos, cachés compartidas) al arrancar
+
 
 def show_code(demo):
     """Showing the code of the demo."""
@@ -24,5 +28,118 @@ def show_code(demo):
     if show_code:
         # Showing the code of the demo.
         st.markdown("## Code")
-        sourcelines, _ = inspect.getsourcelines(demo)
-        st.code(textwrap.dedent("".join(sourcelines[1:])))
+        # The source is extracted once per process and file version (eficiencia.codigo)
+        with stage('codigo'):
+            st.code(source_registry.snippet(demo))
+
+
+# Función para cargar las tres hojas en paralelo (usa la copia local compartida si está vigente);
+# con specs se leen por bloques, solo las columnas necesarias y ya tipadas. Por defecto, las hojas
+# de eficiencia.carga.SHEET_SOURCES.
+def load_sources(sources=None, specs=None):
+    from eficiencia.carga import SHEET_SOURCES, load_sheets
+
+    frames, errors, timings = load_sheets(SHEET_SOURCES if sources is None else sources, timeout=60, specs=specs)
+    # Un error en una hoja se informa por separado sin bloquear la carga de las demás
+    for name, error in errors.items():
+        st.error(f"Error al cargar los datos de {name}: {error}")
+    st.sidebar.caption("Tiempos de carga: " + ", ".join(f"{name} {seconds:.2f} s" for name, seconds in timings.items()))
+    return frames['proyectos'], frames['operaciones'], frames['desembolsos']
+
+
+# Función para saber si se muestra el panel de depuración (EFICIENCIA_DEBUG=1 o ?debug=1 en la URL)
+def debug_enabled():
+    return DEBUG or st.query_params.get("debug") == "1"
+
+
+# Función para crear la medición de una ejecución de página. Devuelve la medición y si hay que
+# perfilar esta ejecución (se pide desde el panel y vale para una sola ejecución).
+def start_measurement(page):
+    track_memory = debug_enabled() and st.session_state.get("medir_memoria", False)
+    profiling = st.session_state.pop("perfilar", False)
+    return StageRecorder(page, track_memory), profiling
+
+
+# Función para mostrar en la barra lateral las mediciones de la ejecución y el último perfil
+def debug_panel(recorder, profile_result):
+    if not debug_enabled():
+        return
+    if profile_result:
+        st.session_state["perfil"] = profile_result
+    with st.sidebar.expander("Depuración"):
+        st.checkbox("Medir memoria (tracemalloc)", key="medir_memoria")
+        records = pd.DataFrame(recorder.records, columns=["stage", "seconds", "rows_in", "rows_out", "peak_bytes"])
+        st.dataframe(records, hide_index=True)
+        st.download_button(
+            "Mediciones (JSON lines)", recorder.to_jsonl(), file_name=f"{recorder.page}.jsonl",
+            mime="application/x-ndjson"
+        )
+        st.download_button(
+            "Mediciones (Prometheus)", recorder.to_prometheus(), file_name=f"{recorder.page}.prom",
+            mime="text/plain"
+        )
+        if st.button("Perfilar la próxima ejecución"):
+            st.session_state["perfilar"] = True
+            st.rerun()
+        last_profile = st.session_state.get("perfil", {})
+        if "error" in last_profile:
+            st.warning(f"No se pudo perfilar: {last_profile['error']}")
+        if "text" in last_profile:
+            st.download_button(
+                "Perfil (cProfile)", last_profile["data"], file_name=f"{recorder.page}.prof",
+                mime="application/octet-stream"
+            )
+            st.code(last_profile["text"])
+
+
+# Función para mostrar una tabla grande por páginas: el filtro, el orden y la página se resuelven en
+# el servidor y al navegador solo llega la página visible. filter_columns son columnas con pocos
+# valores (selección múltiple), search_columns columnas de texto (búsqueda) y count_column la
+# columna cuyo conteo de filas se muestra como resumen.
+def paged_table(frame, key, filter_columns=(), search_columns=(), count_column=None, column_config=None):
+    from eficiencia.paginacion import PAGE_SIZES, paged_view
+
+    view = paged_view(frame)
+    filters = {}
+    if filter_columns or search_columns:
+        columns = st.columns(len(filter_columns) + len(search_columns))
+        for column, col in zip(columns, filter_columns):
+            options = frame[col].dropna().unique()
+            filters[col] = column.multiselect(col, sorted(options, key=str), key=f"{key}_filtro_{col}")
+        for column, col in zip(columns[len(filter_columns):], search_columns):
+            filters[col] = column.text_input(f"Buscar {col}", key=f"{key}_buscar_{col}")
+
+    sort_column, order_column, size_column, page_column = st.columns([3, 2, 2, 2])
+    sort_by = sort_column.selectbox("Ordenar por", [None] + list(frame.columns), key=f"{key}_orden",
+                                    format_func=lambda col: "(sin orden)" if col is None else col)
+    ascending = order_column.radio("Orden", ["Ascendente", "Descendente"], key=f"{key}_sentido",
+                                   horizontal=True) == "Ascendente"
+    page_size = size_column.selectbox("Filas por página", PAGE_SIZES, key=f"{key}_tamano")
+    page = page_column.number_input("Página", min_value=1, value=1, step=1, key=f"{key}_pagina")
+
+    window, summary = view.window(filters, sort_by, ascending, int(page), page_size)
+    st.dataframe(window, column_config=column_config, hide_index=True)
+    st.caption(
+        f"Filas {summary['first']:,}–{summary['last']:,} de {summary['filtered']:,} filtradas "
+        f"({summary['total']:,} en total), página {summary['page']:,} de {summary['pages']:,}"
+    )
+    if count_column is not None:
+        counts = view.counts(count_column, filters)
+        st.caption(f"Filas por {count_column}: " + ", ".join(
+            f"{value} {count:,}" for value, count in counts[counts > 0].items()
+        ))
+    return summary
+
+
+# Función para mostrar la validación de datos: conteos por tipo, hoja y columna, y la tabla de
+# anomalías por páginas (una fila por anomalía, con su operación)
+def show_anomalies(anomalies):
+    from eficiencia.calidad import anomaly_counts
+
+    with st.expander(f"Calidad de datos: {len(anomalies):,} anomalías"):
+        st.dataframe(anomaly_counts(anomalies), hide_index=True)
+        if len(anomalies):
+            paged_table(
+                anomalies, "anomalias", filter_columns=["tipo", "hoja", "columna"], search_columns=["NoOperacion"],
+                count_column="tipo"
+            )